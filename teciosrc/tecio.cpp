@@ -514,7 +514,7 @@ else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_Geom
 return tecioSZL_GeomSquareGetSize(fileHandle, ___1555, size); else ___478(!"Not implemented for .plt files"); return -1; } void tecStringFree(char** string) { delete[] *string; *string = NULL; } int32_t tecStringLength(char const* string) { if (!VALID_REF(string)) return -1; return static_cast<int32_t>(strlen(string)); } namespace { int32_t numTexts(void* fileHandle) { REQUIRE(VALID_REF(fileHandle)); int32_t ___3358; if (tecTextGetNumTexts(fileHandle, &___3358) == 0) return ___3358; return 0; } bool validText(void* fileHandle, int32_t ___4042, char const* routineName) { REQUIRE(VALID_REF(fileHandle)); if (___4042 < 0 || numTexts(fileHandle) < ___4042) { std::cerr << "Invalid 'text' parameter passed to " << routineName << ". must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; return false; } return true; } } int32_t tecTextBoxGetColor(void* fileHandle, int32_t ___4042, int32_t* ___402) { if (!validFileHandle(fileHandle, FUNCTION_NAME) || !validText(fileHandle, ___4042, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextBoxGetColor. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(___402)) std::cerr << "Invalid 'boxColor' parameter to tecTextBoxGetColor. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextBoxGetColor(fileHandle, ___4042, ___402); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextBoxGetFillColor(void* fileHandle, int32_t ___4042, int32_t* ___404) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextBoxGetFillColor. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(___404)) std::cerr << "Invalid 'boxFillColor' parameter to tecTextBoxGetFillColor. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextBoxGetFillColor(fileHandle, ___4042, ___404); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextBoxGetLineThickness(void* fileHandle, int32_t ___4042, double* ___406) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextBoxGetLineThickness. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(___406)) std::cerr << "Invalid 'boxLineThickness' parameter to tecTextBoxGetLineThickness. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextBoxGetLineThickness(fileHandle, ___4042, ___406); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextBoxGetMargin(void* fileHandle, int32_t ___4042, double* ___408) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextBoxGetMargin. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(___408)) std::cerr << "Invalid 'boxMargin' parameter to tecTextBoxGetMargin. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextBoxGetMargin(fileHandle, ___4042, ___408); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextBoxGetType(void* fileHandle, int32_t ___4042, int32_t* ___410) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextBoxGetType. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(___410)) std::cerr << "Invalid 'boxType' parameter to tecTextBoxGetType. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextBoxGetType(fileHandle, ___4042, ___410); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextGetAnchor(void* fileHandle, int32_t ___4042, int32_t* ___38) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextGetAnchor. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(___38)) std::cerr << "Invalid 'anchor' parameter to tecTextGetAnchor. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetAnchor(fileHandle, ___4042, ___38); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextGetAnchorPos(void* fileHandle, int32_t ___4042, double* x, double* ___4583, double* z) { if (!validFileHandle(fileHandle, FUNCTION_NAME))
 return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextGetAnchorPos. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(x)) std::cerr << "Invalid 'x' parameter to tecTextGetAnchorPos. Must be a valid memory reference." << std::endl; else if (!VALID_REF(___4583)) std::cerr << "Invalid 'y' parameter to tecTextGetAnchorPos. Must be a valid memory reference." << std::endl; else if (!VALID_REF(z)) std::cerr << "Invalid 'z' parameter to tecTextGetAnchorPos. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetAnchorPos(fileHandle, ___4042, x, ___4583, z); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextGetAngle(void* fileHandle, int32_t ___4042, double* ___56) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextGetAngle. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(___56)) std::cerr << "Invalid 'angle' parameter to tecTextGetAngle. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetAngle(fileHandle, ___4042, ___56); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextGetClipping(void* fileHandle, int32_t ___4042, int32_t* ___495) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextGetClipping. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(___495)) std::cerr << "Invalid 'clipping' parameter to tecTextGetClipping. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetClipping(fileHandle, ___4042, ___495); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextGetColor(void* fileHandle, int32_t ___4042, int32_t* color) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextGetColor. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(color)) std::cerr << "Invalid 'color' parameter to tecTextGetColor. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetColor(fileHandle, ___4042, color); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextGetCoordMode(void* fileHandle, int32_t ___4042, int32_t* coordMode) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextGetCoordMode. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(coordMode)) std::cerr << "Invalid 'coordMode' parameter to tecTextGetCoordMode. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetCoordMode(fileHandle, ___4042, coordMode); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextGetHeight(void* fileHandle, int32_t ___4042, double* ___1826) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextGetHeight. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(___1826)) std::cerr << "Invalid 'height' parameter to tecTextGetHeight. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetHeight(fileHandle, ___4042, ___1826); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextGetLineSpacing(void* fileHandle, int32_t ___4042, double* ___2287) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextGetLineSpacing. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(___2287)) std::cerr << "Invalid 'lineSpacing' parameter to tecTextGetLineSpacing. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetLineSpacing(fileHandle, ___4042, ___2287); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextGetMacroFunctionCmd(void* fileHandle, int32_t ___4042, char** macroFunctionCmd) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextGetMacroFunctionCmd. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(macroFunctionCmd) || *macroFunctionCmd != NULL)
 std::cerr << "Invalid 'macroFunctionCmd' parameter to tecTextGetMacroFunctionCmd. Must be a valid memory reference and point to NULL." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetMacroFunctionCmd(fileHandle, ___4042, macroFunctionCmd); else ___478(!"Not implemented for .plt files"); return -1; } EXTERNC tecio_API int32_t tecTextGetNumTexts(void* fileHandle, int32_t* numTexts) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (!VALID_REF(numTexts)) std::cerr << "Invalid 'numTexts' parameter to tecTextGetNumTexts. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetNumTexts(fileHandle, numTexts); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextGetScope(void* fileHandle, int32_t ___4042, int32_t* ___3442) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextGetScope. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(___3442)) std::cerr << "Invalid 'scope' parameter to tecTextGetScope. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetScope(fileHandle, ___4042, ___3442); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextGetSizeUnits(void* fileHandle, int32_t ___4042, int32_t* sizeUnits) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextGetSizeUnits. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(sizeUnits)) std::cerr << "Invalid 'sizeUnits' parameter to tecTextGetSizeUnits. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetSizeUnits(fileHandle, ___4042, sizeUnits); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextGetString(void* fileHandle, int32_t ___4042, char** string) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextGetString. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(string) || *string != NULL) std::cerr << "Invalid 'string' parameter to tecTextGetString. Must be a valid memory reference and point to NULL." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetString(fileHandle, ___4042, string); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextGetTypeface(void* fileHandle, int32_t ___4042, char** typeface) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextGetTypeface. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(typeface) || *typeface != NULL) std::cerr << "Invalid 'typeface' parameter to tecTextGetTypeface. Must be a valid memory reference and point to NULL." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetTypeface(fileHandle, ___4042, typeface); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextGetZone(void* fileHandle, int32_t ___4042, int32_t* zone) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextGetZone. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(zone)) std::cerr << "Invalid 'zone' parameter to tecTextGetZone. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextGetZone(fileHandle, ___4042, zone); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextIsAttached(void* fileHandle, int32_t ___4042, int32_t* ___2004) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextIsAttached. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(___2004)) std::cerr << "Invalid 'isAttached' parameter to tecTextIsAttached. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextIsAttached(fileHandle, ___4042, ___2004); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextIsBold(void* fileHandle, int32_t ___4042, int32_t* isBold) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextIsBold. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl;
-else if (!VALID_REF(isBold)) std::cerr << "Invalid 'isBold' parameter to tecTextIsBold. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextIsBold(fileHandle, ___4042, isBold); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextIsItalic(void* fileHandle, int32_t ___4042, int32_t* isItalic) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextIsItalic. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(isItalic)) std::cerr << "Invalid 'isItalic' parameter to tecTextIsItalic. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextIsItalic(fileHandle, ___4042, isItalic); else ___478(!"Not implemented for .plt files"); return -1; } namespace { int32_t numVarAuxDataItems(void* fileHandle, int32_t ___4336) { REQUIRE(VALID_REF(fileHandle)); REQUIRE(___4336 > 0); int32_t ___2812; if (tecVarAuxDataGetNumItems(fileHandle, ___4336, &___2812) == 0) return ___2812; return 0; } } int32_t tecVarAuxDataGetItem(void* fileHandle, int32_t ___4336, int32_t whichItem, char** ___2685, char** ___4314) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4336 <= 0 || ___2843(fileHandle) < ___4336) std::cerr << "Invalid 'var' parameter to tecVarAuxDataGetItem. Must be 0 < var <= numVars." << std::endl; else if (whichItem < 0 || numVarAuxDataItems(fileHandle, ___4336) < whichItem) std::cerr << "Invalid 'whichItem' parameter to tecVarAuxDataGetItem. Must be 0 < whichItem <= numItems (" << numVarAuxDataItems(fileHandle, ___4336) << ")." << std::endl; else if (!VALID_REF(___2685) || *___2685 != NULL) std::cerr << "Invalid 'name' parameter to tecVarAuxDataGetItem. Must be a valid reference and point to NULL." << std::endl; else if (!VALID_REF(___4314) || *___4314 != NULL) std::cerr << "Invalid 'value' parameter to tecVarAuxDataGetItem. Must be a valid reference and point to NULL." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_VarAuxDataGetItem(fileHandle, whichItem, ___4336, ___2685, ___4314); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecVarAuxDataGetNumItems(void* fileHandle, int32_t ___4336, int32_t* ___2812) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4336 <= 0 || ___2843(fileHandle) < ___4336) std::cerr << "Invalid 'var' parameter to tecVarAuxDataGetNumItems. Must be 0 < var <= numVars." << std::endl; else if (!VALID_REF(___2812)) std::cerr << "Invalid 'numItems' parameter to tecVarAuxDataGetNumItems. Must be a valid reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_VarAuxDataGetNumItems(fileHandle, ___4336, ___2812); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecVarGetName(void* fileHandle, int32_t ___4336, char** ___2685) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4336 <= 0 || ___2843(fileHandle) < ___4336) std::cerr << "Invalid 'var' parameter to tecVarGetName. Must be 0 < var <= numVars." << std::endl; else if (!VALID_REF(___2685) || *___2685 != NULL) std::cerr << "Invalid 'name' parameter to tecVarGetName. Must be a valid reference and point to NULL." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_VarGetName(fileHandle, ___4336, ___2685); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecVarIsEnabled(void* fileHandle, int32_t ___4336, int32_t* isEnabled) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4336 <= 0 || ___2843(fileHandle) < ___4336) std::cerr << "Invalid 'var' parameter to tecVarIsEnabled. Must be 0 < var <= numVars." << std::endl; else if (!VALID_REF(isEnabled)) std::cerr << "Invalid 'isEnabled' parameter to tecVarIsEnabled. Must be a valid reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_VarIsEnabled(fileHandle, ___4336, isEnabled); else ___478(!"Not implemented for .plt files"); return -1; } namespace { int32_t ___2846(void* fileHandle) { REQUIRE(VALID_REF(fileHandle)); int32_t ___3358 = 0; if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) tecioSZL_DataSetGetNumZones(fileHandle, &___3358); else ___478(!"Not implemented for .plt files"); return ___3358; } } namespace { int32_t numZoneAuxDataItems(void* fileHandle, int32_t zone) { REQUIRE(VALID_REF(fileHandle)); REQUIRE(0 < zone && zone <= ___2846(fileHandle)); int32_t ___3358 = 0; if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) tecioSZL_ZoneAuxDataGetNumItems(fileHandle, zone, &___3358); else ___478(!"Not implemented for .plt files"); return ___3358; } } int32_t tecZoneAuxDataGetItem(void* fileHandle, int32_t zone, int32_t whichItem, char** ___2685, char** ___4314) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneAuxDataGetItem. Must be 0 < zone <= numZones." << std::endl;
+else if (!VALID_REF(isBold)) std::cerr << "Invalid 'isBold' parameter to tecTextIsBold. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextIsBold(fileHandle, ___4042, isBold); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecTextIsItalic(void* fileHandle, int32_t ___4042, int32_t* isItalic) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4042 < 0 || numTexts(fileHandle) < ___4042) std::cerr << "Invalid 'text' parameter to tecTextIsItalic. must be 0 < text < numTexts (" << numTexts(fileHandle) << ")." << std::endl; else if (!VALID_REF(isItalic)) std::cerr << "Invalid 'isItalic' parameter to tecTextIsItalic. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_TextIsItalic(fileHandle, ___4042, isItalic); else ___478(!"Not implemented for .plt files"); return -1; } namespace { int32_t numVarAuxDataItems(void* fileHandle, int32_t ___4336) { REQUIRE(VALID_REF(fileHandle)); REQUIRE(___4336 > 0); int32_t ___2812; if (tecVarAuxDataGetNumItems(fileHandle, ___4336, &___2812) == 0) return ___2812; return 0; } } int32_t tecVarAuxDataGetItem(void* fileHandle, int32_t ___4336, int32_t whichItem, char** ___2685, char** ___4314) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4336 <= 0 || ___2843(fileHandle) < ___4336) std::cerr << "Invalid 'var' parameter to tecVarAuxDataGetItem. Must be 0 < var <= numVars." << std::endl; else if (whichItem < 0 || numVarAuxDataItems(fileHandle, ___4336) < whichItem) std::cerr << "Invalid 'whichItem' parameter to tecVarAuxDataGetItem. Must be 0 < whichItem <= numItems (" << numVarAuxDataItems(fileHandle, ___4336) << ")." << std::endl; else if (!VALID_REF(___2685) || *___2685 != NULL) std::cerr << "Invalid 'name' parameter to tecVarAuxDataGetItem. Must be a valid reference and point to NULL." << std::endl; else if (!VALID_REF(___4314) || *___4314 != NULL) std::cerr << "Invalid 'value' parameter to tecVarAuxDataGetItem. Must be a valid reference and point to NULL." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_VarAuxDataGetItem(fileHandle, ___4336, whichItem, ___2685, ___4314); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecVarAuxDataGetNumItems(void* fileHandle, int32_t ___4336, int32_t* ___2812) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4336 <= 0 || ___2843(fileHandle) < ___4336) std::cerr << "Invalid 'var' parameter to tecVarAuxDataGetNumItems. Must be 0 < var <= numVars." << std::endl; else if (!VALID_REF(___2812)) std::cerr << "Invalid 'numItems' parameter to tecVarAuxDataGetNumItems. Must be a valid reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_VarAuxDataGetNumItems(fileHandle, ___4336, ___2812); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecVarGetName(void* fileHandle, int32_t ___4336, char** ___2685) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4336 <= 0 || ___2843(fileHandle) < ___4336) std::cerr << "Invalid 'var' parameter to tecVarGetName. Must be 0 < var <= numVars." << std::endl; else if (!VALID_REF(___2685) || *___2685 != NULL) std::cerr << "Invalid 'name' parameter to tecVarGetName. Must be a valid reference and point to NULL." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_VarGetName(fileHandle, ___4336, ___2685); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecVarIsEnabled(void* fileHandle, int32_t ___4336, int32_t* isEnabled) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (___4336 <= 0 || ___2843(fileHandle) < ___4336) std::cerr << "Invalid 'var' parameter to tecVarIsEnabled. Must be 0 < var <= numVars." << std::endl; else if (!VALID_REF(isEnabled)) std::cerr << "Invalid 'isEnabled' parameter to tecVarIsEnabled. Must be a valid reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_VarIsEnabled(fileHandle, ___4336, isEnabled); else ___478(!"Not implemented for .plt files"); return -1; } namespace { int32_t ___2846(void* fileHandle) { REQUIRE(VALID_REF(fileHandle)); int32_t ___3358 = 0; if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) tecioSZL_DataSetGetNumZones(fileHandle, &___3358); else ___478(!"Not implemented for .plt files"); return ___3358; } } namespace { int32_t numZoneAuxDataItems(void* fileHandle, int32_t zone) { REQUIRE(VALID_REF(fileHandle)); REQUIRE(0 < zone && zone <= ___2846(fileHandle)); int32_t ___3358 = 0; if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) tecioSZL_ZoneAuxDataGetNumItems(fileHandle, zone, &___3358); else ___478(!"Not implemented for .plt files"); return ___3358; } } int32_t tecZoneAuxDataGetItem(void* fileHandle, int32_t zone, int32_t whichItem, char** ___2685, char** ___4314) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneAuxDataGetItem. Must be 0 < zone <= numZones." << std::endl;
 else if (whichItem <= 0 || numZoneAuxDataItems(fileHandle, zone) < whichItem) std::cerr << "Invalid 'whichItem' parameter to tecZoneAuxDataGetItem. Must be 0 < whichItem <= numItems." << std::endl; else if (!VALID_REF(___2685) || *___2685 != NULL) std::cerr << "Invalid 'name' parameter to tecZoneAuxDataGetItem. Must be a valid memory reference and point to NULL." << std::endl; else if (!VALID_REF(___4314) || *___4314 != NULL) std::cerr << "Invalid 'value' parameter to tecZoneAuxDataGetItem. Must be a valid memory reference and point to NULL." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneAuxDataGetItem(fileHandle, zone, whichItem, ___2685, ___4314); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneAuxDataGetNumItems(void* fileHandle, int32_t zone, int32_t* ___2812) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneAuxDataGetNumItems. Must be 0 < zone <= numZones." << std::endl; else if (!VALID_REF(___2812)) std::cerr << "Invalid 'numItems' parameter to tecZoneAuxDataGetNumItems. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneAuxDataGetNumItems(fileHandle, zone, ___2812); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneConnectivityGetSharedZone(void* fileHandle, int32_t zone, int32_t* sharedZone) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneConnectivityGetSharedZone. Must be 0 < zone <= numZones." << std::endl; else if (!VALID_REF(sharedZone)) std::cerr << "Invalid 'sharedZone' parameter to tecZoneConnectivityGetSharedZone. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneConnectivityGetSharedZone(fileHandle, zone, sharedZone); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneFaceNbrGetConnections(void* fileHandle, int32_t zone, int32_t* connections) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneFaceNbrGetConnections. Must be 0 < zone <= numZones." << std::endl; else if (!VALID_REF(connections)) std::cerr << "Invalid 'connections' parameter to tecZoneFaceNbrGetConnections. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneFaceNbrGetConnections(fileHandle, zone, connections); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneFaceNbrGetConnections64(void* fileHandle, int32_t zone, int64_t* connections) { ___4278(fileHandle); ___4278(zone); ___4278(connections); ___478(!"Not implemented"); return -1; } int32_t tecZoneFaceNbrGetMode(void* fileHandle, int32_t zone, int32_t* ___2504) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneFaceNbrGetMode. Must be 0 < zone <= numZones." << std::endl; else if (!VALID_REF(___2504)) std::cerr << "Invalid 'mode' parameter to tecZoneFaceNbrGetMode. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneFaceNbrGetMode(fileHandle, zone, ___2504); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneFaceNbrGetNumConnections(void* fileHandle, int32_t zone, int64_t* numConnections) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneFaceNbrGetNumConnections. Must be 0 < zone <= numZones." << std::endl; else if (!VALID_REF(numConnections)) std::cerr << "Invalid 'numConnections' parameter to tecZoneFaceNbrGetNumConnections. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneFaceNbrGetNumConnections(fileHandle, zone, numConnections); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneFaceNbrGetNumValues(void* fileHandle, int32_t zone, int64_t* numValues) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneFaceNbrGetNumValues. Must be 0 < zone <= numZones." << std::endl; else if (!VALID_REF(numValues)) std::cerr << "Invalid 'numValues' parameter to tecZoneFaceNbrGetNumValues. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneFaceNbrGetNumValues(fileHandle, zone, numValues); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneFaceNbrsAre64Bit(void* fileHandle, int32_t zone, int32_t* are64Bit) { if (!validFileHandle(fileHandle, FUNCTION_NAME))
 return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneFaceNbrsAre64Bit. Must be 0 < zone <= numZones." << std::endl; else if (!VALID_REF(are64Bit)) std::cerr << "Invalid 'are64Bit' parameter to tecZoneFaceNbrsAre64Bit. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneFaceNbrsAre64Bit(fileHandle, zone, are64Bit); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneGetIJK(void* fileHandle, int32_t zone, int64_t* iMax, int64_t* jMax, int64_t* kMax) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneGetIJK. Must be 0 < zone <= numZones." << std::endl; else if (!VALID_REF(iMax)) std::cerr << "Invalid 'iMax' parameter to tecZoneGetIJK. Must be a valid memory reference." << std::endl; else if (!VALID_REF(jMax)) std::cerr << "Invalid 'jMax' parameter to tecZoneGetIJK. Must be a valid memory reference." << std::endl; else if (!VALID_REF(kMax)) std::cerr << "Invalid 'kMax' parameter to tecZoneGetIJK. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneGetIJK(fileHandle, zone, iMax, jMax, kMax); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneGetParentZone(void* fileHandle, int32_t zone, int32_t* ___2974) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneGetParentZone. Must be 0 < zone <= numZones." << std::endl; else if (!VALID_REF(___2974)) std::cerr << "Invalid 'parentZone' parameter to tecZoneGetParentZone. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneGetParentZone(fileHandle, zone, ___2974); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneGetSolutionTime(void* fileHandle, int32_t zone, double* ___3640) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneGetSolutionTime. Must be 0 < zone <= numZones." << std::endl; else if (!VALID_REF(___3640)) std::cerr << "Invalid 'solutionTime' parameter to tecZoneGetSolutionTime. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneGetSolutionTime(fileHandle, zone, ___3640); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneGetStrandID(void* fileHandle, int32_t zone, int32_t* ___3785) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneGetStrandID. Must be 0 < zone <= numZones." << std::endl; else if (!VALID_REF(___3785)) std::cerr << "Invalid 'strandID' parameter to tecZoneGetStrandID. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneGetStrandID(fileHandle, zone, ___3785); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneGetTitle(void* fileHandle, int32_t zone, char** ___4177) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneGetTitle. Must be 0 < zone <= numZones." << std::endl; else if (!VALID_REF(___4177) || *___4177 != NULL) std::cerr << "Invalid 'title' parameter to tecZoneGetTitle. Must be a valid memory reference and point to NULL." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneGetTitle(fileHandle, zone, ___4177); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneGetType(void* fileHandle, int32_t zone, int32_t* type) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneGetType. Must be 0 < zone <= numZones." << std::endl; else if (!VALID_REF(type)) std::cerr << "Invalid 'type' parameter to tecZoneGetType. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneGetType(fileHandle, zone, type); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneIsEnabled(void* fileHandle, int32_t zone, int32_t* isEnabled) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneIsEnabled. Must be 0 < zone <= numZones." << std::endl; else if (!VALID_REF(isEnabled)) std::cerr << "Invalid 'isEnabled' parameter to tecZoneIsEnabled. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL)
 return tecioSZL_ZoneIsEnabled(fileHandle, zone, isEnabled); else ___478(!"Not implemented for .plt files"); return -1; } namespace { bool zoneHasNodeMap(void* fileHandle, int32_t zone) { REQUIRE(VALID_REF(fileHandle)); REQUIRE(zone > 0); int32_t type; tecZoneGetType(fileHandle, zone, &type); return (1 <= type && type <= 5); } int64_t zoneNumCells(void* fileHandle, int32_t zone) { REQUIRE(VALID_REF(fileHandle)); REQUIRE(zone > 0 && zoneHasNodeMap(fileHandle, zone)); int64_t iMax; int64_t jMax; int64_t kMax; if (tecZoneGetIJK(fileHandle, zone, &iMax, &jMax, &kMax) == 0) return jMax; else return 0; } int32_t nodeMapGetNumValues(void* fileHandle, int32_t zone, int64_t ___2781, int64_t* numValues) { REQUIRE(VALID_REF(fileHandle)); REQUIRE(zone > 0 && zoneHasNodeMap(fileHandle, zone)); int64_t iMax; int64_t jMax; int64_t kMax; if (tecZoneGetIJK(fileHandle, zone, &iMax, &jMax, &kMax) == 0) { *numValues = ___2781 * kMax; return 0; } return -1; } } int32_t tecZoneNodeMapGet(void* fileHandle, int32_t zone, int64_t startCell, int64_t ___2781, int32_t* ___2723) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneNodeMapGet. Must be 0 < zone <= numZones." << std::endl; else if (!zoneHasNodeMap(fileHandle, zone)) std::cerr << "Invalid 'zone' parameter to tecZoneNodeMapGetNumValues. Must be a line segment, triangular, quadrilateral, tetrahedral or brick zone." << std::endl; else if (startCell <= 0) std::cerr << "Invalid 'startCell' parameter to tecZoneNodeMapGet. Must be > 0." << std::endl; else if (___2781 <= 0 || zoneNumCells(fileHandle, zone) < startCell + ___2781 - 1) std::cerr << "Invalid 'numCells' parameter to tecZoneNodeMapGet. Must be 0 < numCells <= zoneNumCells - startCell + 1." << std::endl; else if (!VALID_REF(___2723)) std::cerr << "Invalid 'nodeMap' parameter to tecZoneNodeMapGet. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return tecioSZL_ZoneNodeMapGet(fileHandle, zone, startCell, ___2781, ___2723); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneNodeMapGet64(void* fileHandle, int32_t zone, int64_t startCell, int64_t ___2781, int64_t* ___2723) { ___4278(fileHandle); ___4278(zone); ___4278(startCell); ___4278(___2781); ___4278(___2723); ___478(!"Not implemented"); return 1; } int32_t tecZoneNodeMapGetNumValues(void* fileHandle, int32_t zone, int64_t ___2781, int64_t* numValues) { if (!validFileHandle(fileHandle, FUNCTION_NAME)) return -1; if (zone <= 0 || ___2846(fileHandle) < zone) std::cerr << "Invalid 'zone' parameter to tecZoneNodeMapGetNumValues. Must be 0 < zone <= numZones." << std::endl; else if (!zoneHasNodeMap(fileHandle, zone)) std::cerr << "Invalid 'zone' parameter to tecZoneNodeMapGetNumValues. Must be a line segment, triangular, quadrilateral, tetrahedral or brick zone." << std::endl; else if (___2781 <= 0) std::cerr << "Invalid 'numCells' parameter to tecZoneNodeMapGetNumValues. Must be > 0." << std::endl; else if (!VALID_REF(numValues)) std::cerr << "Invalid 'numValues' parameter to tecZoneNodeMapGetNumValues. Must be a valid memory reference." << std::endl; else if (fileFormatForHandle[fileHandle] == FILEFORMAT_SZL) return nodeMapGetNumValues(fileHandle, zone, ___2781, numValues); else ___478(!"Not implemented for .plt files"); return -1; } int32_t tecZoneNodeMapIs64Bit(void* fileHandle, int32_t zone, int32_t* is64Bit) { ___4278(fileHandle); ___4278(zone); *is64Bit = 0; return 0; } int32_t tecZonePolyGetBoundaryConnectionCounts(void* fileHandle, int32_t zone, int64_t startConnection, int64_t numConnections, int32_t* connectionCounts) { ___4278(fileHandle); ___4278(zone); ___4278(startConnection); ___4278(numConnections); ___4278(connectionCounts); std::cerr << "Reading polyhedral data is not yet implemented." << std::endl; return -1; } int32_t tecZonePolyGetBoundaryConnections(void* fileHandle, int32_t zone, int64_t startConnection, int64_t numConnections, int32_t* connectedElements, int32_t* connectedZones) { ___4278(fileHandle); ___4278(zone); ___4278(startConnection); ___4278(numConnections); ___4278(connectedElements); ___4278(connectedZones); std::cerr << "Reading polyhedral data is not yet implemented." << std::endl; return -1; } int32_t tecZonePolyGetFaceElems(void* fileHandle, int32_t zone, int64_t startFace, int64_t numFaces, int32_t* leftElems, int32_t* rightElems) { ___4278(fileHandle); ___4278(zone); ___4278(startFace); ___4278(numFaces); ___4278(leftElems); ___4278(rightElems); std::cerr << "Reading polyhedral data is not yet implemented." << std::endl; return -1; } int32_t tecZonePolyGetFaceNodeCounts(void* fileHandle, int32_t zone, int64_t startFace, int64_t numFaces, int32_t* nodeCounts) { ___4278(fileHandle); ___4278(zone); ___4278(startFace); ___4278(numFaces); ___4278(nodeCounts); std::cerr << "Reading polyhedral data is not yet implemented." << std::endl; return -1; } int32_t tecZonePolyGetFaceNodes(void* fileHandle, int32_t zone, int64_t startFace, int64_t numFaces, int32_t* ___1296)
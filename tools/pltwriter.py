@@ -0,0 +1,269 @@
+import struct
+import numpy as np
+
+import rawprofile
+
+# self contained binary plt writer, version 112 (see 360_data_format_guide.pdf, binary data file format)
+#
+# header section: magic, byte order, title, variable names, one record per zone, end of header marker
+# data section:   per zone, the variable formats, min/max of each variable, then the block packed values
+#
+# values are written with memoryview from the numpy buffer, the min/max of each
+# variable are reduced while its values stream out and patched into the zone
+# record once the zone is complete, so every value is touched once.
+
+ZONE_MARKER = 299.0
+VAR_AUX_MARKER = 899.0
+EOH_MARKER = 357.0
+
+ZONETYPE_ORDERED = 0
+ZONETYPE_FETRIANGLE = 2
+ZONETYPE_FEQUADRILATERAL = 3
+ZONETYPE_FETETRAHEDRON = 4
+ZONETYPE_FEBRICK = 5
+
+# finite element zone type -> nodes per element
+NODES_PER_ELEMENT = {
+    ZONETYPE_FETRIANGLE: 3,
+    ZONETYPE_FEQUADRILATERAL: 4,
+    ZONETYPE_FETETRAHEDRON: 4,
+    ZONETYPE_FEBRICK: 8,
+}
+
+# numpy dtype -> plt variable data format
+VAR_FORMATS = {
+    np.dtype(np.float32): 1,
+    np.dtype(np.float64): 2,
+    np.dtype(np.int32): 3,
+    np.dtype(np.int16): 4,
+    np.dtype(np.uint8): 5,
+}
+
+def _plt_dtype(dtype):
+    dtype = np.dtype(dtype)
+    native = dtype.newbyteorder('=')
+    if native not in VAR_FORMATS:
+        raise ValueError(f'dtype not supported by plt: {dtype}, must be one of {[str(t) for t in VAR_FORMATS]}')
+    # plt data is little endian
+    return native.newbyteorder('<')
+
+def _int32(*values):
+    return struct.pack(f'<{len(values)}i', *values)
+
+def _string(s:str):
+    # one int32 per character, zero terminated
+    return _int32(*[ord(c) for c in s], 0)
+
+class PltZone:
+    """
+    ordered IJK zone of a plt file.
+
+    dtypes holds the numpy dtype of every variable, one of float32, float64,
+    int32, int16 or uint8. aux_data is a dict of zone auxiliary name/value strings.
+    share_var_from_zone holds per variable the 1 based zone whose values it
+    reuses, 0 for none, as in tecio. shared variables are not written.
+    """
+
+    def __init__(self, title:str, imax:int, jmax:int, kmax:int, dtypes, solution_time:float = 0.0, strand_id:int = -1,
+                 aux_data:dict = None, share_var_from_zone = None):
+        self.title = title
+        self.imax, self.jmax, self.kmax = imax, jmax, kmax
+        self.dtypes = [_plt_dtype(t) for t in dtypes]
+        self.solution_time = solution_time
+        self.strand_id = strand_id
+        self.aux_data = dict(aux_data or {})
+        self.share_var_from_zone = list(share_var_from_zone or [0] * len(self.dtypes))
+        if len(self.share_var_from_zone) != len(self.dtypes):
+            raise ValueError(f'zone {title} has {len(self.share_var_from_zone)} sharing entries for {len(self.dtypes)} variables')
+
+    def is_shared(self, var:int):
+        return self.share_var_from_zone[var] > 0
+
+    zone_type = ZONETYPE_ORDERED
+    num_connections = 0
+
+    @property
+    def num_values(self):
+        return self.imax * self.jmax * self.kmax
+
+    def _dims_bytes(self):
+        return _int32(self.imax, self.jmax, self.kmax)
+
+    def header_bytes(self):
+        b = struct.pack('<f', ZONE_MARKER)
+        b += _string(self.title)
+        b += _int32(-1, self.strand_id)               # parent zone, strand id
+        b += struct.pack('<d', self.solution_time)
+        b += _int32(-1, self.zone_type)               # not used, zone type
+        b += _int32(0, 0, 0)                          # var location, raw face neighbors, misc face connections
+        b += self._dims_bytes()
+        for name, value in self.aux_data.items():
+            b += _int32(1)                            # aux data follows
+            b += _string(name) + _int32(0) + _string(str(value))   # value format 0 = string
+        b += _int32(0)                                # no more aux data
+        return b
+
+class PltFEZone(PltZone):
+    """
+    finite element zone of a plt file, nodal values plus element connectivity.
+
+    zone_type is one of the ZONETYPE_FE* constants, the connectivity of
+    num_elements elements follows the variable values, zero based.
+    """
+
+    def __init__(self, title:str, num_nodes:int, num_elements:int, zone_type:int, dtypes, solution_time:float = 0.0,
+                 strand_id:int = -1, aux_data:dict = None, share_var_from_zone = None):
+        if zone_type not in NODES_PER_ELEMENT:
+            raise ValueError(f'zone type not supported: {zone_type}, must be one of {list(NODES_PER_ELEMENT)}')
+        super().__init__(title, num_nodes, 1, 1, dtypes, solution_time, strand_id, aux_data, share_var_from_zone)
+        self.zone_type = zone_type
+        self.num_nodes = num_nodes
+        self.num_elements = num_elements
+
+    @property
+    def num_connections(self):
+        return self.num_elements * NODES_PER_ELEMENT[self.zone_type]
+
+    def _dims_bytes(self):
+        # num points, num elements, i j k cell dim (reserved)
+        return _int32(self.num_nodes, self.num_elements, 0, 0, 0)
+
+class PltFileWriter:
+    """
+    write a plt file from zones declared up front.
+
+    values go through zone_var_write in file order: zone by zone, variable by
+    variable, each variable in one or several chunks (for example one z slab
+    at a time). chunks are cast to the zone dtype of the variable. the
+    connectivity of a PltFEZone follows its values through
+    zone_connectivity_write, also in chunks. var_aux_data maps a 0 based
+    variable to a dict of its auxiliary name/value strings.
+    """
+
+    def __init__(self, file_path:str, title:str, variables, zones, var_aux_data:dict = None):
+        self.variables = list(variables)
+        self.zones = list(zones)
+        self.var_aux_data = dict(var_aux_data or {})
+        for zone in self.zones:
+            if len(zone.dtypes) != len(self.variables):
+                raise ValueError(f'zone {zone.title} has {len(zone.dtypes)} dtypes for {len(self.variables)} variables')
+        self.f = rawprofile.open_file(file_path, 'wb')
+        self._write_header(title)
+        self.zone_index = -1
+        self._next_zone()
+
+    def _write_header(self, title):
+        f = self.f
+        f.write(b'#!TDV112')
+        f.write(_int32(1))                            # byte order
+        f.write(_int32(0))                            # file type full
+        f.write(_string(title))
+        f.write(_int32(len(self.variables)))
+        for name in self.variables:
+            f.write(_string(name))
+        # variable aux data goes before the zones, as tecio writes it
+        for var, aux_data in sorted(self.var_aux_data.items()):
+            for name, value in aux_data.items():
+                f.write(struct.pack('<f', VAR_AUX_MARKER))
+                f.write(_int32(var) + _string(name) + _int32(0) + _string(str(value)))   # value format 0 = string
+        for zone in self.zones:
+            f.write(zone.header_bytes())
+        f.write(struct.pack('<f', EOH_MARKER))
+
+    def _next_zone(self):
+        self.zone_index += 1
+        self.var_index = 0
+        self.var_written = 0
+        self.conn_written = 0
+        if self.zone_index >= len(self.zones):
+            return
+        zone = self.zones[self.zone_index]
+        f = self.f
+        f.write(struct.pack('<f', ZONE_MARKER))
+        f.write(_int32(*[VAR_FORMATS[t.newbyteorder('=')] for t in zone.dtypes]))
+        f.write(_int32(0))                            # no passive variables
+        if any(zone.share_var_from_zone):
+            f.write(_int32(1, *[z - 1 for z in zone.share_var_from_zone]))   # zero based, -1 not shared
+        else:
+            f.write(_int32(0))
+        f.write(_int32(-1))                           # no connectivity sharing
+        self.minmax_pos = f.tell()
+        self.minmax = np.zeros((len(self.variables), 2), dtype=np.float64)
+        f.write(self._minmax_bytes())
+        self._skip_shared()
+
+    def _minmax_bytes(self):
+        # min/max of the variables that are not shared
+        zone = self.zones[self.zone_index]
+        own = [var for var in range(len(self.variables)) if not zone.is_shared(var)]
+        return self.minmax[own].astype('<f8').tobytes()
+
+    def _skip_shared(self):
+        zone = self.zones[self.zone_index]
+        while self.var_index < len(self.variables) and zone.is_shared(self.var_index):
+            self.var_index += 1
+        if self.var_index == len(self.variables):
+            self._patch_minmax()
+            if not zone.num_connections:
+                self._next_zone()
+
+    def zone_var_write(self, values):
+        if not np.size(values):
+            return
+        if self.zone_index >= len(self.zones):
+            raise ValueError('all zone values are already written')
+        zone = self.zones[self.zone_index]
+        if self.var_index == len(self.variables):
+            raise ValueError(f'values of zone {zone.title} are complete, its connectivity is next')
+        values = np.ascontiguousarray(values, dtype=zone.dtypes[self.var_index]).reshape(-1)
+        if self.var_written + values.size > zone.num_values:
+            raise ValueError(f'too many values for variable {self.variables[self.var_index]} of zone {zone.title}')
+        if values.size:
+            lo, hi = float(values.min()), float(values.max())
+            if self.var_written:
+                lo, hi = min(lo, self.minmax[self.var_index, 0]), max(hi, self.minmax[self.var_index, 1])
+            self.minmax[self.var_index] = lo, hi
+        self.f.write(memoryview(values.view(np.uint8)))
+        self.var_written += values.size
+        if self.var_written == zone.num_values:
+            self.var_index += 1
+            self.var_written = 0
+            self._skip_shared()
+
+    def zone_connectivity_write(self, nodes):
+        # zero based node indices of the current FE zone, element by element
+        if not np.size(nodes):
+            return
+        zone = self.zones[self.zone_index] if self.zone_index < len(self.zones) else None
+        if zone is None or not zone.num_connections or self.var_index != len(self.variables):
+            raise ValueError('connectivity must follow the values of a finite element zone')
+        nodes = np.ascontiguousarray(nodes, dtype='<i4').reshape(-1)
+        if self.conn_written + nodes.size > zone.num_connections:
+            raise ValueError(f'too many connectivity entries for zone {zone.title}')
+        self.f.write(memoryview(nodes.view(np.uint8)))
+        self.conn_written += nodes.size
+        if self.conn_written == zone.num_connections:
+            self._next_zone()
+
+    def _patch_minmax(self):
+        f = self.f
+        pos = f.tell()
+        f.seek(self.minmax_pos)
+        f.write(self._minmax_bytes())
+        f.seek(pos)
+
+    def close(self):
+        if self.f.closed:
+            return
+        self.f.close()
+        if self.zone_index < len(self.zones):
+            raise ValueError(f'plt file closed before zone {self.zones[self.zone_index].title} was complete')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.f.close()
+        else:
+            self.close()
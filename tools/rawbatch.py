@@ -0,0 +1,221 @@
+import os, sys, time
+import glob
+import json
+import traceback
+import contextlib
+import numpy as np
+import argparse
+
+from rawio import parse_raw_name, parse_dtype, parse_size, strip_compressed_ext, COMPRESSED_EXTS, ENDIANS
+from rawderive import parse_derive
+import rawprofile
+
+# batch conversion of many raw files with rawtotec, one process per worker
+#
+# inputs are directories (every *.raw and *.raw.gz/.xz/.bz2 in it), globs or files, sizes and dtype come
+# from the file name (foot_64x64x64_uint8.raw) or from a manifest with one json
+# object per line:
+#     {"file": "foot.raw", "w": 64, "h": 64, "d": 64, "dtype": "uint8", "offset": 0, "endian": "little"}
+# every file is converted in its own task, a failing file is recorded in the
+# report and the batch goes on. with --profile every job is profiled in its
+# worker (rawprofile), its stages are in its report entry and summed over the
+# batch, the trace of a .trace.json profile has a row per worker process.
+
+def _expand_inputs(inputs):
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files += sorted(f for ext in ('',) + COMPRESSED_EXTS for f in glob.glob(os.path.join(item, f'*.raw{ext}')))
+        elif glob.has_magic(item):
+            files += sorted(glob.glob(item))
+        else:
+            files.append(item)
+    return files
+
+def load_manifest(path:str):
+    # jobs of a json lines manifest, relative files are relative to the manifest
+    # a line that is not a valid job becomes a failed job, the others still run
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                entry = json.loads(line)
+                jobs.append({
+                    "file": os.path.join(base, entry["file"]),
+                    "d": int(entry["d"]), "h": int(entry["h"]), "w": int(entry["w"]),
+                    "dtype": parse_dtype(entry.get("dtype", "uint8")).name,
+                    "offset": int(entry.get("offset", 0)),
+                    "endian": entry.get("endian"),
+                })
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                jobs.append({"file": f'{path}:{number}', "error": f'manifest line {number}: {type(e).__name__}: {e}'})
+    return jobs
+
+def make_jobs(inputs):
+    # jobs from file names, files that do not follow the naming convention become failed jobs
+    jobs = []
+    for file in _expand_inputs(inputs):
+        job = {"file": file}
+        try:
+            d, h, w, dtype = parse_raw_name(file)
+            job.update(d=d, h=h, w=w, dtype=dtype.name, offset=0)
+        except ValueError as e:
+            job["error"] = str(e)
+        jobs.append(job)
+    return jobs
+
+def _out_file_name(job, format:str, out_dir:str):
+    file_name, _ = os.path.splitext(os.path.basename(strip_compressed_ext(job["file"])))
+    return os.path.join(out_dir or os.path.dirname(job["file"]), f'{file_name}.{format}')
+
+def convert_job(job, options):
+    # run one conversion, never raises, returns the report entry of the job
+    import rawtotec
+
+    entry = dict(job)
+    if "error" in job:
+        entry.update(status="failed", seconds=0.0)
+        return entry
+    out = _out_file_name(job, options["format"], options.get("out_dir"))
+    profile = options.get("profile")
+    profiler = None
+    tic = time.perf_counter()
+    try:
+        with (rawprofile.collect('rawtotec', profile == "trace") if profile else contextlib.nullcontext()) as profiler:
+            rawtotec.main(job["file"], job["d"], job["h"], job["w"], options["format"], 3,
+                          dtype=np.dtype(job["dtype"]), block=options.get("block", True),
+                          use_tecio=options.get("use_tecio", False), binary=options.get("binary", False),
+                          offset=job.get("offset", 0), max_memory=options.get("max_memory"), out=out,
+                          endian=job.get("endian") or options.get("endian", "little"),
+                          quantize=options.get("quantize"), derive=options.get("derive"))
+    except Exception as e:
+        entry.update(status="failed", error=f'{type(e).__name__}: {e}', traceback=traceback.format_exc())
+    else:
+        entry.update(status="ok", out=out, bytes_out=os.path.getsize(out))
+    if profiler is not None:
+        entry["profile"] = profiler.final
+        if profiler.events:
+            entry["trace_events"] = profiler.events
+    seconds = time.perf_counter() - tic
+    voxels = job["d"] * job["h"] * job["w"]
+    bytes_in = voxels * np.dtype(job["dtype"]).itemsize
+    entry.update(seconds=seconds, bytes_in=bytes_in)
+    if entry["status"] == "ok" and seconds:
+        entry.update(mb_per_s=bytes_in / seconds / 1e6, voxels_per_s=voxels / seconds)
+    return entry
+
+def run_batch(jobs, options, workers:int = None):
+    """
+    convert `jobs` in a process pool and return the report.
+
+    results are collected as they complete, a job that raises is reported as
+    failed and the other jobs go on. a worker that dies (a crash in libtecio)
+    breaks the pool, the jobs still pending are then reported as failed too.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    workers = workers or os.cpu_count() or 1
+    tic = time.perf_counter()
+    entries = [None] * len(jobs)
+    with ProcessPoolExecutor(workers) as executor:
+        futures = {executor.submit(convert_job, job, options): i for i, job in enumerate(jobs)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            try:
+                entries[i] = future.result()
+            except Exception as e:
+                entries[i] = dict(jobs[i], status="failed", error=f'{type(e).__name__}: {e}')
+            entry = entries[i]
+            print(f'[{done}/{len(jobs)}] {entry["status"]} {entry["file"]} '
+                  f'{entry.get("seconds", 0):.2f}s {entry.get("error", "")}', flush=True)
+    seconds = time.perf_counter() - tic
+    # job traces go into the trace of the batch, stages are summed over the jobs
+    events = [event for e in entries for event in e.pop("trace_events", [])]
+    if events and rawprofile.current() is not None:
+        rawprofile.current().add_events(events)
+    stages = {}
+    for e in entries:
+        for name, stage in e.get("profile", {}).get("stages", {}).items():
+            total = stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            total["seconds"] += stage["seconds"]
+            total["calls"] += stage["calls"]
+    ok = [e for e in entries if e["status"] == "ok"]
+    bytes_in = sum(e["bytes_in"] for e in ok)
+    result = {
+        "format": options["format"],
+        "workers": workers,
+        "files": len(entries),
+        "ok": len(ok),
+        "failed": len(entries) - len(ok),
+        "seconds": seconds,
+        "bytes_in": bytes_in,
+        "bytes_out": sum(e["bytes_out"] for e in ok),
+        "mb_per_s": bytes_in / seconds / 1e6 if seconds else None,
+        "jobs": entries,
+    }
+    if stages:
+        result["job_stages"] = stages
+    return result
+
+def main(inputs, format:str = "plt", manifest:str = None, workers:int = None, report:str = "batch_report.json",
+         out_dir:str = None, block:bool = True, use_tecio:bool = False, binary:bool = False, max_memory:int = None,
+         endian:str = 'little', quantize:str = None, profile:str = None, derive = None):
+    # profile: None, "json" or "trace", how the jobs are profiled
+    if format not in ("tec", "ply", "plt", "szplt"):
+        raise ValueError(f'format not known:{format}, must be tec, ply, plt or szplt')
+    jobs = load_manifest(manifest) if manifest else []
+    jobs += make_jobs(inputs)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    options = dict(format=format, out_dir=out_dir, block=block, use_tecio=use_tecio, binary=binary,
+                   max_memory=max_memory, endian=endian, quantize=quantize, profile=profile, derive=derive)
+    result = run_batch(jobs, options, workers)
+    if rawprofile.current() is not None and "job_stages" in result:
+        rawprofile.current().extra["job_stages"] = result["job_stages"]
+    with open(report, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f'{result["ok"]}/{result["files"]} ok, {result["seconds"]:.1f}s, {result["mb_per_s"] or 0:.1f} MB/s, report: {report}')
+    return result
+
+def add_arguments(parser):
+    parser.add_argument('inputs', nargs='*', help="directories, globs or raw files named <name>_<w>x<h>x<d>_<dtype>.raw")
+    parser.add_argument('-m', '--manifest', type=str, default=None, help="json lines manifest with file, w, h, d, dtype, offset, endian")
+    parser.add_argument('-f', '--format', type=str, default="plt", help="tec, ply, plt or szplt")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes, default cpu count")
+    parser.add_argument('-o', '--out-dir', type=str, default=None, help="output directory, default next to each input")
+    parser.add_argument('-r', '--report', type=str, default="batch_report.json", help="json report path")
+    parser.add_argument('-b', '--block', action="store_true", default=False, help="datapacking block or point (tec)")
+    parser.add_argument('--binary', action="store_true", default=False, help="binary_little_endian ply instead of ascii")
+    parser.add_argument('--tecio', action="store_true", default=False, help="write plt through libtecio instead of the numpy writer")
+    parser.add_argument('--max-memory', type=str, default=None, help="stream z slabs within this budget per worker, e.g. 256M")
+    parser.add_argument('--endian', type=str, default="little", choices=ENDIANS, help="byte order of the raw files without one in the manifest")
+    parser.add_argument('--quantize', type=str, default=None, choices=["uint8", "int16"], help="store values as uint8 / int16 codes, the range of each file")
+    parser.add_argument('--derive', type=str, default=None, help="add grad, gradmag, normals variables after PHI, e.g. grad,normals")
+    rawprofile.add_argument(parser)
+
+def run(args, parser):
+    # the exit code, 1 when a file failed
+    if not args.inputs and not args.manifest:
+        parser.error('no inputs, give directories, globs, files or --manifest')
+
+    profile = None
+    if args.profile:
+        profile = "trace" if args.profile.endswith(rawprofile.TRACE_SUFFIX) else "json"
+    with rawprofile.profile(args.profile, 'rawbatch'):
+        result = main(args.inputs, args.format, args.manifest, args.workers, args.report, args.out_dir,
+                      args.block, args.tecio, args.binary,
+                      parse_size(args.max_memory) if args.max_memory else None, args.endian, args.quantize, profile,
+                      parse_derive(args.derive) if args.derive else None)
+    return 1 if result["failed"] else 0
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    sys.exit(run(parser.parse_args(), parser))
+
+    # py .\rawbatch.py D:/data/dataset/scivis -f plt -j 8 -o D:/data/out
@@ -0,0 +1,268 @@
+import os, sys, time
+import io
+import json
+import platform
+import shutil
+import tempfile
+import contextlib
+import numpy as np
+import argparse
+
+import rawprofile
+
+# benchmark of the loaders, writers and downsamplers of the tools
+#
+# inputs are generated with rawgen (sphere for uint8, sincsphere for float32)
+# in a spawned process and every case runs in a fresh spawned process, so its
+# peak rss is its own.
+# results go to a json file and are compared with a checked in baseline:
+#     py .\rawbench.py --sizes 64 128 --baseline bench_baseline.json
+# a case is a regression when its time or peak rss is more than the tolerance
+# above the baseline. a case without a baseline fails too, the run compares
+# nothing for it. baselines are per machine, refresh with --update-baseline.
+# --profile adds the rawprofile stages of every case to its result (profiled
+# runs are slower, do not update the baseline with them).
+
+SIZES = [64, 128, 256, 512]
+TYPES = ["uint8", "float32"]
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def _generate(n, dtype, file):
+    sys.path.insert(0, HERE)
+    from rawgen import generate
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate("sphere" if dtype == "uint8" else "sincsphere", n, n, n, dtype, file)
+
+def _input_file(work_dir, n, dtype, executor):
+    file = os.path.join(work_dir, f'bench_{n}x{n}x{n}_{dtype}.raw')
+    if not os.path.exists(file):
+        executor.submit(_generate, n, dtype, file).result()
+    return file
+
+# cases: f(file, n, dtype, out_dir) -> bytes written
+
+def _load_mmap(file, n, dtype, out_dir):
+    from rawio import load_raw_to_np, iter_slabs
+    values = load_raw_to_np(file, n, n, n, dtype, mmap=True)
+    for z0, slab in iter_slabs(values, 16):
+        slab.max()
+    return 0
+
+def _load_fromfile(file, n, dtype, out_dir):
+    from rawio import load_raw_to_np
+    load_raw_to_np(file, n, n, n, dtype, mmap=False).max()
+    return 0
+
+def _load_slabs(file, n, dtype, out_dir):
+    from rawio import RawSlabReader
+    for z0, slab in RawSlabReader(file, n, n, n, dtype, depth=16):
+        slab.max()
+    return 0
+
+def _rawtotec(format, **options):
+    def run(file, n, dtype, out_dir):
+        import rawtotec
+        out = os.path.join(out_dir, f'out.{format}')
+        rawtotec.main(file, n, n, n, format, 3, dtype=np.dtype(dtype), out=out, **options)
+        return os.path.getsize(out)
+    return run
+
+def _downsample(filter, factor=2):
+    def run(file, n, dtype, out_dir):
+        from rawio import load_raw_to_np, iter_slabs
+        from rawdownsample import downsample_slabs, pyramid_slab_multiple, write_np_to_raw_fast2
+        values = load_raw_to_np(file, n, n, n, dtype)
+        out = os.path.join(out_dir, 'out.raw')
+        if filter == "fast2":
+            write_np_to_raw_fast2(out, values, factor, dtype)
+        else:
+            depth = pyramid_slab_multiple(0, factor, filter)
+            with open(out, 'wb') as f:
+                for z0, slab in downsample_slabs(iter_slabs(values, depth), factor, filter):
+                    f.write(np.ascontiguousarray(slab))
+        return os.path.getsize(out)
+    return run
+
+def _pyramid(file, n, dtype, out_dir):
+    from rawio import load_raw_to_np
+    from rawdownsample import write_pyramid
+    values = load_raw_to_np(file, n, n, n, dtype)
+    names = write_pyramid(os.path.join(out_dir, 'out.raw'), values, 3, "mean")
+    return sum(os.path.getsize(name) for name in names)
+
+def _isosurface(file, n, dtype, out_dir):
+    from rawio import load_raw_to_np
+    from rawisosurface import extract_isosurface, write_plt
+    values = load_raw_to_np(file, n, n, n, dtype)
+    iso = float(values[n // 2, n // 2, :].mean())
+    out = os.path.join(out_dir, 'out.plt')
+    write_plt(*extract_isosurface(values, iso), out)
+    return os.path.getsize(out)
+
+def _tecio_available():
+    try:
+        import tecio
+        tecio.load_library()
+        return True
+    except Exception:
+        return False
+
+CASES = {
+    "load_mmap": _load_mmap,
+    "load_fromfile": _load_fromfile,
+    "load_slabs": _load_slabs,
+    "tec_point": _rawtotec("tec", block=False),
+    "tec_block": _rawtotec("tec", block=True),
+    "ply_ascii": _rawtotec("ply"),
+    "ply_binary": _rawtotec("ply", binary=True),
+    "plt": _rawtotec("plt"),
+    "plt_stream": _rawtotec("plt", max_memory=32 << 20),
+    "szplt": _rawtotec("szplt"),
+    "downsample_fast2": _downsample("fast2"),
+    "downsample_point": _downsample("point"),
+    "downsample_mean": _downsample("mean"),
+    "downsample_gaussian": _downsample("gaussian"),
+    "pyramid_mean": _pyramid,
+    "isosurface": _isosurface,
+}
+
+def run_case(name, file, n, dtype, out_dir, profile:str = None):
+    # in the child process: time one case, its prints go nowhere
+    # profile: None, "json" or "trace", returns the rawprofile report and trace events too
+    # the peak rss is the high water mark of the case (rawprofile.peak_rss_mb), ru_maxrss
+    # of a spawned child starts at the rss of the parent when it forked
+    sys.path.insert(0, HERE)
+    rawprofile.reset_peak_rss()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with (rawprofile.collect(name, profile == "trace") if profile else contextlib.nullcontext()) as profiler:
+            tic = time.perf_counter()
+            bytes_out = CASES[name](file, n, dtype, out_dir)
+            seconds = time.perf_counter() - tic
+    rss = rawprofile.peak_rss_mb()
+    if profiler is None:
+        return seconds, bytes_out, rss, None, []
+    return seconds, bytes_out, rss, profiler.final, profiler.events
+
+def run_benchmark(sizes, types, cases, repeat:int = 1, work_dir:str = None, profile:str = None):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    work_dir = work_dir or tempfile.mkdtemp(prefix='rawbench_')
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    try:
+        for dtype in types:
+            for n in sizes:
+                with ProcessPoolExecutor(1, mp_context=context) as executor:
+                    file = _input_file(work_dir, n, dtype, executor)
+                bytes_in = os.path.getsize(file)
+                for name in cases:
+                    key = f'{name}/{dtype}/{n}'
+                    if name == "szplt" and not _tecio_available():
+                        print(f'{key:32s} skipped, no tecio library')
+                        continue
+                    best = None
+                    for _ in range(repeat):
+                        out_dir = tempfile.mkdtemp(dir=work_dir)
+                        try:
+                            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                                seconds, bytes_out, rss, stages, events = executor.submit(
+                                    run_case, name, file, n, dtype, out_dir, profile).result()
+                        finally:
+                            shutil.rmtree(out_dir, ignore_errors=True)
+                        if events and rawprofile.current() is not None:
+                            rawprofile.current().add_events(events)
+                        if best is None or seconds < best["seconds"]:
+                            best = dict(seconds=seconds, mb_per_s=bytes_in / seconds / 1e6,
+                                        peak_rss_mb=rss, bytes_in=bytes_in, bytes_out=bytes_out)
+                            if stages:
+                                best["profile"] = stages
+                    results[key] = best
+                    print(f'{key:32s} {best["seconds"]*1000:10.1f} ms {best["mb_per_s"]:9.1f} MB/s {best["peak_rss_mb"]:8.0f} MB rss', flush=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+# absolute slack on top of the tolerance, small cases are mostly timer and page cache noise
+_SLACK = {"seconds": 0.02, "peak_rss_mb": 4}
+
+def compare(results, baseline, tolerance:float = 0.25):
+    # (regressions, missing): cases slower or bigger than baseline * (1 + tolerance) + slack,
+    # and the keys of cases the baseline has no result for
+    regressions, missing = [], []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            missing.append(key)
+            continue
+        for metric in ("seconds", "peak_rss_mb"):
+            if result[metric] > base[metric] * (1 + tolerance) + _SLACK[metric]:
+                regressions.append(f'{key} {metric}: {result[metric]:.3f} vs baseline {base[metric]:.3f}')
+    return regressions, missing
+
+def main(sizes, types, cases, out:str = "bench_results.json", baseline:str = None, tolerance:float = 0.25,
+         repeat:int = 1, update_baseline:bool = False, profile:str = None):
+    results = run_benchmark(sizes, types, cases, repeat, profile=profile)
+    report = {
+        "machine": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f'write to file:{out}')
+    if not baseline:
+        return 0
+    if update_baseline:
+        if os.path.exists(baseline):
+            with open(baseline) as f:
+                old = json.load(f)
+            report["results"] = {**old.get("results", {}), **results}
+            if "note" in old:
+                report = {"note": old["note"], **report}
+        with open(baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f'baseline updated:{baseline}')
+        return 0
+    with open(baseline) as f:
+        regressions, missing = compare(results, json.load(f)["results"], tolerance)
+    for line in regressions:
+        print(f'regression: {line}')
+    for key in missing:
+        print(f'no baseline: {key}')
+    print(f'{len(regressions)} regressions, tolerance {tolerance:.0%}'
+          + (f', {len(missing)} cases without a baseline in {baseline}, record them with --update-baseline' if missing else ''))
+    return 1 if regressions or missing else 0
+
+def add_arguments(parser):
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help="cube edge lengths")
+    parser.add_argument('--types', type=str, nargs='+', default=TYPES, choices=TYPES, help="input dtypes")
+    parser.add_argument('--cases', type=str, nargs='+', default=list(CASES), choices=list(CASES), help="cases to run")
+    parser.add_argument('-o', '--out', type=str, default="bench_results.json", help="json results")
+    parser.add_argument('--baseline', type=str, default=os.path.join(HERE, "bench_baseline.json"), help="baseline to compare with, '' for none")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown / rss growth over the baseline")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per case, the fastest counts")
+    parser.add_argument('--update-baseline', action="store_true", default=False, help="merge the results into the baseline")
+    rawprofile.add_argument(parser)
+
+def run(args, parser):
+    # the exit code, 1 on a regression
+    if args.profile and args.update_baseline:
+        parser.error('profiled runs are slower, --update-baseline does not take --profile')
+
+    profile = None
+    if args.profile:
+        profile = "trace" if args.profile.endswith(rawprofile.TRACE_SUFFIX) else "json"
+    with rawprofile.profile(args.profile, 'rawbench'):
+        return main(args.sizes, args.types, args.cases, args.out, args.baseline, args.tolerance, args.repeat,
+                    args.update_baseline, profile)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    sys.exit(run(parser.parse_args(), parser))
+
+    # py .\rawbench.py --sizes 64 128 --cases plt tec_block downsample_mean
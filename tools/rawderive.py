@@ -0,0 +1,128 @@
+import numpy as np
+
+from rawio import iter_slabs, iter_halo_slabs
+import rawprofile
+
+# derived variables of a volume: gradient, gradient magnitude and normals
+#
+# central differences (v[i+1] - v[i-1]) / 2 along x, y and z with unit
+# spacing (X Y Z of the writers are voxel indices), one sided v[1] - v[0] at
+# the faces of the volume, the same values as np.gradient of the float32
+# volume. every z slab comes with a one plane halo (rawio.iter_halo_slabs),
+# is converted to float32 once and differenced in place into float32 buffers
+# that are reused from slab to slab, so the working memory is a few slabs,
+# never a full size copy. the writers store one variable after the other
+# (BLOCK), so every derived variable is its own pass over the slabs and the
+# gradient is recomputed per pass instead of keeping full size results.
+# normals are the unit gradient, 0 where the gradient is 0.
+
+DERIVE = {
+    "grad": ["GX", "GY", "GZ"],
+    "gradmag": ["GRADMAG"],
+    "normals": ["NX", "NY", "NZ"],
+}
+
+# float32 bytes per voxel of a z plane on top of the source slab: the float32
+# slab, its halo copy, the three gradient components and the magnitude
+PLANE_BYTES_PER_VOXEL = 24
+
+_SLAB_BYTES = 8 << 20
+
+def parse_derive(text):
+    # "grad,gradmag" -> ["GX", "GY", "GZ", "GRADMAG"], in the given order, each once
+    names = []
+    for item in str(text).split(','):
+        item = item.strip().lower()
+        if item not in DERIVE:
+            raise ValueError(f'derived variable not known:{item}, must be one of {list(DERIVE)}')
+        names += [name for name in DERIVE[item] if name not in names]
+    return names
+
+def _axis_slice(axis:int, s):
+    return tuple(s if i == axis else slice(None) for i in range(3))
+
+def gradient_slab(ext, axis:int, at_start:bool, at_end:bool, out):
+    """
+    Derivative along z (0), y (1) or x (2) of the planes ext[1:-1].
+
+    ext is a float32 slab with one halo plane on both sides, at_start /
+    at_end tell that it is the first / last slab of the volume, whose halo
+    repeats the face plane. out is a float32 buffer of the shape of ext[1:-1].
+    """
+    core = ext[1:-1]
+    if axis == 0:
+        np.subtract(ext[2:], ext[:-2], out=out)
+        out *= 0.5
+        # the repeated face plane halves the one sided difference
+        if at_start:
+            out[0] *= 2
+        if at_end:
+            out[-1] *= 2
+        return out
+    n = core.shape[axis]
+    if n < 2:
+        out[...] = 0
+        return out
+    inner = out[_axis_slice(axis, slice(1, -1))]
+    np.subtract(core[_axis_slice(axis, slice(2, None))], core[_axis_slice(axis, slice(None, -2))], out=inner)
+    inner *= 0.5
+    np.subtract(core[_axis_slice(axis, 1)], core[_axis_slice(axis, 0)], out=out[_axis_slice(axis, 0)])
+    np.subtract(core[_axis_slice(axis, -1)], core[_axis_slice(axis, -2)], out=out[_axis_slice(axis, -1)])
+    return out
+
+class DerivedVolume:
+    """
+    one derived variable of a (d, h, w) volume, computed slab by slab.
+
+    behaves like a read only float32 volume for the writers (shape, ndim,
+    size, dtype, iter_slabs), as rawquantize.QuantizedVolume. slabs of an
+    array are `depth` planes deep (about 8 MB by default), a RawSlabReader
+    keeps its own. a slab is only valid until the next one.
+    """
+
+    def __init__(self, values, name:str, depth:int = None):
+        if not any(name in names for names in DERIVE.values()):
+            raise ValueError(f'derived variable not known:{name}')
+        if values.ndim != 3:
+            raise ValueError(f'derived variables need a 3d volume, not {values.ndim}d')
+        self.values = values
+        self.name = name
+        self.shape = values.shape
+        self.ndim = 3
+        self.size = values.size
+        self.dtype = np.dtype(np.float32)
+        d, h, w = values.shape
+        self.depth = depth or max(1, _SLAB_BYTES // (h * w * 4))
+
+    def iter_slabs(self, depth:int = 1):
+        d, h, w = self.shape
+        source = ((z0, np.asarray(slab, dtype=np.float32)) for z0, slab in iter_slabs(self.values, max(depth, self.depth)))
+        buffers = None
+        for z0, ext in iter_halo_slabs(source, 1):
+            with rawprofile.stage('transform'):
+                n = len(ext) - 2
+                if buffers is None or len(buffers[0]) < n:
+                    buffers = [np.empty((n, h, w), dtype=np.float32) for _ in range(4)]
+                out = self._compute(ext, z0 == 0, z0 + n == d, [b[:n] for b in buffers])
+            yield z0, out
+
+    def _compute(self, ext, at_start, at_end, buffers):
+        gz, gy, gx, mag = buffers
+        axis = {"GX": 2, "GY": 1, "GZ": 0}.get(self.name)
+        if axis is not None:
+            return gradient_slab(ext, axis, at_start, at_end, buffers[0])
+        for axis, g in enumerate((gz, gy, gx)):
+            gradient_slab(ext, axis, at_start, at_end, g)
+        # the component of a normal is kept, the others are squared in place
+        keep = {"NX": gx, "NY": gy, "NZ": gz}.get(self.name, gx)
+        np.multiply(keep, keep, out=mag)
+        for g in (gz, gy, gx):
+            if g is not keep:
+                np.multiply(g, g, out=g)
+                mag += g
+        np.sqrt(mag, out=mag)
+        if self.name == "GRADMAG":
+            return mag
+        # a zero gradient has all components 0, they stay 0
+        np.divide(keep, mag, out=keep, where=mag != 0)
+        return keep
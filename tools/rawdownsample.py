@@ -1,79 +1,227 @@
-import time
+import os, time
 import numpy as np
-import struct
 import argparse
 
-def load_raw_to_np(file, d, h, w, dtype = np.uint8):
-    element_count = w * h * d
-    size = element_count * np.dtype(dtype).itemsize
-    data_array = np.fromfile(file, dtype, element_count)
-    data_array = data_array.reshape((d, h, w))
-    print(f'load data shape: {data_array.shape}')
-    return data_array
-
-# 70.6ms
-def write_np_to_raw(file, data, factor, dtype=np.uint8):
-    d, h, w = data.shape
-    newfile=open(file,'wb')
-    for z in range(0, d, factor):
-        for y in range(0, h, factor):
-            for x in range(0, w, factor):
-                if dtype == np.uint8:
-                    binary_data = struct.pack("B", data[z, y, x])
-                elif dtype == np.uint32:
-                    binary_data = struct.pack("I", data[z, y, x])
-                elif dtype == np.uint32:
-                    binary_data = struct.pack("f", data[z, y, x])
-                else:
-                    print("unkown dtype")
-                    assert(False)
-                newfile.write(binary_data)
-
-# 35.2ms
-def write_np_to_raw_fast(file, data, factor, dtype=np.uint8):
-    d, h, w = data.shape
-    newarray = []
-    for z in range(0, d, factor):
-        for y in range(0, h, factor):
-            for x in range(0, w, factor):
-                newarray.append(data[z, y, x])
-    with open(file,'wb') as f:
-        byteArray = bytearray(newarray)
-        f.write(byteArray)
+from rawio import load_raw_to_np, iter_slabs, iter_halo_slabs, parse_size, slab_depth, slab_buffer_count, RawSlabReader, \
+    parse_roi, parse_stride, roi_shape, parse_dtype, raw_dtype, add_raw_arguments
+import rawprofile
 
+# out files are written in the byte order of `dtype` (the input's --endian),
+# a slab is only swapped when its byte order differs
 
 # 0.9ms
-def write_np_to_raw_fast2(file, data, factor, dtype=np.uint8):
+def write_np_to_raw_fast2(file, data, factor, dtype=np.uint8, depth:int = 16):
     d, h, w = data.shape
     newarray = data[::factor, ::factor, ::factor]
-    with open(file,'wb') as f:
-        byteArray = bytearray(newarray)
-        f.write(byteArray)
+    with rawprofile.open_file(file, 'wb') as f:
+        # a few z planes of the strided view at a time, no copy of the whole result
+        for z0, slab in iter_slabs(newarray, depth):
+            f.write(np.ascontiguousarray(slab, dtype=dtype))
+
+# filters
+#
+# point decimates (data[::f, ::f, ::f]), mean/max/min pool f^3 blocks, gaussian
+# smooths with a separable kernel before decimating. every filter gives
+# ceil(n / f) samples per axis, pooling pads partial blocks at the far edges
+# by repeating the last voxel.
+
+FILTERS = ["point", "mean", "max", "min", "gaussian"]
+
+def downsample_shape(shape, factor):
+    return tuple(-(-n // factor) for n in shape)
+
+def _pool(slab, factor, filter):
+    # reshape to (d/f, f, h/f, f, w/f, f) blocks and reduce the block axes
+    pad = [(0, -n % factor) for n in slab.shape]
+    if any(p for _, p in pad):
+        slab = np.pad(slab, pad, mode='edge')
+    n, h, w = slab.shape
+    blocks = slab.reshape(n // factor, factor, h // factor, factor, w // factor, factor)
+    if filter == "max":
+        return blocks.max(axis=(1, 3, 5))
+    if filter == "min":
+        return blocks.min(axis=(1, 3, 5))
+    wide = (slab.dtype.kind in 'iu' and slab.dtype.itemsize > 2) or slab.dtype == np.float64
+    acc = np.float64 if wide else np.float32
+    mean = blocks.mean(axis=(1, 3, 5), dtype=acc)
+    if slab.dtype.kind in 'iu':
+        np.rint(mean, out=mean)
+    return mean.astype(slab.dtype)
+
+def gaussian_kernel(sigma:float):
+    radius = max(1, int(np.ceil(3 * sigma)))
+    x = np.arange(-radius, radius + 1, dtype=np.float32)
+    kernel = np.exp(-x * x / np.float32(2 * sigma * sigma))
+    return kernel / kernel.sum()
+
+def _convolve_axis(a, kernel, axis:int, padded:bool = False):
+    # 1d convolution along axis as a weighted sum of shifted views, float32
+    # padded: `a` already carries radius extra samples on both sides along axis
+    radius = len(kernel) // 2
+    if not padded:
+        pad = [(radius, radius) if i == axis else (0, 0) for i in range(a.ndim)]
+        a = np.pad(a, pad, mode='edge')
+    n = a.shape[axis] - 2 * radius
+    out = np.zeros(a.shape[:axis] + (n,) + a.shape[axis + 1:], dtype=np.float32)
+    tmp = np.empty_like(out)
+    for i, k in enumerate(kernel):
+        np.multiply(a.take(np.arange(i, i + n), axis=axis), k, out=tmp)
+        out += tmp
+    return out
+
+def _gaussian_decimate(ext, z0, radius, factor, kernel, dtype):
+    # ext: slab starting at z0 with radius halo planes on both sides
+    core = ext.shape[0] - 2 * radius
+    start = (-z0) % factor
+    keep = np.arange(start, core, factor)
+    # z only for the planes that are kept, then y and x
+    smooth = np.zeros((len(keep),) + ext.shape[1:], dtype=np.float32)
+    for i, k in enumerate(kernel):
+        smooth += np.float32(k) * ext[keep + i].astype(np.float32)
+    smooth = _convolve_axis(smooth, kernel, 1)[:, ::factor]
+    smooth = _convolve_axis(smooth, kernel, 2)[:, :, ::factor]
+    if np.dtype(dtype).kind in 'iu':
+        info = np.iinfo(dtype)
+        np.rint(smooth, out=smooth)
+        np.clip(smooth, info.min, info.max, out=smooth)
+    return smooth.astype(dtype)
+
+def downsample_slabs(slabs, factor:int, filter:str = "point", sigma:float = None):
+    """
+    Downsample a stream of (z0, slab) by factor, yields (z0, slab) of the result.
+
+    input slabs must start at multiples of factor and be a multiple of factor
+    deep except the last one (gaussian: at least the kernel radius deep).
+    """
+    if filter not in FILTERS:
+        raise ValueError(f'filter not known:{filter}, must be one of {FILTERS}')
+    if filter == "gaussian":
+        kernel = gaussian_kernel(sigma or factor / 2)
+        radius = len(kernel) // 2
+        for z0, ext in iter_halo_slabs(slabs, radius):
+            out = _gaussian_decimate(ext, z0, radius, factor, kernel, ext.dtype)
+            yield -(-z0 // factor), out
+        return
+    for z0, slab in slabs:
+        if filter == "point":
+            out = np.ascontiguousarray(slab[(-z0) % factor::factor, ::factor, ::factor])
+        else:
+            out = _pool(slab, factor, filter)
+        yield -(-z0 // factor), out
+
+def _tee_slabs(slabs, sink):
+    # pass a slab stream through while handing every slab to sink(z0, slab)
+    for z0, slab in slabs:
+        sink(z0, slab)
+        yield z0, slab
 
-def main(file, out, d, h, w, factor, dtype = np.uint8):
+def pyramid_slab_multiple(levels:int, factor:int = 2, filter:str = "point", sigma:float = None):
+    # input slabs must start at multiples of this so every level stays aligned
+    multiple = (1 << levels) if levels else factor
+    if filter == "gaussian":
+        # the smallest slab fed to a gaussian step must cover the kernel radius
+        radius = len(gaussian_kernel(sigma or (1 if levels else factor / 2))) // 2
+        shrink = 1 << (levels - 1) if levels else 1
+        while multiple // shrink < radius:
+            multiple *= 2
+    return multiple
+
+def run_pyramid(slabs, levels:int, sinks, filter:str = "mean", sigma:float = None):
+    """
+    Stream slabs through `levels` 2x downsampling steps in one pass.
+
+    sinks[k](z0, slab) receives the slabs of level k, sinks[0] the input
+    slabs. each level is computed from the slabs of the level above it as they
+    stream through, so only a few slabs per level are in memory.
+    """
+    stream = _tee_slabs(slabs, sinks[0])
+    for level in range(1, levels + 1):
+        stream = _tee_slabs(downsample_slabs(stream, 2, filter, sigma), sinks[level])
+    for _ in stream:
+        pass
+
+def level_file_name(out:str, level:int, shape, dtype):
+    # out.raw -> out_L2_64x64x64_uint8.raw (w x h x d as in testdata/)
+    stem, ext = os.path.splitext(out)
+    d, h, w = shape
+    return f'{stem}_L{level}_{w}x{h}x{d}_{np.dtype(dtype).name}{ext or ".raw"}'
+
+def write_pyramid(out, values, levels:int, filter:str = "mean", sigma:float = None, depth:int = None, dtype = None):
+    # write L0 (the input) .. L`levels` 2x downsampled levels in one read of the input
+    # dtype: of the level files, with their byte order, default the one of values
+    if depth is None:
+        depth = pyramid_slab_multiple(levels, filter=filter, sigma=sigma)
+    dtype = np.dtype(dtype or values.dtype)
+    shape = values.shape
+    names = []
+    for level in range(levels + 1):
+        names.append(level_file_name(out, level, shape, dtype))
+        shape = downsample_shape(shape, 2)
+    files = [rawprofile.open_file(name, 'wb') for name in names]
+    try:
+        sinks = [lambda z0, slab, f=f: f.write(np.ascontiguousarray(slab, dtype=dtype)) for f in files]
+        run_pyramid(iter_slabs(values, depth), levels, sinks, filter, sigma)
+    finally:
+        for f in files:
+            f.close()
+    for name in names:
+        print(f'write to file:{name}')
+    return names
+
+def main(file, out, d, h, w, factor, dtype = np.uint8, offset:int = 0, mmap:bool = True, max_memory:int = None,
+         filter:str = "point", sigma:float = None, levels:int = 0, roi = None, stride = None, endian:str = 'little'):
     # a = load_raw_to_np("D:/data/dataset/scivis/foot_256x256x256_uint8.raw", 256, 256, 256)
     # print(a[:1000])
-    values = load_raw_to_np(file, d, h, w, dtype)
+    # slabs start at multiples of the total decimation so every level stays aligned
+    multiple = pyramid_slab_multiple(levels, factor, filter, sigma)
+    # --roi / --stride read only the selected voxels, the rest works on that region
+    shape = roi_shape((d, h, w), roi, stride)
+    if max_memory:
+        depth = slab_depth(shape, slab_buffer_count(file) * np.dtype(dtype).itemsize, max_memory, multiple=multiple)
+        values = RawSlabReader(file, d, h, w, dtype, endian, offset=offset, depth=depth, roi=roi, stride=stride)
+    else:
+        depth = multiple
+        values = load_raw_to_np(file, d, h, w, dtype, endian, offset=offset, mmap=mmap, roi=roi, stride=stride)
+    # the out files keep the byte order of the input
+    out_dtype = raw_dtype(dtype, endian)
     tic = time.time()
-    write_np_to_raw_fast2(out, values, factor, dtype)
+    with rawprofile.stage('transform'):
+        if levels:
+            write_pyramid(out, values, levels, filter, sigma, depth, out_dtype)
+        elif filter == "point" and not max_memory:
+            write_np_to_raw_fast2(out, values, factor, out_dtype)
+        else:
+            with rawprofile.open_file(out, 'wb') as f:
+                for z0, slab in downsample_slabs(iter_slabs(values, depth), factor, filter, sigma):
+                    f.write(np.ascontiguousarray(slab, dtype=out_dtype))
+            print(f'write to file:{out}, shape: {downsample_shape(shape, factor)}')
     toc = time.time()
     print(f'Time:{(toc-tic)*1000} ms')
     # print(values[:100][:100])
 
-if __name__ == "__main__":
-
-    parser = argparse.ArgumentParser(conflict_handler="resolve")
-    parser.add_argument('file', nargs='?')  # position args
+def add_arguments(parser):
+    add_raw_arguments(parser, endian_help="byte order of the raw file and of the out files")
     parser.add_argument('-o', '--out', type=str, required=True, help="out file name")
-    parser.add_argument('-w', '--width', type=int, default=256, help="width")
-    parser.add_argument('-h', '--height', type=int, default=256, help="height")
-    parser.add_argument('-d', '--depth', type=int, default=256, help="depth")
-    parser.add_argument('-t', '--type', type=str, default="byte", help="data type, byte, float")
     parser.add_argument('-f', '--factor', type=int, default=4, help="downsample factor")
-    args = parser.parse_args()
-    
-    main(args.file, args.out, args.depth, args.height, args.width, args.factor,  np.uint8 if args.type=="byte" else np.float32)
+    parser.add_argument('--filter', type=str, default="point", choices=FILTERS, help="point decimation, mean/max/min pooling or gaussian pre-filter")
+    parser.add_argument('--sigma', type=float, default=None, help="gaussian sigma in input voxels, default factor/2")
+    parser.add_argument('--levels', type=int, default=0, help="write a 2x pyramid L0..LN in one read, -o is the name prefix")
+    rawprofile.add_argument(parser)
 
+def run(args, parser):
+    with rawprofile.profile(args.profile, 'rawdownsample'):
+        main(args.file, args.out, args.depth, args.height, args.width, args.factor, parse_dtype(args.type),
+             offset=args.offset, mmap=not args.no_mmap,
+             max_memory=parse_size(args.max_memory) if args.max_memory else None,
+             filter=args.filter, sigma=args.sigma, levels=args.levels,
+             roi=parse_roi(args.roi) if args.roi else None, stride=parse_stride(args.stride) if args.stride else None,
+             endian=args.endian)
 
-    # py .\rawdownsample.py D:/data/dataset/scivis/foot_256x256x256_uint8.raw -o  D:/data/dataset/scivis/foot_64x64x64_uint8.raw
+if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(conflict_handler="resolve")
+    add_arguments(parser)
+    run(parser.parse_args(), parser)
+
+    # py .\rawdownsample.py D:/data/dataset/scivis/foot_256x256x256_uint8.raw -o  D:/data/dataset/scivis/foot_64x64x64_uint8.raw
+    # py .\rawdownsample.py D:/data/dataset/scivis/foot_256x256x256_uint8.raw -o foot_crop_64x64x64_uint8.raw -f 1 --roi 96:160,96:160,96:160
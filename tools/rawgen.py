@@ -0,0 +1,219 @@
+import os, time
+import threading
+import numpy as np
+import argparse
+
+from rawio import parse_dtype, raw_dtype, RAW_TYPES, ENDIANS
+import rawprofile
+
+# synthetic test volumes (sphere, cube, sincsphere) generated one z slab at a time
+#
+# every slab is evaluated in float32 into a small per thread work buffer with
+# in place ufuncs and cast into its part of the output, which is a preallocated
+# array or a np.memmap of the out file, so a 1024^3 volume needs the output
+# plus a few slab buffers. slabs run on a thread pool, numpy releases the gil
+# in the ufunc loops. the values are the same as the original full grid
+# versions in rawsphere.py, rawcube.py and sincsphere.py.
+
+_SLAB_BYTES = 8 << 20
+
+def _axes(z0, depth, h, w):
+    z = np.arange(z0, z0 + depth, dtype=np.float32)
+    y = np.arange(h, dtype=np.float32)
+    x = np.arange(w, dtype=np.float32)
+    return z, y, x
+
+def sphere_slab(tmp, z0, radius, center):
+    # radius - distance to center inside the sphere, 0 outside, center is (z, y, x)
+    depth, h, w = tmp.shape
+    z, y, x = _axes(z0, depth, h, w)
+    z -= center[0]; z *= z
+    y -= center[1]; y *= y
+    x -= center[2]; x *= x
+    np.add(z[:, None, None], y[None, :, None], out=tmp)
+    tmp += x
+    outside = tmp > radius ** 2
+    np.sqrt(tmp, out=tmp)
+    np.subtract(radius, tmp, out=tmp)
+    tmp[outside] = 0
+    return tmp
+
+def cube_slab(tmp, z0, max_distance, center):
+    # max_distance at the center, decreasing linearly along x y z, center is (z, y, x)
+    depth, h, w = tmp.shape
+    z, y, x = _axes(z0, depth, h, w)
+    for axis, c in ((z, center[0]), (y, center[1]), (x, center[2])):
+        axis -= c
+        np.abs(axis, out=axis)
+        np.subtract(max_distance, axis, out=axis)
+    np.minimum(x[None, None, :], y[None, :, None], out=tmp)
+    np.minimum(tmp, z[:, None, None], out=tmp)
+    return tmp
+
+def sincsphere_slab(tmp, z0, center, work):
+    # ellipsoid distance plus a sin(latitude) * sinc(longitude) pattern
+    # center indices as in sincsphere.py: (w/2, h/2, d/2) used as x, y, z centers
+    depth, h, w = tmp.shape
+    a, b, c = 1.0, 0.8, 0.6  # Semi-principal axes of the ellipsoid
+    z, y, x = _axes(z0, depth, h, w)
+
+    # ellipsoid distance
+    ez = (z - center[1]) / c; ez *= ez
+    ey = (y - center[1]) / b; ey *= ey
+    ex = (x - center[0]) / a; ex *= ex
+    np.add(ez[:, None, None], ey[None, :, None], out=tmp)
+    tmp += ex
+    np.sqrt(tmp, out=tmp)
+
+    # radius, then latitude angle phi in place
+    rx = x - center[1]; rx *= rx
+    ry = y - center[1]; ry *= ry
+    rz = z - center[0]; rz *= rz
+    r = work
+    np.add(rx[None, None, :], ry[None, :, None], out=r)
+    r += rz[:, None, None]
+    np.sqrt(r, out=r)
+    r += 1e-10
+    np.divide((z - center[2])[:, None, None], r, out=r)
+    phi = np.arcsin(r, out=r)
+    phi *= 10
+
+    # longitude angle theta is the same on every z plane
+    theta = np.arctan2((y - center[1])[:, None], (x - center[0])[None, :])
+    theta *= 5
+    # np.sinc
+    theta[theta == 0] = 1.0e-20
+    theta *= np.pi
+    sinc = np.sin(theta)
+    sinc /= theta
+
+    # 4 * (dist + 2 * sin(phi) * 2 * sinc(theta))
+    np.sin(phi, out=phi)
+    phi *= 2
+    phi *= 2
+    phi *= sinc
+    tmp += phi
+    tmp *= 4
+    return tmp
+
+GENERATORS = ["sphere", "cube", "sincsphere"]
+
+def default_params(kind:str, d:int, h:int, w:int):
+    # the parameters the original scripts used
+    center = (int(w/2), int(h/2), int(d/2))
+    if kind == "sphere":
+        return dict(radius=int(w/4), center=center)
+    if kind == "cube":
+        return dict(max_distance=int(w/4), center=center)
+    return dict(center=center)
+
+def _add_noise(tmp, z0, seed, noise):
+    # gaussian noise, one generator per z plane, so values do not depend on slab size or threads
+    plane = np.empty(tmp.shape[1:], dtype=np.float32)
+    for i in range(tmp.shape[0]):
+        rng = np.random.default_rng([seed, z0 + i])
+        rng.standard_normal(out=plane, dtype=np.float32)
+        plane *= noise
+        tmp[i] += plane
+
+def _to_output(tmp, out):
+    # float32 slab -> output dtype, integers are floored and clipped to their range
+    if out.dtype.kind in 'iu':
+        info = np.iinfo(out.dtype)
+        np.floor(tmp, out=tmp)
+        np.clip(tmp, info.min, info.max, out=tmp)
+    out[...] = tmp
+
+def generate(kind:str, d:int, h:int, w:int, dtype = np.uint8, out = None, threads:int = None,
+             seed:int = 0, noise:float = 0.0, depth:int = None, **params):
+    """
+    Generate a synthetic (d, h, w) volume slab by slab.
+
+    Parameters:
+    - kind: sphere, cube or sincsphere.
+    - dtype: Output type, float values are floored and clipped for integer types.
+    - out: None for a new array, a path for a raw file written through np.memmap, or an array.
+    - threads: Threads evaluating slabs, default cpu count.
+    - seed, noise: Add gaussian noise with standard deviation `noise`, same seed same values.
+    - params: radius / max_distance / center, default as in the original scripts.
+
+    Returns:
+    - The output array or memmap.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if kind not in GENERATORS:
+        raise ValueError(f'generator not known:{kind}, must be one of {GENERATORS}')
+    params = {**default_params(kind, d, h, w), **params}
+    dtype = np.dtype(dtype)
+    if out is None:
+        out = np.empty((d, h, w), dtype=dtype)
+    elif isinstance(out, (str, os.PathLike)):
+        out = np.memmap(out, dtype=dtype, mode='w+', shape=(d, h, w))
+    depth = depth or max(1, min(d, _SLAB_BYTES // (h * w * 4)))
+    local = threading.local()
+
+    def run(z0):
+        n = min(depth, d - z0)
+        if getattr(local, 'tmp', None) is None or local.tmp.shape[0] != n:
+            local.tmp = np.empty((n, h, w), dtype=np.float32)
+            local.work = np.empty((n, h, w), dtype=np.float32) if kind == "sincsphere" else None
+        tmp = local.tmp
+        with rawprofile.stage('transform'):
+            if kind == "sphere":
+                sphere_slab(tmp, z0, params["radius"], params["center"])
+            elif kind == "cube":
+                cube_slab(tmp, z0, params["max_distance"], params["center"])
+            else:
+                sincsphere_slab(tmp, z0, params["center"], local.work)
+            if noise:
+                _add_noise(tmp, z0, seed, noise)
+        with rawprofile.stage('format'):
+            _to_output(tmp, out[z0:z0 + n])
+
+    # the wait for the pool is the transform of this thread
+    with rawprofile.stage('transform'), ThreadPoolExecutor(threads or os.cpu_count() or 1) as executor:
+        list(executor.map(run, range(0, d, depth)))
+    if isinstance(out, np.memmap):
+        with rawprofile.stage('write'):
+            out.flush()
+        rawprofile.count(written=out.nbytes)
+    return out
+
+def main(kind, out, d, h, w, dtype = np.uint8, threads:int = None, seed:int = 0, noise:float = 0.0):
+    tic = time.time()
+    generate(kind, d, h, w, dtype, out, threads, seed, noise)
+    toc = time.time()
+    print(f'write to file:{out}, {kind} {w}x{h}x{d} {np.dtype(dtype).name}')
+    print(f'Time:{(toc-tic)*1000} ms')
+
+def add_arguments(parser, kind:str = None, type:str = "byte"):
+    # kind: preset generator of the rawsphere / rawcube / sincsphere scripts, no kind argument
+    if kind is None:
+        parser.add_argument('kind', choices=GENERATORS, help="sphere, cube or sincsphere")
+    else:
+        parser.set_defaults(kind=kind)
+    parser.add_argument('-o', '--out', type=str, required=True, help="out file name")
+    parser.add_argument('-w', '--width', type=int, default=64, help="width")
+    parser.add_argument('-h', '--height', type=int, default=64, help="height")
+    parser.add_argument('-d', '--depth', type=int, default=64, help="depth")
+    parser.add_argument('-t', '--type', type=str, default=type, choices=RAW_TYPES, help="data type, byte, float or int8 .. float64")
+    parser.add_argument('--endian', type=str, default="little", choices=ENDIANS, help="byte order of the out file")
+    parser.add_argument('-j', '--threads', type=int, default=None, help="threads evaluating slabs, default cpu count")
+    parser.add_argument('--seed', type=int, default=0, help="noise seed, same seed same volume")
+    parser.add_argument('--noise', type=float, default=0.0, help="add gaussian noise with this standard deviation")
+    rawprofile.add_argument(parser)
+
+def run(args, parser, name:str = 'rawgen'):
+    dtype = raw_dtype(parse_dtype(args.type), args.endian)
+    with rawprofile.profile(args.profile, name):
+        main(args.kind, args.out, args.depth, args.height, args.width, dtype, args.threads, args.seed, args.noise)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(conflict_handler="resolve")
+    add_arguments(parser)
+    run(parser.parse_args(), parser)
+
+    # py .\rawgen.py sphere -o sphere_1024x1024x1024_uint8.raw -d 1024 -h 1024 -w 1024
+    # py .\rawgen.py sincsphere -o sincsphere_128x128x128_float32.raw -d 128 -h 128 -w 128 -t float --noise 0.5 --seed 7
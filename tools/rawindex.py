@@ -0,0 +1,269 @@
+import os, time
+import numpy as np
+import argparse
+
+from rawio import load_raw_to_np, iter_slabs, parse_size, slab_depth, slab_buffer_count, RawSlabReader, \
+    raw_dtype, parse_dtype, add_raw_arguments
+import rawprofile
+
+# per brick statistics of a raw volume, kept in a sidecar next to it
+#
+# one streaming pass over z slabs of whole bricks gives min, max, mean and the
+# nonzero count of every brick^3 brick (the last bricks of an axis are
+# partial). the brick min/max are pooled 2x per level into a small octree up
+# to one node, a query descends it from the top and only tests the children
+# of nodes that may match. the sidecar is <file>.index.npz, it records the
+# size, mtime and header offset of the raw file and is ignored when they changed.
+# the marching cubes of a brick reach one voxel into the next bricks, their
+# min/max (cube_min / cube_max, for iso_bricks) cover the brick and the first
+# plane, row and column after it, from the z min/max plane of every brick.
+# nan voxels make the brick min/max nan, such bricks are never skipped.
+
+BRICKS = [16, 32]
+
+def index_file_name(file):
+    return f'{file}.index.npz'
+
+def _brick_reduce(slab, brick:int, ufunc, pad_value = None):
+    # reduce every brick x brick column of a (n, h, w) slab, n <= brick, to (nby, nbx)
+    n, h, w = slab.shape
+    pad = [(0, 0), (0, -h % brick), (0, -w % brick)]
+    if any(p for _, p in pad):
+        if pad_value is None:
+            slab = np.pad(slab, pad, mode='edge')
+        else:
+            slab = np.pad(slab, pad, constant_values=pad_value)
+    h, w = slab.shape[1:]
+    blocks = slab.reshape(n, h // brick, brick, w // brick, brick)
+    return ufunc.reduce(ufunc.reduce(ufunc.reduce(blocks, axis=4), axis=2), axis=0)
+
+def _cube_reduce(plane, next_plane, brick:int, ufunc):
+    # (nby, nbx) reduce of a brick layer's z reduced (h, w) plane over brick + 1
+    # rows and columns, with the first plane of the next layer (None for the last)
+    if next_plane is not None:
+        plane = ufunc(plane, next_plane)
+    for axis in (0, 1):
+        n = plane.shape[axis]
+        pad = [(0, -n % brick * int(a == axis)) for a in range(2)]
+        blocks = np.pad(plane, pad, mode='edge')
+        blocks = ufunc.reduce(blocks.reshape(blocks.shape[:axis] + (-1, brick) + blocks.shape[axis + 1:]), axis=axis + 1)
+        # the first row / column of every next block
+        first = plane[brick::brick] if axis == 0 else plane[:, brick::brick]
+        if axis == 0:
+            blocks[:-1] = ufunc(blocks[:-1], first)
+        else:
+            blocks[:, :-1] = ufunc(blocks[:, :-1], first)
+        plane = blocks
+    return plane
+
+def _pool_octree(mins, maxs):
+    # [(mins, maxs)] from the bricks up to a single node, 2x per level
+    levels = [(mins, maxs)]
+    while max(mins.shape) > 1:
+        pad = [(0, -n % 2) for n in mins.shape]
+        mins = np.pad(mins, pad, mode='edge')
+        maxs = np.pad(maxs, pad, mode='edge')
+        a, b, c = (n // 2 for n in mins.shape)
+        mins = mins.reshape(a, 2, b, 2, c, 2).min(axis=(1, 3, 5))
+        maxs = maxs.reshape(a, 2, b, 2, c, 2).max(axis=(1, 3, 5))
+        levels.append((mins, maxs))
+    return levels
+
+def build_index(values, brick:int = 32):
+    """
+    Per brick statistics of a (d, h, w) array, memmap or RawSlabReader.
+
+    the slabs must be a multiple of brick deep (RawSlabReader depth), arrays
+    are read brick deep. returns a dict of arrays as stored in the sidecar.
+    """
+    d, h, w = values.shape
+    nbz, nby, nbx = (-(-n // brick) for n in (d, h, w))
+    mins = np.empty((nbz, nby, nbx), dtype=values.dtype.newbyteorder('='))
+    maxs = np.empty_like(mins)
+    sums = np.zeros((nbz, nby, nbx), dtype=np.float64)
+    nonzero = np.zeros((nbz, nby, nbx), dtype=np.min_scalar_type(brick ** 3))
+    cube_mins, cube_maxs = np.empty_like(mins), np.empty_like(maxs)
+    # z min/max plane of the last brick layer, done when the first plane of the next one is read
+    last = None
+    for z0, slab in iter_slabs(values, brick):
+        if z0 % brick or (len(slab) % brick and z0 + len(slab) < d):
+            raise ValueError(f'slabs must be a multiple of {brick} deep, got {len(slab)} at z={z0}')
+        for i in range(0, len(slab), brick):
+            part = np.asarray(slab[i:i + brick])
+            bz = (z0 + i) // brick
+            plane_min, plane_max = np.minimum.reduce(part, axis=0), np.maximum.reduce(part, axis=0)
+            mins[bz] = _brick_reduce(plane_min[None], brick, np.minimum)
+            maxs[bz] = _brick_reduce(plane_max[None], brick, np.maximum)
+            sums[bz] = _brick_reduce(part.astype(np.float64), brick, np.add, 0)
+            nonzero[bz] = _brick_reduce((part != 0).astype(np.uint32), brick, np.add, 0)
+            if last is not None:
+                cube_mins[bz - 1] = _cube_reduce(last[0], part[0], brick, np.minimum)
+                cube_maxs[bz - 1] = _cube_reduce(last[1], part[0], brick, np.maximum)
+            last = plane_min, plane_max
+    cube_mins[-1] = _cube_reduce(last[0], None, brick, np.minimum)
+    cube_maxs[-1] = _cube_reduce(last[1], None, brick, np.maximum)
+    # voxels per brick, the last brick of every axis may be partial
+    counts = [np.minimum(brick, n - np.arange(nb) * brick) for n, nb in zip((d, h, w), (nbz, nby, nbx))]
+    voxels = counts[0][:, None, None] * counts[1][None, :, None] * counts[2][None, None, :]
+    index = dict(shape=np.array((d, h, w)), dtype=np.array(mins.dtype.str), brick=np.array(brick),
+                 min=mins, max=maxs, mean=(sums / voxels).astype(np.float32), nonzero=nonzero,
+                 cube_min=cube_mins, cube_max=cube_maxs)
+    for level, (lmins, lmaxs) in enumerate(_pool_octree(mins, maxs)[1:], 1):
+        index[f'min_L{level}'] = lmins
+        index[f'max_L{level}'] = lmaxs
+    return index
+
+def _query(levels, test):
+    # descend the octree levels (bricks first), only children of matching nodes can match
+    candidates = None
+    for mins, maxs in reversed(levels):
+        hit = test(mins, maxs)
+        if candidates is not None:
+            up = candidates.repeat(2, 0).repeat(2, 1).repeat(2, 2)
+            hit &= up[:hit.shape[0], :hit.shape[1], :hit.shape[2]]
+        candidates = hit
+    return candidates
+
+class BrickIndex:
+    """
+    a loaded sidecar: brick statistics and their min/max octree.
+
+    query(test) descends the octree with test(mins, maxs) -> bool array,
+    true where a node may hold a wanted voxel, and returns the (nbz, nby, nbx)
+    bricks that may. the tests must hold for a node when they hold for one of
+    its children, min/max range tests do.
+    """
+
+    def __init__(self, arrays):
+        self.shape = tuple(int(n) for n in arrays['shape'])
+        self.dtype = np.dtype(str(arrays['dtype']))
+        self.brick = int(arrays['brick'])
+        self.min = arrays['min']
+        self.max = arrays['max']
+        self.mean = arrays['mean']
+        self.nonzero = arrays['nonzero']
+        # sidecars written before cube_min / cube_max have none
+        self.cube_min = arrays['cube_min'] if 'cube_min' in arrays else None
+        self.cube_max = arrays['cube_max'] if 'cube_max' in arrays else None
+        self.levels = [(self.min, self.max)]
+        while f'min_L{len(self.levels)}' in arrays:
+            self.levels.append((arrays[f'min_L{len(self.levels)}'], arrays[f'max_L{len(self.levels)}']))
+
+    @staticmethod
+    def find(file, shape, dtype, offset:int = 0, path:str = None):
+        # the sidecar of a raw file, None when there is none or it does not match the file
+        # dtype: the dtype of the file, with its byte order (rawio.raw_dtype)
+        # offset: header bytes before the volume, sidecars without one are from before it was recorded
+        # path: a sidecar written with rawindex -o, it must exist, default <file>.index.npz if there is one
+        if path is None:
+            path = index_file_name(file)
+            if not os.path.exists(path):
+                return None
+        with np.load(path) as arrays:
+            stat = os.stat(file)
+            if (int(arrays['file_size']) != stat.st_size or int(arrays['file_mtime_ns']) != stat.st_mtime_ns
+                    or tuple(arrays['shape']) != tuple(shape) or np.dtype(str(arrays['dtype'])) != np.dtype(dtype)
+                    or 'offset' not in arrays or int(arrays['offset']) != offset):
+                print(f'warning: {path} does not match {file}, ignored')
+                return None
+            index = BrickIndex(arrays)
+        print(f'index: {path}, {index.min.size} bricks of {index.brick}^3')
+        return index
+
+    def query(self, test):
+        return _query(self.levels, test)
+
+    def iso_bricks(self, iso:float):
+        # bricks whose marching cubes (the cubes of its voxels, up to the first voxel of the
+        # next bricks) may cross iso (x < iso next to x >= iso). the cube min/max of a brick
+        # cover its +1 plane, row and column, an older sidecar without them takes the
+        # min/max of the +1 neighbour bricks
+        mins, maxs = self.cube_min, self.cube_max
+        if mins is None:
+            mins, maxs = self._neighbour_range()
+        return _query(_pool_octree(mins, maxs), lambda mins, maxs: ~((maxs < iso) | (mins >= iso)))
+
+    def _neighbour_range(self):
+        # min/max of every brick and its +1 neighbours
+        mins, maxs = self.min, self.max
+        for axis in range(3):
+            pad = [(0, int(a == axis)) for a in range(3)]
+            mins, maxs = np.pad(mins, pad, mode='edge'), np.pad(maxs, pad, mode='edge')
+            n = mins.shape[axis]
+            mins = np.minimum(mins.take(range(n - 1), axis), mins.take(range(1, n), axis))
+            maxs = np.maximum(maxs.take(range(n - 1), axis), maxs.take(range(1, n), axis))
+        return mins, maxs
+
+    def value_range(self):
+        # (min, max) of the volume, None when a brick holds nan (its min/max are nan)
+        if np.isnan(self.min).any() or np.isnan(self.max).any():
+            return None
+        return float(self.min.min()), float(self.max.max())
+
+    def above(self, threshold:float):
+        # bricks that may hold a voxel > threshold
+        return self.query(lambda mins, maxs: ~(maxs <= threshold))
+
+    def planes(self, bricks):
+        # (d,) bool, z planes that are in a selected brick
+        layers = bricks.any(axis=(1, 2))
+        return np.repeat(layers, self.brick)[:self.shape[0]]
+
+    def boxes(self, bricks, bz:int):
+        # [(y0, y1, x0, x1)] voxel bounds of the selected bricks of brick layer bz,
+        # one box per run of selected bricks along x, clipped to the volume
+        b = self.brick
+        h, w = self.shape[1:]
+        edges = np.diff(bricks[bz].astype(np.int8), axis=1, prepend=0, append=0)
+        rows, starts = np.nonzero(edges == 1)
+        stops = np.nonzero(edges == -1)[1]
+        return [(by * b, min((by + 1) * b, h), x0 * b, min(x1 * b, w)) for by, x0, x1 in zip(rows, starts, stops)]
+
+def write_index(file, d, h, w, dtype = np.uint8, brick:int = 32, offset:int = 0, max_memory:int = None, out:str = None,
+                endian:str = 'little'):
+    if max_memory:
+        depth = slab_depth((d, h, w), slab_buffer_count(file) * np.dtype(dtype).itemsize, max_memory, multiple=brick)
+        values = RawSlabReader(file, d, h, w, dtype, endian, offset=offset, depth=depth)
+    else:
+        values = load_raw_to_np(file, d, h, w, dtype, endian, offset=offset)
+    with rawprofile.stage('transform'):
+        index = build_index(values, brick)
+    # keyed by the dtype of the file, the same bytes read in the other byte order are other values
+    index['dtype'] = np.array(raw_dtype(dtype, endian).str)
+    stat = os.stat(file)
+    out = out or index_file_name(file)
+    with rawprofile.open_file(out, 'wb') as f:
+        np.savez_compressed(f, file_size=np.array(stat.st_size), file_mtime_ns=np.array(stat.st_mtime_ns),
+                            offset=np.array(offset), **index)
+    print(f'write to file:{out}, {index["min"].size} bricks of {brick}^3, {sum(1 for k in index if k.startswith("min_L"))} octree levels')
+    return out
+
+def main(file, d, h, w, dtype = np.uint8, brick:int = 32, offset:int = 0, max_memory:int = None, out:str = None,
+         endian:str = 'little'):
+    tic = time.time()
+    out = write_index(file, d, h, w, dtype, brick, offset, max_memory, out, endian)
+    toc = time.time()
+    with np.load(out) as arrays:
+        index = BrickIndex(arrays)
+    empty = np.count_nonzero(index.nonzero == 0)
+    print(f'min {index.min.min()} max {index.max.max()}, {empty} of {index.nonzero.size} bricks all zero')
+    print(f'Time:{(toc-tic)*1000} ms')
+
+def add_arguments(parser):
+    add_raw_arguments(parser, mmap=False, roi=False)
+    parser.add_argument('-b', '--brick', type=int, default=32, choices=BRICKS, help="brick edge in voxels")
+    parser.add_argument('-o', '--out', type=str, default=None, help="sidecar name, default <file>.index.npz, other names are read with --index")
+    rawprofile.add_argument(parser)
+
+def run(args, parser):
+    with rawprofile.profile(args.profile, 'rawindex'):
+        main(args.file, args.depth, args.height, args.width, parse_dtype(args.type),
+             args.brick, args.offset, parse_size(args.max_memory) if args.max_memory else None, args.out, args.endian)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(conflict_handler="resolve")
+    add_arguments(parser)
+    run(parser.parse_args(), parser)
+
+    # py .\rawindex.py D:/data/dataset/scivis/foot_256x256x256_uint8.raw -d 256 -h 256 -w 256 -b 32
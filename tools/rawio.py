@@ -0,0 +1,564 @@
+import os, re
+import contextlib
+import numpy as np
+
+import rawprofile
+
+# shared raw volume loading for the tools
+#
+# a raw file is d*h*w values, x fastest, optionally behind a fixed size header.
+# by default the volume is memory mapped, pages are read when a slab is touched,
+# so a volume larger than ram can be converted and nothing is read up front.
+# gzip, xz and bz2 compressed raw files (foot.raw.gz) are found by their magic
+# bytes and decompressed with readinto straight into the numpy buffers, they
+# can not be mapped, RawSlabReader decompresses them in a reader thread.
+#
+# the byte order of the file lives in the dtype: a mapped volume is a view in
+# the file order and numpy swaps while it converts a slab for a writer, a
+# volume or slab read into our own buffer is swapped once in place and then
+# handed out as a native view.
+#
+# within use_volume_cache (rawtool run-jobs) a whole volume load is kept for the
+# later loads of the same file with the same parameters, see VolumeCache.
+
+ENDIANS = {'little': '<', 'big': '>', 'native': '='}
+
+# -t names of the tools, byte and float as before plus the numpy names
+RAW_TYPES = {
+    'byte': np.uint8, 'float': np.float32,
+    'int8': np.int8, 'uint8': np.uint8, 'int16': np.int16, 'uint16': np.uint16,
+    'int32': np.int32, 'uint32': np.uint32, 'float32': np.float32, 'float64': np.float64,
+}
+
+def parse_dtype(text):
+    # "byte", "float", "uint16", ... -> np.dtype
+    if text not in RAW_TYPES:
+        raise ValueError(f'data type not known:{text}, must be one of {list(RAW_TYPES)}')
+    return np.dtype(RAW_TYPES[text])
+
+def raw_dtype(dtype, endian:str = 'little'):
+    if endian not in ENDIANS:
+        raise ValueError(f'endian not known:{endian}, must be one of {list(ENDIANS)}')
+    return np.dtype(dtype).newbyteorder(ENDIANS[endian])
+
+def swap_to_native(array):
+    # an array in a buffer of our own, in native byte order: swapped in place and
+    # viewed with the native dtype, nothing is copied
+    if array.dtype.isnative:
+        return array
+    return array.byteswap(inplace=True).view(array.dtype.newbyteorder('='))
+
+# compressed inputs
+
+_MAGIC = [(b'\x1f\x8b', 'gzip'), (b'\xfd7zXZ\x00', 'lzma'), (b'BZh', 'bz2')]
+COMPRESSED_EXTS = ('.gz', '.xz', '.lzma', '.bz2')
+# bytes per readinto call, the decompressors build an intermediate bytes object of this size
+_READ_CHUNK = 4 << 20
+
+def compression_of(file):
+    # 'gzip', 'lzma', 'bz2' or None for a plain raw file
+    with open(file, 'rb') as f:
+        head = f.read(6)
+    for magic, module in _MAGIC:
+        if head.startswith(magic):
+            return module
+    return None
+
+def strip_compressed_ext(file):
+    # foot.raw.gz -> foot.raw
+    base, ext = os.path.splitext(file)
+    return base if ext.lower() in COMPRESSED_EXTS else file
+
+def open_raw(file, offset:int = 0):
+    # binary file object at offset, decompressing when the file is compressed
+    module = compression_of(file)
+    if module is None:
+        f = open(file, 'rb', buffering=0)
+    else:
+        import importlib
+        f = importlib.import_module(module).open(file, 'rb')
+    if offset:
+        f.seek(offset)
+    return f
+
+def slab_buffer_count(file, prefetch:int = None):
+    # slab buffers a RawSlabReader of the file holds, for the memory budgets
+    if prefetch is None:
+        prefetch = 2 if compression_of(file) else 0
+    return prefetch + 2 if prefetch else 1
+
+def read_exact(f, array, file = '', where:str = ''):
+    # fill a contiguous array from f with readinto, at most _READ_CHUNK bytes per call
+    view = memoryview(array.reshape(-1).view(np.uint8))
+    read = 0
+    while read < len(view):
+        n = f.readinto(view[read:read + _READ_CHUNK])
+        if not n:
+            raise ValueError(f'{file}: unexpected end of file{where}, {read} of {len(view)} bytes')
+        read += n
+    return array
+
+def check_raw_size(file, d, h, w, dtype, offset:int = 0):
+    # the file must hold the header plus d*h*w values, extra trailing bytes are ignored
+    expected = d * h * w * np.dtype(dtype).itemsize
+    if compression_of(file):
+        # the decompressed size is only known at the end, the readers raise on a short stream
+        return expected
+    size = os.path.getsize(file) - offset
+    if size < expected:
+        raise ValueError(f'{file}: {size} bytes after offset {offset}, expected {expected} for {d}x{h}x{w} {np.dtype(dtype)}')
+    if size > expected:
+        print(f'warning: {file} has {size - expected} bytes more than {d}x{h}x{w} {np.dtype(dtype)}, ignored')
+    return expected
+
+def load_raw_to_np(file, d, h, w, dtype = np.uint8, endian:str = 'little', offset:int = 0, mmap:bool = True,
+                   roi = None, stride = None):
+    """
+    Load a raw volume as a (d, h, w) array.
+
+    Parameters:
+    - d, h, w: Dimensions of the volume, x (w) fastest.
+    - dtype: Value type of the raw file.
+    - endian: Byte order of the raw file, little, big or native.
+    - offset: Bytes to skip at the start of the file (header).
+    - mmap: Memory map the file read only instead of reading it into memory.
+      compressed files are always decompressed into memory.
+    - roi, stride: Read only a region (3 slices) and / or every stride-th voxel (3 ints), see read_roi.
+
+    Returns:
+    - A (d, h, w) numpy array in native byte order, or a read only np.memmap
+      in the byte order of the file.
+    """
+    if roi or stride:
+        return read_roi(file, d, h, w, dtype, roi, stride, endian, offset)
+    dtype = raw_dtype(dtype, endian)
+    cache = _volume_cache
+    if cache is not None:
+        key = (os.path.abspath(file), (d, h, w), dtype.str, offset, mmap)
+        data_array = cache.get(key)
+        if data_array is not None:
+            print(f'load data shape: {data_array.shape}, dtype: {data_array.dtype}, reused')
+            return data_array
+    data_array = _load_raw(file, d, h, w, dtype, offset, mmap)
+    if cache is not None:
+        cache.put(key, data_array)
+    return data_array
+
+def _load_raw(file, d, h, w, dtype, offset:int, mmap:bool):
+    check_raw_size(file, d, h, w, dtype, offset)
+    module = compression_of(file)
+    if module:
+        with rawprofile.stage('load'), open_raw(file, offset) as f:
+            data_array = swap_to_native(read_exact(f, np.empty((d, h, w), dtype=dtype), file))
+        rawprofile.count(read=data_array.nbytes)
+        print(f'load data shape: {data_array.shape}, dtype: {data_array.dtype}, {module} decompressed')
+        return data_array
+    if mmap:
+        data_array = np.memmap(file, dtype=dtype, mode='r', offset=offset, shape=(d, h, w))
+    else:
+        with rawprofile.stage('load'):
+            data_array = swap_to_native(np.fromfile(file, dtype, d * h * w, offset=offset).reshape((d, h, w)))
+        rawprofile.count(read=data_array.nbytes)
+    print(f'load data shape: {data_array.shape}, dtype: {data_array.dtype}, mmap: {mmap}')
+    return data_array
+
+# reuse of loaded volumes
+
+class VolumeCache:
+    """
+    whole volumes of load_raw_to_np kept for later loads of the same file.
+
+    a volume is keyed by the absolute file name and the load parameters and
+    is only kept when its file is in `wanted` (the inputs still to come), so
+    masks and snapshots read once are not held. a kept volume is dropped when
+    its file changed (size, mtime) and is made read only, the tools get the
+    same array every time. roi / stride reads and streamed slabs are not kept.
+    """
+
+    def __init__(self, wanted = ()):
+        self.volumes = {}           # key -> (size, mtime_ns, array)
+        self.wanted = set()
+        self.hits = 0
+        self.keep(wanted)
+
+    def keep(self, files):
+        # keep the volumes of these files only
+        self.wanted = {os.path.abspath(f) for f in files}
+        self.volumes = {key: v for key, v in self.volumes.items() if key[0] in self.wanted}
+
+    def get(self, key):
+        if key not in self.volumes:
+            return None
+        size, mtime_ns, array = self.volumes[key]
+        stat = os.stat(key[0])
+        if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+            del self.volumes[key]
+            return None
+        self.hits += 1
+        return array
+
+    def put(self, key, array):
+        if key[0] not in self.wanted:
+            return
+        array.flags.writeable = False
+        stat = os.stat(key[0])
+        self.volumes[key] = (stat.st_size, stat.st_mtime_ns, array)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for _, _, array in self.volumes.values())
+
+_volume_cache = None
+
+@contextlib.contextmanager
+def use_volume_cache(cache):
+    # load_raw_to_np goes through the cache inside the block
+    global _volume_cache
+    previous, _volume_cache = _volume_cache, cache
+    try:
+        yield cache
+    finally:
+        _volume_cache = previous
+
+# command lines
+
+def add_raw_arguments(parser, size:int = 256, mmap:bool = True, stream:bool = True, roi:bool = True,
+                      endian_help:str = "byte order of the raw file"):
+    # the raw volume options of the tools: file, size, dtype, byte order, header and how it is read
+    parser.add_argument('file', nargs='?')  # position args
+    parser.add_argument('-w', '--width', type=int, default=size, help="width")
+    parser.add_argument('-h', '--height', type=int, default=size, help="height")         # override help
+    parser.add_argument('-d', '--depth', type=int, default=size, help="depth")
+    parser.add_argument('-t', '--type', type=str, default="byte", choices=RAW_TYPES, help="data type, byte, float or int8 .. float64")
+    parser.add_argument('--endian', type=str, default="little", choices=ENDIANS, help=endian_help)
+    parser.add_argument('--offset', type=int, default=0, help="header bytes to skip in the raw file")
+    if mmap:
+        parser.add_argument('--no-mmap', action="store_true", default=False, help="read the raw file into memory instead of memory mapping it")
+    if stream:
+        parser.add_argument('--max-memory', type=str, default=None, help="stream z slabs within this budget, e.g. 256M, 2G")
+    if roi:
+        parser.add_argument('--roi', type=str, default=None, help="read only z0:z1,y0:y1,x0:x1, e.g. 0:64,100:164,:")
+        parser.add_argument('--stride', type=str, default=None, help="read every N-th voxel, N or sz,sy,sx")
+
+# file names as in testdata/: <name>_<w>x<h>x<d>_<dtype>.raw, e.g. foot_64x64x64_uint8.raw
+
+_RAW_NAME = re.compile(r'_(\d+)x(\d+)x(\d+)_([a-z]+\d*)\.raw(\.gz|\.xz|\.lzma|\.bz2)?$', re.IGNORECASE)
+
+def parse_raw_name(file):
+    # -> (d, h, w, dtype), raises ValueError when the name does not follow the convention
+    m = _RAW_NAME.search(os.path.basename(file))
+    if not m:
+        raise ValueError(f'{file}: name does not match <name>_<w>x<h>x<d>_<dtype>.raw[.gz|.xz|.bz2]')
+    w, h, d = (int(v) for v in m.group(1, 2, 3))
+    # the -t names of the tools, byte is uint8 and float is float32
+    try:
+        dtype = parse_dtype(m.group(4).lower())
+    except ValueError as e:
+        raise ValueError(f'{file}: {e}')
+    return d, h, w, dtype
+
+# streaming
+
+_SIZE_UNITS = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+
+def parse_size(text):
+    # "512M", "2G", "1048576" -> bytes
+    text = str(text).strip().upper().rstrip('B')
+    unit = text[-1] if text and text[-1] in _SIZE_UNITS else ''
+    return int(float(text[:len(text) - len(unit)]) * _SIZE_UNITS[unit])
+
+def slab_depth(shape, itemsize:int, max_memory:int, plane_overhead:int = 0, multiple:int = 1):
+    """
+    Pick the z slab height for a memory budget.
+
+    the slab buffer costs h*w*itemsize per z plane, plane_overhead is the
+    working memory the consumer needs on top of that for one z plane
+    (text buffers, records, ...). the height is rounded down to a multiple of
+    `multiple` and is at least `multiple`.
+    """
+    d, h, w = shape
+    plane = h * w * itemsize
+    depth = (max_memory - plane_overhead) // max(plane, 1)
+    depth = max(multiple, depth // multiple * multiple)
+    if depth > d:
+        depth = d
+    return int(depth)
+
+# regions of interest
+#
+# a roi and a stride select ranges of z, y and x. plain files are read row by
+# row at the byte offset of each row (os.preadv where there is one), rows of
+# whole planes are merged into one read, so a 64^3 crop of a 2048^3 volume
+# reads 64*64 rows, not the volume. compressed files have no random access,
+# they are decompressed plane by plane and cropped in memory.
+
+def parse_roi(text):
+    # "z0:z1,y0:y1,x0:x1" -> 3 slices, empty bounds are the volume bounds, "8:72,:,-64:"
+    parts = text.split(',')
+    if len(parts) != 3:
+        raise ValueError(f'roi must be z0:z1,y0:y1,x0:x1, got {text}')
+    slices = []
+    for part in parts:
+        bounds = part.split(':')
+        if len(bounds) > 2:
+            raise ValueError(f'roi must be z0:z1,y0:y1,x0:x1, got {text}')
+        bounds = [int(b) if b.strip() else None for b in bounds]
+        if len(bounds) == 1 and bounds[0] is not None:
+            # one index, "-1" is the last plane
+            bounds.append(bounds[0] + 1 or None)
+        slices.append(slice(bounds[0], bounds[-1]))
+    return tuple(slices)
+
+def parse_stride(text):
+    # "2" -> (2, 2, 2), "1,2,2" -> z, y, x strides
+    strides = tuple(int(v) for v in str(text).split(','))
+    if len(strides) == 1:
+        strides *= 3
+    if len(strides) != 3 or min(strides) < 1:
+        raise ValueError(f'stride must be N or sz,sy,sx with positive values, got {text}')
+    return strides
+
+def roi_ranges(shape, roi = None, stride = None):
+    # the z, y, x index ranges selected by roi (3 slices) and stride (3 ints)
+    roi = roi or (slice(None),) * 3
+    stride = stride or (1, 1, 1)
+    ranges = tuple(range(*slice(r.start, r.stop, s).indices(n)) for r, s, n in zip(roi, stride, shape))
+    if not all(ranges):
+        raise ValueError(f'roi {roi} with stride {stride} selects nothing of a {shape} volume')
+    return ranges
+
+def roi_shape(shape, roi = None, stride = None):
+    return tuple(len(r) for r in roi_ranges(shape, roi, stride))
+
+def _pread_into(f, array, position:int):
+    # fill a contiguous array from byte `position` of a raw file object
+    view = memoryview(array.reshape(-1).view(np.uint8))
+    read = 0
+    while read < len(view):
+        if hasattr(os, 'preadv'):
+            n = os.preadv(f.fileno(), [view[read:]], position + read)
+        else:
+            f.seek(position + read)
+            n = f.readinto(view[read:])
+        if not n:
+            raise ValueError(f'{f.name}: unexpected end of file at byte {position + read}')
+        read += n
+
+def _read_region(f, out, shape, ranges, offset:int):
+    # out[k, j, i] = volume[zs[k], ys[j], xs[i]] from a plain raw file, out is contiguous
+    d, h, w = shape
+    zs, ys, xs = ranges
+    itemsize = out.dtype.itemsize
+    row = None
+    whole_rows = xs.step == 1 and len(xs) == w
+    for k, z in enumerate(zs):
+        plane = offset + z * h * w * itemsize
+        if whole_rows and ys.step == 1:
+            # the selected rows of the plane are one byte range
+            _pread_into(f, out[k], plane + ys.start * w * itemsize)
+            continue
+        for j, y in enumerate(ys):
+            position = plane + (y * w + xs.start) * itemsize
+            if xs.step == 1:
+                _pread_into(f, out[k, j], position)
+            else:
+                # the span from the first to the last selected x, then every step-th value
+                if row is None:
+                    row = np.empty((len(xs) - 1) * xs.step + 1, dtype=out.dtype)
+                _pread_into(f, row, position)
+                out[k, j] = row[::xs.step]
+    return out
+
+def _iter_region_planes(f, shape, dtype, ranges, file:str):
+    # (k, cropped plane) of a sequential (compressed) stream, every plane is decompressed
+    d, h, w = shape
+    zs, ys, xs = ranges
+    plane = np.empty((h, w), dtype=dtype)
+    selected = {z: k for k, z in enumerate(zs)}
+    for z in range(zs[-1] + 1):
+        read_exact(f, plane, file, f' at z={z}')
+        if z in selected:
+            yield selected[z], plane[ys.start:ys.stop:ys.step, xs.start:xs.stop:xs.step]
+
+def read_roi(file, d, h, w, dtype = np.uint8, roi = None, stride = None, endian:str = 'little', offset:int = 0):
+    """
+    Read a region of a raw volume, every stride-th voxel of the roi.
+
+    only the rows of the region are read from a plain file (see above), the
+    result is a contiguous (len(zs), len(ys), len(xs)) array.
+    """
+    dtype = raw_dtype(dtype, endian)
+    check_raw_size(file, d, h, w, dtype, offset)
+    ranges = roi_ranges((d, h, w), roi, stride)
+    out = np.empty(tuple(len(r) for r in ranges), dtype=dtype)
+    with rawprofile.stage('load'), open_raw(file, offset) as f:
+        if compression_of(file):
+            for k, plane in _iter_region_planes(f, (d, h, w), dtype, ranges, file):
+                out[k] = plane
+        else:
+            _read_region(f, out, (d, h, w), ranges, offset)
+        out = swap_to_native(out)
+    rawprofile.count(read=out.nbytes)
+    print(f'load data shape: {out.shape}, dtype: {out.dtype}, roi z {ranges[0]} y {ranges[1]} x {ranges[2]}')
+    return out
+
+class RawSlabReader:
+    """
+    Read a raw volume one z slab at a time through reused buffers.
+
+    behaves like a read only (d, h, w) volume for the writers: shape, ndim,
+    size, dtype and iteration over (z0, slab) pairs. the slab array is only
+    valid until the next one is read. with prefetch > 0 the slabs are read
+    (and decompressed) in a thread, up to `prefetch` slabs ahead of the
+    consumer, through a ring of prefetch + 2 buffers. compressed files
+    prefetch 2 slabs by default, plain files read in the consumer.
+    with a roi or stride the reader is the selected region, its shape and
+    z0 are those of the region. slabs are swapped to native byte order in
+    their buffer, dtype is the native one, file_dtype the one of the file.
+    """
+
+    def __init__(self, file, d, h, w, dtype = np.uint8, endian:str = 'little', offset:int = 0, depth:int = 1,
+                 prefetch:int = None, roi = None, stride = None):
+        self.file = file
+        self.file_dtype = raw_dtype(dtype, endian)
+        self.dtype = self.file_dtype.newbyteorder('=')
+        self.file_shape = (d, h, w)
+        self.ranges = roi_ranges(self.file_shape, roi, stride) if roi or stride else None
+        self.shape = roi_shape(self.file_shape, roi, stride)
+        self.ndim = 3
+        self.size = int(np.prod(self.shape))
+        self.offset = offset
+        self.depth = max(1, min(depth, self.shape[0]))
+        self.compression = compression_of(file)
+        self.prefetch = (2 if self.compression else 0) if prefetch is None else prefetch
+        check_raw_size(file, d, h, w, self.file_dtype, offset)
+        print(f'stream data shape: {self.shape}, dtype: {self.file_dtype}, slab depth: {self.depth}'
+              + (f', {self.compression}' if self.compression else '') + (f', prefetch {self.prefetch}' if self.prefetch else '')
+              + (f', roi of {self.file_shape}' if self.ranges else ''))
+
+    def _read_slabs(self, num_buffers:int):
+        d, h, w = self.shape
+        buffers = [np.empty((self.depth, h, w), dtype=self.file_dtype) for _ in range(num_buffers)]
+        with open_raw(self.file, self.offset) as f:
+            if self.ranges and self.compression:
+                planes = _iter_region_planes(f, self.file_shape, self.file_dtype, self.ranges, self.file)
+            for i, z0 in enumerate(range(0, d, self.depth)):
+                slab = buffers[i % num_buffers][:min(self.depth, d - z0)]
+                with rawprofile.stage('load'):
+                    if not self.ranges:
+                        read_exact(f, slab, self.file, f' at slab z={z0}')
+                    elif self.compression:
+                        for k in range(len(slab)):
+                            slab[k] = next(planes)[1]
+                    else:
+                        zs, ys, xs = self.ranges
+                        _read_region(f, slab, self.file_shape, (zs[z0:z0 + len(slab)], ys, xs), self.offset)
+                    slab = swap_to_native(slab)
+                rawprofile.count(read=slab.nbytes)
+                yield z0, slab
+
+    def __iter__(self):
+        if self.prefetch:
+            # the consumer holds one slab, the queue `prefetch`, the reader fills one more
+            return iter_prefetch(self._read_slabs(self.prefetch + 2), self.prefetch)
+        return self._read_slabs(1)
+
+def iter_prefetch(items, depth:int = 2):
+    """
+    iterate `items` in a reader thread, up to `depth` items ahead of the consumer.
+
+    numpy file reads release the gil, so the next items are read while the
+    current one is formatted and written. an exception in the reader is
+    raised in the consumer, stopping early stops the reader.
+    """
+    import queue, threading
+
+    q = queue.Queue(maxsize=max(1, depth))
+    done = object()
+    stop = threading.Event()
+
+    def read():
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                q.put((item, None))
+        except BaseException as e:
+            q.put((None, e))
+        q.put((done, None))
+
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+    try:
+        while True:
+            with rawprofile.stage('load'):
+                # the reader is behind when the consumer waits here
+                item, error = q.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+        while thread.is_alive():
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                thread.join(0.01)
+
+def iter_slabs(values, depth:int = 1):
+    # (z0, slab) over a (d, h, w) array, memmap or RawSlabReader, or a volume
+    # computed slab by slab with its own iter_slabs (rawquantize.QuantizedVolume)
+    if isinstance(values, RawSlabReader):
+        yield from values
+        return
+    if hasattr(values, 'iter_slabs'):
+        yield from values.iter_slabs(depth)
+        return
+    mapped = isinstance(values, np.memmap)
+    for z0 in range(0, values.shape[0], depth):
+        slab = values[z0:z0 + depth]
+        if mapped:
+            # paged in by whoever touches it
+            rawprofile.count(read=slab.nbytes)
+        yield z0, slab
+
+def _edge_planes(planes, count, like):
+    # `count` copies of the plane `like` appended to `planes` (edge padding along z)
+    if count <= 0:
+        return planes
+    return np.concatenate([planes, np.repeat(like[None], count, axis=0)])
+
+def iter_halo_slabs(slabs, halo:int):
+    """
+    (z0, ext) over a stream of (z0, slab) with `halo` extra planes on both sides.
+
+    ext[halo:-halo] is the slab, the halo planes come from the neighbouring
+    slabs and repeat the first / last plane at the volume ends. slabs must be
+    at least `halo` deep except the last one. every slab is copied once, so
+    streams that reuse their buffer are fine.
+    """
+    if halo == 0:
+        for z0, slab in slabs:
+            yield z0, slab
+        return
+    pending = None
+    before = None
+    for z0, slab in slabs:
+        slab = np.array(slab)
+        if pending is not None:
+            yield _with_halo(pending, before, slab[:halo], halo)
+            before = np.concatenate([before, pending[1]])[-halo:] if before is not None else pending[1][-halo:]
+        pending = (z0, slab)
+    if pending is not None:
+        yield _with_halo(pending, before, pending[1][:0], halo)
+
+def _with_halo(pending, before, after, halo):
+    z0, core = pending
+    if before is None:
+        before = core[:0]
+    first = before[0] if len(before) else core[0]
+    before = np.concatenate([np.repeat(first[None], halo - len(before), axis=0), before])
+    after = _edge_planes(after, halo - len(after), after[-1] if len(after) else core[-1])
+    return z0, np.concatenate([before, core, after])
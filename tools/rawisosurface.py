@@ -0,0 +1,305 @@
+import os, time
+import numpy as np
+import argparse
+
+from rawio import load_raw_to_np, iter_slabs, parse_size, slab_depth, slab_buffer_count, RawSlabReader, strip_compressed_ext, \
+    parse_roi, parse_stride, roi_shape, parse_dtype, raw_dtype, add_raw_arguments
+from mctable import TRI_TABLE, CORNERS, EDGES, flip_winding, triangle_counts
+import rawprofile
+
+# marching cubes isosurface of a raw volume as a triangle mesh
+#
+# the volume is processed one z slab of cubes at a time: cube indices come from
+# bit operations over the whole slab, triangles from one fancy index into the
+# table, and every edge crossing gets one vertex through a slab local edge id
+# table (edge id = ((z*h + y)*w + x)*3 + axis). vertices on the top plane of a
+# slab are handed to the next slab, so the mesh is welded across slabs. with a
+# rawindex sidecar only the cubes of the bricks that may cross the iso value
+# get cube indices, cube layers without such a brick are not read at all.
+
+def _get_out_file_name(in_file:str, ext:str):
+    dir_name = os.path.dirname(in_file)
+    file_name, _ = os.path.splitext(os.path.basename(strip_compressed_ext(in_file)))
+    return os.path.join(dir_name, f'{file_name}_iso.{ext}')
+
+def _iter_cube_slabs(slabs):
+    # (z0, planes) with one extra plane from the next slab, so planes holds
+    # the cubes z0 .. z0+len(planes)-2. slabs are copied, reused buffers are fine.
+    # a slab not followed by the next planes (a gap in the stream) goes out as it is
+    pending = None
+    for z0, slab in slabs:
+        if pending is not None:
+            if pending[0] + len(pending[1]) == z0:
+                yield pending[0], np.concatenate([pending[1], slab[:1]])
+            elif len(pending[1]) > 1:
+                yield pending
+        pending = (z0, np.array(slab))
+    if pending is not None and len(pending[1]) > 1:
+        yield pending
+
+def _iter_active_slabs(values, depth:int, active):
+    # (z0, slab) of an array, the slabs of iter_slabs with an active cube layer only,
+    # a slab before a skipped one with the plane closing its last cube layer. the
+    # cube slabs are those of the whole volume, so the vertices are numbered the same
+    d = values.shape[0]
+    starts = range(0, d, depth)
+    keep = [active[z0:z0 + depth].any() for z0 in starts]
+    for k, z0 in enumerate(starts):
+        if keep[k]:
+            closing = int(k + 1 < len(keep) and not keep[k + 1])
+            yield z0, values[z0:min(z0 + depth + closing, d)]
+
+def _cube_indices(planes, iso, boxes = None):
+    # bit i of a cube index is set when corner i is below the iso value
+    # boxes: [(z0, z1, y0, y1, x0, x1)] cubes to index, the others are 0 (no triangles)
+    n, h, w = planes.shape[0] - 1, planes.shape[1] - 1, planes.shape[2] - 1
+    if boxes is not None:
+        index = np.zeros((n, h, w), dtype=np.uint8)
+        for z0, z1, y0, y1, x0, x1 in boxes:
+            index[z0:z1, y0:y1, x0:x1] = _cube_indices(planes[z0:z1 + 1, y0:y1 + 1, x0:x1 + 1], iso)
+        return index
+    below = planes < iso
+    index = np.zeros((n, h, w), dtype=np.uint8)
+    bit = np.empty((n, h, w), dtype=np.uint8)
+    for i, (x, y, z) in enumerate(CORNERS):
+        np.left_shift(below[z:z + n, y:y + h, x:x + w], i, out=bit, dtype=np.uint8)
+        index |= bit
+    return index
+
+class IsoSurface:
+    """
+    streaming marching cubes over z slabs of a (d, h, w) volume.
+
+    slab() takes the planes of one cube slab and returns the new vertices
+    (float32, (n, 3) x y z) and the triangles (int64, (m, 3) zero based,
+    global over all slabs so far).
+    """
+
+    def __init__(self, shape, iso:float, flip:bool = False):
+        self.shape = shape
+        self.iso = iso
+        table = flip_winding(TRI_TABLE) if flip else TRI_TABLE
+        self.counts = triangle_counts(table)
+        self.tris = table[:, :15].reshape(256, 5, 3).astype(np.int64)
+        self.num_vertices = 0
+        # global vertex of every x/y edge on the top plane of the previous slab, -1 none
+        self.top = None
+
+    def _edge_offsets(self):
+        # edge id of every cube edge relative to the id of the cube's first corner
+        h, w = self.shape[1:]
+        start = CORNERS[EDGES[:, 0]]
+        return ((start[:, 2] * h + start[:, 1]) * w + start[:, 0]) * 3 + EDGES[:, 1]
+
+    def slab(self, z0:int, planes, boxes = None):
+        # boxes: cube boxes of the slab to index (see _cube_indices), None for all cubes
+        d, h, w = self.shape
+        n = planes.shape[0] - 1
+        index = _cube_indices(planes, self.iso, boxes)
+
+        # triangles: one row per (cube, triangle of its case)
+        cubes = np.flatnonzero(self.counts[index])
+        cases = index.reshape(-1)[cubes]
+        counts = self.counts[cases]
+        cubes = np.repeat(cubes, counts)
+        slot = np.arange(cubes.size) - np.repeat(np.cumsum(counts) - counts, counts)
+        edges = self.tris[np.repeat(cases, counts), slot]
+
+        # cube index in the (n, h-1, w-1) cube grid -> id of its first corner in the (n+1, h, w) grid
+        cz, rest = np.divmod(cubes, (h - 1) * (w - 1))
+        cy, cx = np.divmod(rest, w - 1)
+        ids = ((cz * h + cy) * w + cx) * 3
+        ids = ids[:, None] + self._edge_offsets()[edges]
+
+        # edge id table: one vertex per used edge
+        size = (n + 1) * h * w * 3
+        used = np.zeros(size, dtype=bool)
+        used[ids] = True
+        uniq = np.flatnonzero(used)
+        vertex = np.empty(size, dtype=np.int64)
+        new = np.ones(uniq.size, dtype=bool)
+        if self.top is not None:
+            bottom = uniq[:np.searchsorted(uniq, h * w * 3)]
+            shared = self.top[bottom]
+            vertex[bottom] = shared
+            new[:bottom.size] = shared < 0
+        fresh = uniq[new]
+        vertex[fresh] = np.arange(self.num_vertices, self.num_vertices + fresh.size)
+        self.num_vertices += fresh.size
+
+        # vertex positions, interpolated along the edge
+        p, axis = np.divmod(fresh, 3)
+        z, p = np.divmod(p, h * w)
+        y, x = np.divmod(p, w)
+        # 32 bit ints and float64 interpolate in float64, float32 would merge close values
+        work = np.float64 if planes.dtype.itemsize > 2 and planes.dtype.newbyteorder('=') != np.float32 else np.float32
+        v0 = planes[z, y, x].astype(work)
+        v1 = planes[z + (axis == 2), y + (axis == 1), x + (axis == 0)].astype(work)
+        t = (work(self.iso) - v0) / (v1 - v0)
+        vertices = np.empty((fresh.size, 3), dtype=np.float32)
+        vertices[:, 0], vertices[:, 1], vertices[:, 2] = x, y, z + z0
+        vertices[np.arange(fresh.size), axis] += t
+
+        # hand the top plane over to the next slab
+        self.top = np.full(h * w * 3, -1, dtype=np.int64)
+        top = uniq[np.searchsorted(uniq, n * h * w * 3):]
+        self.top[top - n * h * w * 3] = vertex[top]
+        return vertices, vertex[ids]
+
+def _cube_boxes(index, bricks, z0:int, n:int):
+    # cube boxes (slab relative) of the selected bricks over the cube layers z0 .. z0+n-1
+    d, h, w = index.shape
+    b = index.brick
+    boxes = []
+    for bz in range(z0 // b, (z0 + n - 1) // b + 1):
+        za, zb = max(z0, bz * b) - z0, min(z0 + n, (bz + 1) * b) - z0
+        boxes += [(za, zb, y0, min(y1, h - 1), x0, min(x1, w - 1)) for y0, y1, x0, x1 in index.boxes(bricks, bz)]
+    return boxes
+
+def extract_isosurface(values, iso:float, flip:bool = False, depth:int = 16, bricks = None):
+    # (vertices, triangles) of the whole volume, slab by slab
+    # bricks: (BrickIndex, index.iso_bricks(iso)), only the cubes of those bricks are
+    # indexed, cube layers without one are skipped
+    if values.ndim != 3:
+        raise ValueError(f'isosurface needs a 3d volume, got shape {values.shape}')
+    active = bricks[0].planes(bricks[1])[:-1] if bricks is not None else None
+    surface = IsoSurface(values.shape, iso, flip)
+    vertices, triangles = [], []
+    if active is not None and not isinstance(values, RawSlabReader):
+        slabs = _iter_active_slabs(values, depth, active)
+    else:
+        slabs = iter_slabs(values, depth)
+    next_z0 = 0
+    for z0, planes in _iter_cube_slabs(slabs):
+        n = len(planes) - 1
+        if active is not None and not active[z0:z0 + n].any():
+            continue
+        if z0 != next_z0:
+            # no vertices to weld with across skipped layers
+            surface.top = None
+        boxes = _cube_boxes(bricks[0], bricks[1], z0, n) if bricks is not None else None
+        v, t = surface.slab(z0, planes, boxes)
+        vertices.append(v)
+        triangles.append(t)
+        next_z0 = z0 + n
+    if not vertices:
+        return np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.int64)
+    return np.concatenate(vertices), np.concatenate(triangles)
+
+# writers
+
+_CHUNK = 1 << 20
+
+def write_tec_ascii(vertices, triangles, file_path:str):
+    # FETRIANGLE zone, POINT packed nodes then one 1 based triangle per line
+    from rawtotec import _to_text_tokens, _join_tokens
+
+    print(f'write to file:{file_path}')
+    with rawprofile.open_file(file_path, "w") as f:
+        f.write(f'TITLE = "isosurface"\n')
+        f.write(f'VARIABLES = "X", "Y", "Z"\n')
+        f.write(f'ZONE T="Isosurface" N={len(vertices)} E={len(triangles)} DATAPACKING=POINT ZONETYPE=FETRIANGLE\n')
+        node_seps = (ord(' '), ord(' '), ord('\n'))
+        for i in range(0, len(vertices), _CHUNK):
+            chunk = vertices[i:i + _CHUNK]
+            f.write(_join_tokens([_to_text_tokens(chunk[:, k]) for k in range(3)], node_seps))
+        for i in range(0, len(triangles), _CHUNK):
+            chunk = triangles[i:i + _CHUNK] + 1
+            f.write(_join_tokens([_to_text_tokens(chunk[:, k]) for k in range(3)], node_seps))
+
+def write_plt(vertices, triangles, file_path:str):
+    # binary plt v112 FETRIANGLE zone through the numpy writer
+    from pltwriter import PltFileWriter, PltFEZone, ZONETYPE_FETRIANGLE
+
+    print(f'write to file:{file_path}')
+    zone = PltFEZone("Isosurface", len(vertices), len(triangles), ZONETYPE_FETRIANGLE, [np.float32] * 3)
+    with PltFileWriter(file_path, "isosurface", ["X", "Y", "Z"], [zone]) as f:
+        for k in range(3):
+            f.zone_var_write(vertices[:, k])
+        for i in range(0, len(triangles), _CHUNK):
+            f.zone_connectivity_write(triangles[i:i + _CHUNK])
+
+def write_ply_binary(vertices, triangles, file_path:str):
+    # binary_little_endian mesh, float x y z vertices and uchar/int triangle lists
+    face = np.dtype([('n', 'u1'), ('v', '<i4', (3,))])
+
+    print(f'write to file:{file_path}')
+    with rawprofile.open_file(file_path, "wb") as f:
+        f.write(b'ply\n')
+        f.write(b'format binary_little_endian 1.0\n')
+        f.write(b'comment isosurface\n')
+        f.write(f'element vertex {len(vertices)}\n'.encode())
+        for name in 'xyz':
+            f.write(f'property float {name}\n'.encode())
+        f.write(f'element face {len(triangles)}\n'.encode())
+        f.write(b'property list uchar int vertex_indices\n')
+        f.write(b'end_header\n')
+        f.write(np.ascontiguousarray(vertices, dtype='<f4'))
+        for i in range(0, len(triangles), _CHUNK):
+            chunk = triangles[i:i + _CHUNK]
+            records = np.empty(len(chunk), dtype=face)
+            records['n'] = 3
+            records['v'] = chunk
+            f.write(records)
+
+WRITERS = {"tec": write_tec_ascii, "plt": write_plt, "ply": write_ply_binary}
+
+def main(file, d, h, w, iso:float, format:str = "plt", out:str = None, dtype = np.uint8, flip:bool = False,
+         offset:int = 0, mmap:bool = True, max_memory:int = None, roi = None, stride = None, use_index:bool = True,
+         endian:str = 'little', index_path:str = None):
+    if format not in WRITERS:
+        raise ValueError(f'format not known:{format}, must be one of {list(WRITERS)}')
+    bricks = None
+    if use_index and not (roi or stride):
+        from rawindex import BrickIndex
+        index = BrickIndex.find(file, (d, h, w), raw_dtype(dtype, endian), offset, index_path)
+        if index is not None:
+            bricks = (index, index.iso_bricks(iso))
+            layers = index.planes(bricks[1])[:-1]
+            print(f'index: {np.count_nonzero(bricks[1])} of {bricks[1].size} bricks, '
+                  f'{np.count_nonzero(layers)} of {layers.size} cube layers may cross {iso}')
+    shape = roi_shape((d, h, w), roi, stride)
+    if max_memory:
+        # cube indices, edge ids and the bool/float temporaries cost about 64 bytes per voxel
+        depth = slab_depth(shape, slab_buffer_count(file) * np.dtype(dtype).itemsize + 64, max_memory)
+        values = RawSlabReader(file, d, h, w, dtype, endian, offset=offset, depth=depth, roi=roi, stride=stride)
+    else:
+        depth = 16
+        values = load_raw_to_np(file, d, h, w, dtype, endian, offset=offset, mmap=mmap, roi=roi, stride=stride)
+    tic = time.time()
+    with rawprofile.stage('transform'):
+        vertices, triangles = extract_isosurface(values, iso, flip, depth, bricks)
+    toc = time.time()
+    print(f'iso {iso}: {len(vertices)} vertices, {len(triangles)} triangles, {(toc-tic)*1000:.0f} ms, '
+          f'{values.size / max(toc - tic, 1e-9) / 1e6:.1f} M voxels/s')
+    with rawprofile.stage('format'):
+        WRITERS[format](vertices, triangles, out or _get_out_file_name(file, format))
+
+def add_arguments(parser):
+    add_raw_arguments(parser)
+    parser.add_argument('-i', '--iso', type=float, required=True, help="iso value")
+    parser.add_argument('-f', '--format', type=str, default="plt", help="tec ascii, plt binary or ply binary FETRIANGLE mesh")
+    parser.add_argument('-o', '--out', type=str, default=None, help="out file name, default <file>_iso.<format>")
+    parser.add_argument('--flip', action="store_true", default=False, help="flip the triangle winding")
+    parser.add_argument('--no-index', action="store_true", default=False, help="ignore the <file>.index.npz sidecar of rawindex")
+    parser.add_argument('--index', type=str, default=None, help="sidecar of rawindex -o, default <file>.index.npz")
+    rawprofile.add_argument(parser)
+
+def run(args, parser):
+    if args.index and args.no_index:
+        parser.error('--index and --no-index exclude each other')
+    with rawprofile.profile(args.profile, 'rawisosurface'):
+        main(args.file, args.depth, args.height, args.width, args.iso, args.format, args.out,
+             parse_dtype(args.type), args.flip,
+             offset=args.offset, mmap=not args.no_mmap,
+             max_memory=parse_size(args.max_memory) if args.max_memory else None,
+             roi=parse_roi(args.roi) if args.roi else None, stride=parse_stride(args.stride) if args.stride else None,
+             use_index=not args.no_index, endian=args.endian, index_path=args.index)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(conflict_handler="resolve")
+    add_arguments(parser)
+    run(parser.parse_args(), parser)
+
+    # py .\rawisosurface.py -d 64 -h 64 -w 64 -i 40 D:/data/dataset/scivis/foot_64x64x64_uint8.raw
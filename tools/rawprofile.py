@@ -0,0 +1,283 @@
+import os, sys, time
+import json
+import threading
+import contextlib
+
+# opt-in instrumentation of the tools (--profile)
+#
+# the tools wrap their work in stage(name) blocks: load (reading and
+# decompressing raw data), transform (downsample, threshold, quantize, marching
+# cubes, ...), format (numbers to text or records) and write (file writes,
+# libtecio calls). stages nest, a block only counts its own time, the time of
+# an inner block goes to the inner stage, so the stage totals add up to the
+# run (minus the untracked rest, other_seconds). blocks of other threads
+# (prefetch readers) overlap the run and are reported as '<stage> (thread)',
+# the wait of the consumer for them is its load. slabs of a memmap are paged
+# in by whatever touches them first, usually format, stream with --max-memory
+# (RawSlabReader) to see the reads as load. worker processes of a pool are
+# not profiled, their time is in the block that waits for them, rawbatch and
+# rawbench collect a report in every job process and merge it into theirs.
+#
+# bytes read are counted where the raw data is read (memmap slabs when they are
+# handed out), bytes written by the
+# files opened with open_file and by the libtecio files at close. peak memory
+# is the tracemalloc peak (python and numpy allocations, the tracking slows
+# allocation heavy code a little) and the peak rss. on linux the rss high water
+# mark (VmHWM) is reset when a run starts, so a job of a rawbatch worker or of
+# rawtool run-jobs reports its own peak ("peak_rss_scope": "run"). elsewhere
+# it is resource.getrusage of the whole process so far, earlier jobs of the
+# process included ("peak_rss_scope": "process", none on windows).
+#
+# the report is one json line appended to the --profile file, or a chrome
+# trace event file (chrome://tracing, perfetto) with one complete event per
+# block when the name ends with .trace.json. with profiling off stage() is a
+# shared null context and open_file is open.
+
+TRACE_SUFFIX = '.trace.json'
+MAX_EVENTS = 200000
+
+_profiler = None
+_null = contextlib.nullcontext()
+_end = object()
+
+class _Frame:
+    __slots__ = ('name', 'start', 'resume', 'own', 'args')
+
+    def __init__(self, name, now, args):
+        self.name, self.start, self.resume, self.own, self.args = name, now, now, 0.0, args
+
+class Profiler:
+    """
+    stage totals, byte counts and trace events of one run.
+    """
+
+    def __init__(self, tool:str, trace:bool = False):
+        self.tool = tool
+        self.trace = trace
+        self.stages = {}            # name -> [own seconds, calls]
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.events = []
+        self.dropped_events = 0
+        self.extra = {}             # more report entries of the tool
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.thread = threading.get_ident()
+        self.start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.rss_scope = "run" if reset_peak_rss() else "process"
+
+    def _stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def stage(self, name:str, **args):
+        stack = self._stack()
+        now = time.perf_counter()
+        if stack:
+            stack[-1].own += now - stack[-1].resume
+        frame = _Frame(name, now, args)
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            stack.pop()
+            frame.own += now - frame.resume
+            if stack:
+                stack[-1].resume = now
+            self._record(frame, now)
+
+    def _record(self, frame, now):
+        # blocks of other threads overlap the run, they are kept apart
+        name = frame.name if threading.get_ident() == self.thread else f'{frame.name} (thread)'
+        with self.lock:
+            total = self.stages.setdefault(name, [0.0, 0])
+            total[0] += frame.own
+            total[1] += 1
+            if not self.trace:
+                return
+            if len(self.events) >= MAX_EVENTS:
+                self.dropped_events += 1
+                return
+            # perf_counter is one clock for all processes, traces of workers can be merged
+            self.events.append(dict(name=frame.name, ph='X', pid=os.getpid(), tid=threading.get_ident(),
+                                    ts=frame.start * 1e6, dur=(now - frame.start) * 1e6,
+                                    **({'args': frame.args} if frame.args else {})))
+
+    def add_events(self, events):
+        # trace events of another profiler, e.g. of a worker process
+        with self.lock:
+            room = max(MAX_EVENTS - len(self.events), 0)
+            self.events += events[:room]
+            self.dropped_events += len(events) - len(events[:room])
+
+    def count(self, read:int = 0, written:int = 0):
+        with self.lock:
+            self.bytes_read += int(read)
+            self.bytes_written += int(written)
+
+    def report(self):
+        import tracemalloc
+        seconds = time.perf_counter() - self.start
+        staged = sum(s for name, (s, _) in self.stages.items() if not name.endswith(' (thread)'))
+        result = {
+            "tool": self.tool,
+            "argv": sys.argv[1:],
+            "time": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "seconds": seconds,
+            "cpu_seconds": time.process_time() - self.cpu_start,
+            "stages": {name: {"seconds": s, "calls": n} for name, (s, n) in self.stages.items()},
+            "other_seconds": max(seconds - staged, 0.0),
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "tracemalloc_peak_mb": tracemalloc.get_traced_memory()[1] / 2**20 if tracemalloc.is_tracing() else None,
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_rss_scope": self.rss_scope,
+        }
+        if self.dropped_events:
+            result["dropped_events"] = self.dropped_events
+        result.update(self.extra)
+        return result
+
+def reset_peak_rss():
+    # reset the rss high water mark of this process to its current rss, false when not possible (not linux)
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb():
+    # rss high water mark of this process since reset_peak_rss, else since it started
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 1024
+
+def enabled():
+    return _profiler is not None
+
+def stage(name:str, **args):
+    # a timed block of the current run, nothing when profiling is off
+    return _profiler.stage(name, **args) if _profiler is not None else _null
+
+def count(read:int = 0, written:int = 0):
+    if _profiler is not None:
+        _profiler.count(read, written)
+
+def current():
+    # the Profiler of the run, None when profiling is off
+    return _profiler
+
+def iter_stage(items, name:str = 'load'):
+    # items of an iterator, each next() timed as `name`
+    if _profiler is None:
+        yield from items
+        return
+    items = iter(items)
+    while True:
+        with _profiler.stage(name):
+            item = next(items, _end)
+        if item is _end:
+            return
+        yield item
+
+class _ProfiledFile:
+    # a file whose writes are timed as the write stage and counted
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, data):
+        with stage('write'):
+            n = self.f.write(data)
+        count(written=memoryview(data).nbytes if not isinstance(data, str) else len(data))
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with stage('write'):
+            self.f.close()
+
+    def __iter__(self):
+        return iter(self.f)
+
+def open_file(file, mode:str = 'r', **kwargs):
+    # open, with timed and counted writes when profiling
+    f = open(file, mode, **kwargs)
+    if _profiler is None or not any(c in mode for c in 'wax+'):
+        return f
+    return _ProfiledFile(f)
+
+def write_report(profiler, path:str):
+    report = profiler.final
+    if path.endswith(TRACE_SUFFIX):
+        # one complete event per block, the summary as trace metadata
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": profiler.events, "displayTimeUnit": "ms", "otherData": report}, f)
+    else:
+        with open(path, 'a') as f:
+            f.write(json.dumps(report) + '\n')
+    print(f'profile: {path}, {report["seconds"]:.3f} s, ' + ', '.join(
+        f'{name} {s["seconds"]:.3f} s' for name, s in report["stages"].items()))
+    return report
+
+@contextlib.contextmanager
+def collect(tool:str, trace:bool = False):
+    """
+    profile the block, yields the Profiler. its report is in .final after
+    the block, also when the block exits with an error or sys.exit.
+    """
+    global _profiler
+    import tracemalloc
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.start()
+    _profiler = profiler = Profiler(tool, trace)
+    try:
+        yield profiler
+    finally:
+        profiler.final = profiler.report()
+        _profiler = None
+        if not tracing:
+            tracemalloc.stop()
+
+@contextlib.contextmanager
+def profile(path:str, tool:str):
+    # profile the block into path, the block runs as is when path is None
+    if not path:
+        yield None
+        return
+    profiler = None
+    try:
+        with collect(tool, path.endswith(TRACE_SUFFIX)) as profiler:
+            yield profiler
+    finally:
+        if profiler is not None:
+            write_report(profiler, path)
+
+def add_argument(parser):
+    parser.add_argument('--profile', type=str, default=None,
+                        help=f"append stage timings, bytes and peak memory as a json line to this file, "
+                             f"or write a chrome trace when it ends with {TRACE_SUFFIX}")
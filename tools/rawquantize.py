@@ -0,0 +1,102 @@
+import numpy as np
+
+from rawio import iter_slabs
+import rawprofile
+
+# quantized output: values stored as uint8 / int16 codes plus a scale and offset
+#
+# value ~ code * scale + offset, code = rint((value - offset) / scale) clipped
+# to the code type. the range lo..hi maps onto all codes of the type, so inside
+# it the error is at most scale / 2, values outside a given range clip to the
+# end codes. nan voxels get the lowest code. the range comes from the caller
+# (--quantize-range), a rawindex sidecar, or one streaming min/max pass.
+# every slab is converted with float64 temporaries (16 bytes per voxel), the
+# largest error is measured on the way and reported after the write.
+
+QUANTIZE_TYPES = {'uint8': np.uint8, 'int16': np.int16}
+
+def parse_range(text):
+    # "lo,hi" -> (lo, hi)
+    try:
+        lo, hi = (float(v) for v in str(text).split(','))
+    except ValueError:
+        raise ValueError(f'range not valid:{text}, must be lo,hi')
+    if not lo <= hi:
+        raise ValueError(f'range not valid:{text}, lo must not be above hi')
+    return lo, hi
+
+def volume_range(values):
+    # (min, max) of the non nan values, one pass over the slabs
+    lo, hi = np.inf, -np.inf
+    for z0, slab in iter_slabs(values, 16):
+        with rawprofile.stage('transform'):
+            finite = slab[~np.isnan(slab)] if slab.dtype.kind == 'f' else slab
+            if finite.size:
+                lo, hi = min(lo, float(finite.min())), max(hi, float(finite.max()))
+    return (lo, hi) if lo <= hi else (0.0, 0.0)
+
+def quantize_params(lo:float, hi:float, dtype):
+    # (scale, offset) mapping lo..hi onto the codes of dtype
+    info = np.iinfo(dtype)
+    scale = (hi - lo) / (int(info.max) - int(info.min)) or 1.0
+    return scale, lo - int(info.min) * scale
+
+def quantize_slab(slab, scale:float, offset:float, dtype):
+    """
+    Codes of one slab.
+
+    Returns:
+    - (codes of dtype, largest |code * scale + offset - value| over the non nan voxels)
+    """
+    info = np.iinfo(dtype)
+    values = np.asarray(slab, dtype=np.float64)
+    work = values - offset
+    work /= scale
+    np.rint(work, out=work)
+    np.clip(work, info.min, info.max, out=work)
+    nan = np.isnan(work)
+    work[nan] = info.min
+    codes = work.astype(dtype)
+    work *= scale
+    work += offset
+    work -= values
+    np.abs(work, out=work)
+    return codes, float(np.max(work, where=~nan, initial=0.0))
+
+class QuantizedVolume:
+    """
+    a volume read as the codes of another one, slab by slab.
+
+    behaves like a read only (d, h, w) volume of `dtype` for the writers
+    (shape, ndim, size, dtype, iter_slabs), nothing is converted up front.
+    max_error is the largest error of the slabs converted so far.
+    """
+
+    def __init__(self, values, dtype = np.uint8, value_range = None):
+        self.values = values
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in [np.dtype(t) for t in QUANTIZE_TYPES.values()]:
+            raise ValueError(f'quantize type not known:{dtype}, must be one of {list(QUANTIZE_TYPES)}')
+        self.shape = values.shape
+        self.ndim = values.ndim
+        self.size = values.size
+        self.source_dtype = values.dtype
+        self.range = tuple(value_range) if value_range is not None else volume_range(values)
+        self.scale, self.offset = quantize_params(*self.range, self.dtype)
+        self.max_error = 0.0
+
+    def iter_slabs(self, depth:int = 1):
+        for z0, slab in iter_slabs(self.values, depth):
+            with rawprofile.stage('transform'):
+                codes, error = quantize_slab(slab, self.scale, self.offset, self.dtype)
+            self.max_error = max(self.max_error, error)
+            yield z0, codes
+
+    def aux_data(self):
+        # variable aux data recorded next to the codes, value = code * SCALE + OFFSET
+        return {"SCALE": repr(self.scale), "OFFSET": repr(self.offset), "SOURCE_TYPE": self.source_dtype.name}
+
+    def report(self):
+        lo, hi = self.range
+        return (f'quantize: {self.source_dtype.name} -> {self.dtype.name}, range [{lo}, {hi}], '
+                f'scale {self.scale}, offset {self.offset}, max abs error {self.max_error} (bound {self.scale / 2})')
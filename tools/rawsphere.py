@@ -1,9 +1,9 @@
 import time
 import numpy as np
-import struct
 import argparse
 
-import numpy as np
+import rawgen
+from rawgen import generate
 
 def gen_sphere_to_np(d, h, w, radius, center, dtype=np.uint8):
     """
@@ -17,61 +17,24 @@ def gen_sphere_to_np(d, h, w, radius, center, dtype=np.uint8):
     - center: A tuple (z, y, x) representing the center of the sphere.
 
     Returns:
-    - A 3D numpy array of type uint8, with values rounded up.
+    - A 3D numpy array of type dtype, uint8 values are floored.
     """
-    # Create coordinate grids for z, y, x
-    z = np.arange(d, dtype=np.float32)[:, None, None]
-    y = np.arange(h, dtype=np.float32)[None, :, None]
-    x = np.arange(w, dtype=np.float32)[None, None, :]
-    
-    # Calculate squared distances to avoid unnecessary sqrt initially
-    dist_sq = (z - center[0])**2 + (y - center[1])**2 + (x - center[2])**2
-    
-    # Initialize the 3D array with zeros
-    distance_array = np.zeros((d, h, w), dtype=dtype)
-    
-    # Calculate distances within the radius and scale appropriately
-    mask_within_radius = dist_sq <= radius**2
-    # distance_values = radius - np.sqrt(dist_sq[mask_within_radius])
-    distance_values = np.where(mask_within_radius, radius - np.sqrt(dist_sq), 0)
-    
-    # Apply ceiling and cast to uint8, then assign to the distance_array
-    if dtype == np.uint8:
-        distance_array[mask_within_radius] = np.floor(distance_values).astype(np.uint8)
-    else:
-        distance_array = distance_values
-    
-    return distance_array
-
-
-# 0.9ms
-def write_np_to_raw_fast2(file, data, factor, dtype=np.uint8):
-    d, h, w = data.shape
-    newarray = data[::factor, ::factor, ::factor]
-    with open(file,'wb') as f:
-        byteArray = bytearray(newarray)
-        f.write(byteArray)
+    # evaluated per z slab in float32, see rawgen.py
+    return generate("sphere", d, h, w, dtype, radius=radius, center=center)
 
-def main(out, d, h, w, dtype = np.uint8):
+def main(out, d, h, w, dtype = np.uint8, threads:int = None, seed:int = 0, noise:float = 0.0):
 
-    factor = 1
-    values = gen_sphere_to_np(d, h, w, int(w/4), (int(w/2), int(h/2), int(d/2)), dtype)
     tic = time.time()
-    write_np_to_raw_fast2(out, values, factor, dtype)
+    # straight into a memmap of the out file, no full size temporaries
+    generate("sphere", d, h, w, dtype, out, threads, seed, noise, radius=int(w/4), center=(int(w/2), int(h/2), int(d/2)))
     toc = time.time()
     print(f'Time:{(toc-tic)*1000} ms')
 
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(conflict_handler="resolve")
-    parser.add_argument('-o', '--out', type=str, required=True, help="out file name")
-    parser.add_argument('-w', '--width', type=int, default=64, help="width")
-    parser.add_argument('-h', '--height', type=int, default=64, help="height")
-    parser.add_argument('-d', '--depth', type=int, default=64, help="depth")
-    parser.add_argument('-t', '--type', type=str, default="byte", help="data type, byte, float")
-    args = parser.parse_args()
-    
-    main(args.out, args.depth, args.height, args.width, np.uint8 if args.type=="byte" else np.float32)
+    rawgen.add_arguments(parser, kind="sphere")
+    rawgen.run(parser.parse_args(), parser, 'rawsphere')
 
 
     # py .\rawsphere.py -o sphere_64x64x64_uint8.raw
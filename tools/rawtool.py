@@ -0,0 +1,194 @@
+import os, sys, time
+import json
+import shlex
+import argparse
+import importlib
+
+# one command line for the tools: py .\rawtool.py <command> [options]
+#
+# every command is the cli of a tool module, which has add_arguments(parser)
+# and run(args, parser). the module, and numpy with it, is imported only when
+# its command runs, `rawtool.py --help` and the dispatch import nothing heavy.
+# the modules stay scripts of their own, `py .\rawtotec.py ...` is the same as
+# `py .\rawtool.py convert ...`.
+#
+# run-jobs runs a json lines file of commands in this one process, one object
+# per line with the command and its options, by option name (the dest of the
+# cli, max_memory for --max-memory) and / or as command line args:
+#     {"command": "index", "file": "foot.raw.gz", "width": 256, "height": 256, "depth": 256}
+#     {"command": "convert", "args": "foot.raw.gz -d 256 -h 256 -w 256 -f plt --threshold 40"}
+# paths are relative to the current directory, as on the command line. the
+# interpreter and imports are paid once, and a volume loaded whole (mapped,
+# --no-mmap or decompressed) is kept for the later jobs that name the same file
+# with the same size, type and offset (rawio.VolumeCache), so a compressed
+# input is decompressed once for all its jobs. a volume is dropped after the
+# last job that names it. a failing job is reported and the others go on.
+
+COMMANDS = {
+    "convert": ("rawtotec", "raw volume to tec, plt, szplt or ply"),
+    "downsample": ("rawdownsample", "downsample a raw volume, or write a 2x pyramid"),
+    "generate": ("rawgen", "synthetic sphere, cube or sincsphere volumes"),
+    "isosurface": ("rawisosurface", "marching cubes triangle mesh of an iso value"),
+    "index": ("rawindex", "per brick min / max sidecar of a raw volume"),
+    "read": ("tecreader", "read a tec ascii file, write a variable as raw"),
+    "batch": ("rawbatch", "convert many raw files in a process pool"),
+    "bench": ("rawbench", "benchmark of the loaders and writers"),
+}
+
+def command_parser(command:str):
+    # (module, parser) of a command, imports the module
+    if command not in COMMANDS:
+        raise ValueError(f'command not known:{command}, must be one of {list(COMMANDS)}')
+    module_name, description = COMMANDS[command]
+    module = importlib.import_module(module_name)
+    parser = argparse.ArgumentParser(prog=f'rawtool.py {command}', description=description, conflict_handler="resolve")
+    module.add_arguments(parser)
+    return module, parser
+
+def run(argv):
+    # run one command line, ['convert', 'foot.raw', ...], returns the exit code
+    module, parser = command_parser(argv[0])
+    return module.run(parser.parse_args(argv[1:]), parser) or 0
+
+def job_argv(parser, job:dict):
+    """
+    command line args of a job object, after its "args".
+
+    keys are the dests of the parser options, a true value of a flag adds the
+    flag, a list adds all its items, positionals are added in their order.
+    """
+    args = job.get("args", [])
+    argv = shlex.split(args) if isinstance(args, str) else [str(a) for a in args]
+    actions = {action.dest: action for action in parser._actions if action.dest != 'help'}
+    positionals = []
+    for key, value in job.items():
+        if key in ("command", "args"):
+            continue
+        if key not in actions:
+            raise ValueError(f'option not known:{key}, must be one of {list(actions)}')
+        action = actions[key]
+        values = [str(v) for v in value] if isinstance(value, list) else [str(value)]
+        if not action.option_strings:
+            positionals += values
+        elif action.nargs == 0:
+            if value:
+                argv.append(action.option_strings[-1])
+        else:
+            argv += [action.option_strings[-1], *values]
+    return positionals + argv
+
+def load_jobs(path:str):
+    # [(line number, job object, error)] of a json lines file, '#' lines are
+    # comments, a line that is not a json object has no job and fails alone
+    jobs = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                job = json.loads(line)
+                if not isinstance(job, dict):
+                    raise TypeError(f'a job is a json object, not {type(job).__name__}')
+                jobs.append((number, job, None))
+            except (ValueError, TypeError) as e:
+                jobs.append((number, None, f'{type(e).__name__}: {e}'))
+    return jobs
+
+def run_jobs(path:str, report:str = None):
+    """
+    run the jobs of a json lines file in this process, see the header.
+
+    returns the report: per job line, command, status, seconds and error,
+    the volumes reused from earlier jobs and the totals.
+    """
+    from rawio import VolumeCache, use_volume_cache
+
+    jobs = load_jobs(path)
+    tic = time.perf_counter()
+    # every job is parsed up front, a job with bad options fails without a
+    # partial run and the input files of the later jobs are known to the cache
+    parsed = []
+    for number, job, error in jobs:
+        if error:
+            parsed.append(({"line": number, "command": None, "status": "failed", "error": error}, None, None, None))
+            continue
+        entry = {"line": number, "command": job.get("command")}
+        try:
+            module, parser = command_parser(job.get("command"))
+            entry["argv"] = job_argv(parser, job)
+            args = parser.parse_args(entry["argv"])
+        except (ValueError, ImportError) as e:
+            entry.update(status="failed", error=f'{type(e).__name__}: {e}')
+            module = parser = args = None
+        except SystemExit as e:
+            # argparse printed the usage error
+            entry.update(status="failed", error=f'bad options, exit {e.code}')
+            module = parser = args = None
+        parsed.append((entry, module, parser, args))
+    files = [os.path.abspath(args.file) if getattr(args, 'file', None) else None for _, _, _, args in parsed]
+
+    cache = VolumeCache()
+    with use_volume_cache(cache):
+        for i, (entry, module, parser, args) in enumerate(parsed):
+            cache.keep(f for f in files[i:] if f)
+            if module is not None:
+                hits = cache.hits
+                job_tic = time.perf_counter()
+                try:
+                    code = module.run(args, parser) or 0
+                    entry.update(status="ok" if code == 0 else "failed", exit_code=code)
+                except SystemExit as e:
+                    # parser.error of a check in run, or a tool that exits
+                    entry.update(status="ok" if not e.code else "failed", exit_code=e.code or 0)
+                except Exception as e:
+                    entry.update(status="failed", error=f'{type(e).__name__}: {e}')
+                entry.update(seconds=time.perf_counter() - job_tic, reused=cache.hits - hits)
+            print(f'[{i + 1}/{len(parsed)}] {entry["status"]} {entry["command"]} line {entry["line"]} '
+                  f'{entry.get("seconds", 0):.2f}s{" reused" if entry.get("reused") else ""} {entry.get("error", "")}', flush=True)
+        cache.keep([])
+    entries = [entry for entry, _, _, _ in parsed]
+    seconds = time.perf_counter() - tic
+    ok = sum(1 for e in entries if e["status"] == "ok")
+    result = {
+        "jobs_file": path,
+        "jobs": len(entries),
+        "ok": ok,
+        "failed": len(entries) - ok,
+        "reused": cache.hits,
+        "seconds": seconds,
+        "entries": entries,
+    }
+    if report:
+        with open(report, "w") as f:
+            json.dump(result, f, indent=2)
+    print(f'{ok}/{len(entries)} ok, {cache.hits} volumes reused, {seconds:.1f}s' + (f', report: {report}' if report else ''))
+    return result
+
+def main(argv = None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    commands = '\n'.join(f'  {name:<12}{description}' for name, (_, description) in COMMANDS.items())
+    parser = argparse.ArgumentParser(prog='rawtool.py', formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     description='raw volume tools, `rawtool.py <command> --help` for the options of a command',
+                                     epilog=f'commands:\n{commands}\n  {"run-jobs":<12}run a json lines file of commands in one process')
+    parser.add_argument('command', choices=[*COMMANDS, "run-jobs"], metavar='command')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="options of the command")
+    if not argv or argv[0] in ('-h', '--help'):
+        parser.print_help()
+        return 0
+    args = parser.parse_args(argv[:1])
+    if args.command == "run-jobs":
+        jobs_parser = argparse.ArgumentParser(prog='rawtool.py run-jobs', description='run a json lines file of commands in one process')
+        jobs_parser.add_argument('jobs', help="json lines file, one command per line")
+        jobs_parser.add_argument('-r', '--report', type=str, default=None, help="json report path")
+        jobs_args = jobs_parser.parse_args(argv[1:])
+        result = run_jobs(jobs_args.jobs, jobs_args.report)
+        return 1 if result["failed"] else 0
+    return run(argv)
+
+if __name__ == "__main__":
+
+    sys.exit(main())
+
+    # py .\rawtool.py convert D:/data/dataset/scivis/foot_64x64x64_uint8.raw -d 64 -h 64 -w 64 -f plt
+    # py .\rawtool.py run-jobs jobs.jsonl -r jobs_report.json
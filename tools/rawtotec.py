@@ -1,138 +1,171 @@
 import os, sys, time
 import numpy as np
-import struct
 import argparse
 
-def load_uint8_raw_to_array(file, d, h, w):
-    element_count = w * h * d
-    size = element_count
-    with open(file, mode='rb') as file: # b for binary read
-        file_content = file.read(size) # bytes like array
-        byte_array = struct.unpack("B" * element_count, file_content) # unpack to parse binary to uint8 array
-    return byte_array
-
-def load_raw_to_np(file, d, h, w, dtype = np.uint8):
-    element_count = w * h * d
-    size = element_count * np.dtype(dtype).itemsize
-    data_array = np.fromfile(file, dtype, element_count)
-    data_array = data_array.reshape((d, h, w))
-    print(f'load data shape: {data_array.shape}, dtype: {data_array.dtype}')
-    return data_array
+from rawio import load_raw_to_np, iter_slabs, iter_prefetch, parse_size, slab_depth, slab_buffer_count, RawSlabReader, \
+    strip_compressed_ext, parse_roi, parse_stride, roi_shape, parse_dtype, raw_dtype, add_raw_arguments
+from rawquantize import parse_range
+from rawderive import parse_derive
+import rawprofile
 
 def _get_out_file_name(in_file:str, ext:str):
     # path = os.path(in_file)
-    path = in_file
+    path = strip_compressed_ext(in_file)
     dir_name = os.path.dirname(path)
     file_name_ext = os.path.basename(path)
     file_name, _ = os.path.splitext(file_name_ext)
     return os.path.join(dir_name, f'{file_name}.{ext}')
 
-def write_np_to_tec_ascii(values, file_path:str, target_ndim:int, block:bool):
+def _to_text_tokens(values):
+    # bulk number -> text, same text as f'{v}' on the numpy scalar
+    # float scalars format through python float repr, so go through float64
+    values = np.asarray(values)
+    if values.dtype.itemsize == 1 and values.dtype.kind in 'iu':
+        # small ints: look the text up instead of formatting every voxel
+        info = np.iinfo(values.dtype)
+        table = np.arange(info.min, info.max + 1).astype('S')
+        return table[values.reshape(-1).astype(np.int16) - info.min]
+    if values.dtype.kind == 'f':
+        # every distinct value once, python's repr is faster than numpy's dragon4.
+        # distinct by the bits, so -0.0 keeps its sign
+        flat = np.ascontiguousarray(values).reshape(-1)
+        bits, inverse = np.unique(flat.view(f'u{flat.itemsize}'), return_inverse=True)
+        text = list(map(repr, bits.view(flat.dtype).astype(np.float64).tolist()))
+        return np.array(text, dtype='S')[inverse]
+    return values.reshape(-1).astype('S')
+
+def _join_tokens(columns, seps):
+    # columns: list of 'S' token arrays of equal length n
+    # seps: one separator per column, a single byte or a uint8 array of length n
+    # each token is laid in a fixed width cell followed by its separator,
+    # then the zero padding is dropped, so a chunk turns into text in one pass
+    n = columns[0].size
+    width = max(c.itemsize for c in columns) + 1
+    buf = np.zeros((n, len(columns), width), dtype=np.uint8)
+    for i, (col, sep) in enumerate(zip(columns, seps)):
+        buf[:, i, :col.itemsize] = col.view(np.uint8).reshape(n, col.itemsize)
+        buf[:, i, width - 1] = sep
+    buf = buf.reshape(-1)
+    return buf[buf != 0].tobytes().decode('ascii')
+
+# POINT packing: "x y z phi" per line
+_POINT_SEPS = (ord(' '), ord(' '), ord(' '), ord('\n'))
+
+def _block_seps(start, count, per_line=6):
+    # BLOCK packing: newline after every `per_line` values of a variable, space otherwise
+    index = np.arange(start + 1, start + count + 1)
+    return np.where(index % per_line == 0, ord('\n'), ord(' ')).astype(np.uint8)
+
+def _tec_plane_column(shape, z, var, plane=None):
+    # tokens of one variable (0..3 = X Y Z PHI) over one z plane, x fastest
+    h, w = shape[-2:]
+    if var == 0:
+        return np.tile(_to_text_tokens(np.arange(w)), h)
+    elif var == 1:
+        return np.repeat(_to_text_tokens(np.arange(h)), w)
+    elif var == 2:
+        return np.repeat(_to_text_tokens(np.full(1, z)), h * w)
+    return _to_text_tokens(plane)
+
+def _iter_planes(values):
+    # (z, plane) over a 2d or 3d array or a slab reader, one z slab read at a time
+    if values.ndim == 2:
+        yield 0, values
+        return
+    for z0, slab in iter_slabs(values):
+        for i in range(slab.shape[0]):
+            yield z0 + i, slab[i]
+
+def _write_point_lines(f, values):
+    # "x y z phi" lines, one write per z plane
+    ndim = values.ndim
+    if ndim == 1:
+        w, = values.shape
+        xs = _to_text_tokens(np.arange(w))
+        zero = np.repeat(_to_text_tokens(np.zeros(1, dtype=int)), w)
+        f.write(_join_tokens([xs, zero, zero, _to_text_tokens(values)], _POINT_SEPS))
+        return
+    for z, plane in _iter_planes(values):
+        columns = [_tec_plane_column(values.shape, z, var, plane) for var in range(4)]
+        f.write(_join_tokens(columns, _POINT_SEPS))
+
+def _tec_var_aux_lines(var_aux_data):
+    # VARAUXDATA records of PHI (variable 4)
+    return ''.join(f'VARAUXDATA 4 {name} = "{value}"\n' for name, value in (var_aux_data or {}).items())
+
+def _ply_comment_lines(var_aux_data):
+    # the aux data of c as "comment c NAME=value" header lines
+    return ''.join(f'comment c {name}={value}\n' for name, value in (var_aux_data or {}).items())
+
+FORMATS = ["tec", "ply", "plt", "szplt"]
+
+def _variable_names(derived):
+    # X Y Z PHI and the derived variables (rawderive.DerivedVolume) after PHI
+    return ["X", "Y", "Z", "PHI"] + [v.name for v in derived or []]
+
+def write_np_to_tec_ascii(values, file_path:str, target_ndim:int, block:bool, var_aux_data:dict = None,
+                          derived = None):
 
     # 3d: z, y, x
     # 2d: y, x
     # 1d: x
+    # data is formatted one z slab at a time and each slab is written with one call
+    # derived variables (BLOCK only) follow PHI, each in its own pass
     ndim = values.ndim
-    downsample = False
-    element_count = int(values.size / 64) if downsample else values.size     # = np.prod(values.ndim)
-    step = 4 if downsample else 1
+    element_count = values.size
+    if ndim not in (1, 2, 3):
+        raise ValueError(f'dim not known:{ndim}, must be 1 or 2 or 3')
     
     print(f'write to file:{file_path}')
-    with open(file_path, "w") as f:
+    with rawprofile.open_file(file_path, "w") as f:
         # write header
         f.write(f'TITLE = "tecplot 1d ordered"\n')
-        f.write(f'VARIABLES = "X", "Y", "Z", "PHI"\n')
+        names = ', '.join(f'"{name}"' for name in _variable_names(derived))
+        f.write(f'VARIABLES = {names}\n')
+        f.write(_tec_var_aux_lines(var_aux_data))
 
         
         # zone.header
         if (target_ndim == 3 and ndim == 3):
             d, h, w = values.shape
-            if downsample:
-                d /= 4
-                h /= 4
-                w /= 4
             f.write(f'ZONE I={w} J={h} K={d} DATAPACKING={"BLOCK" if block else "POINT"}, \n')
         else:
             f.write(f'ZONE I={element_count} DATAPACKING={"BLOCK" if block else "POINT"}, \n')
         
         # zone.data
-        if ndim == 1:
-            w, = values.shape
-            for x in range(w):
-                # xyz φ
-                f.write(f'{x} 0 0 {values[x]}\n')
-        elif ndim == 2:
-            h, w, = values.shape
-            xarr = []
-            yarr = []
-            zarr = []
-            parr = []
-            for y in range(h):
-                for x in range(w):
-                    # xyz φ
-                    if not block:
-                        f.write(f'{x} {y} 0 {values[y][x]}\n')
-                    else:
-                        xarr.append(x)
-                        yarr.append(y)
-                        zarr.append(0)
-                        parr.append(values[y][x])
-            #
-            if block:
-                newline = "\n"
-                [f.write(f'{e}{newline if (i + 1) % 6 == 0 else " "}') for i, e in enumerate(xarr)]
-                [f.write(f'{e}{newline if (i + 1) % 6 == 0 else " "}') for i, e in enumerate(yarr)]
-                [f.write(f'{e}{newline if (i + 1) % 6 == 0 else " "}') for i, e in enumerate(zarr)]
-                [f.write(f'{e}{newline if (i + 1) % 6 == 0 else " "}') for i, e in enumerate(parr)]
-
-        elif ndim == 3:
-            ncount = 0
-            d, h, w = values.shape
-            xarr = []
-            yarr = []
-            zarr = []
-            parr = []
-            for z in range(0, d, step):
-                for y in range(0, h, step):
-                    for x in range(0, w, step):
-                        # xyz φ
-                        if not block:
-                            f.write(f'{x} {y} {z} {values[z][y][x]}\n')
-                        else:
-                            xarr.append(x)
-                            yarr.append(y)
-                            zarr.append(z)
-                            parr.append(values[z][y][x])
-                        ncount += 1
-            #
-            if block:
-                newline = "\n"
-                [f.write(f'{e}{newline if (i + 1) % 6 == 0 else " "}') for i, e in enumerate(xarr)]
-                [f.write(f'{e}{newline if (i + 1) % 6 == 0 else " "}') for i, e in enumerate(yarr)]
-                [f.write(f'{e}{newline if (i + 1) % 6 == 0 else " "}') for i, e in enumerate(zarr)]
-                [f.write(f'{e}{newline if (i + 1) % 6 == 0 else " "}') for i, e in enumerate(parr)]
-                # [f.write(f'{e}{"\n" if (i + 1) % 6 == 0 else " "}') for i, e in enumerate(parr)]
-            
-            #
-            print(f'ncount:{ncount}, element_count:{element_count}')
-        else:
-            assert(f'dim not known:{ndim}, must be 1 or 2 or 3')
+        if ndim == 1 or not block:
+            _write_point_lines(f, values)
+        elif ndim in (2, 3):
+            d = values.shape[0] if ndim == 3 else 1
+            slab_size = values.shape[-2] * values.shape[-1]
+            # one sequential pass per variable, X Y Z come from the shape, only PHI reads the data
+            for var in range(3):
+                for z in range(d):
+                    column = _tec_plane_column(values.shape, z, var)
+                    f.write(_join_tokens([column], [_block_seps(z * slab_size, slab_size)]))
+            for var_values in [values] + list(derived or []):
+                for z, plane in _iter_planes(var_values):
+                    column = _tec_plane_column(values.shape, z, 3, plane)
+                    f.write(_join_tokens([column], [_block_seps(z * slab_size, slab_size)]))
+        if ndim in (2, 3):
+            print(f'element_count:{element_count}')
 
-def write_np_to_ply_ascii(values, file_path, target_ndim:int, block:bool):
+def write_np_to_ply_ascii(values, file_path, target_ndim:int, block:bool, var_aux_data:dict = None):
     # 3d: z, y, x
     # 2d: y, x
     # 1d: x
-    ndim = values.ndim
-    downsample = False
-    element_count = int(values.size / 64) if downsample else values.size     # = np.prod(values.ndim)
-    step = 4 if downsample else 1
+    # same "x y z c" lines as tec POINT data, formatted one z plane at a time
+    element_count = values.size
+    if values.ndim not in (1, 2, 3):
+        raise ValueError(f'dim not known:{values.ndim}, must be 1 or 2 or 3')
     
     print(f'write to file:{file_path}')
-    with open(file_path, "w") as f:
+    with rawprofile.open_file(file_path, "w") as f:
         # write header
         f.write(f'ply\n')
         f.write(f'format ascii 1.0\n')
         f.write(f'comment 3d point cloud\n')
+        f.write(_ply_comment_lines(var_aux_data))
         f.write(f'element vertex {element_count}\n')     # vertex count, point cloud no face
         f.write(f'property float x\n')
         f.write(f'property float y\n')
@@ -141,67 +174,763 @@ def write_np_to_ply_ascii(values, file_path, target_ndim:int, block:bool):
         f.write(f'end_header\n')
 
         # data {x y z c}
-        if ndim == 1:
-            w, = values.shape
-            for x in range(w):
-                # xyz φ
-                f.write(f'{x} 0 0 {values[x]}\n')
-        elif ndim == 2:
-            h, w, = values.shape
-            for y in range(h):
-                for x in range(w):
-                    # xyz φ
-                    f.write(f'{x} {y} 0 {values[y][x]}\n')
-        elif ndim == 3:
-            # d, h, w = values.shape
-            # for z in range(d):
-            #     for y in range(h):
-            #         for x in range(w):
-            #             # xyz φ
-            #             f.write(f'{x} {y} {z} {values[z][y][x]}\n')
-
-            ncount = 0
-            d, h, w = values.shape
-            for z in range(0, d, step):
-                for y in range(0, h, step):
-                    for x in range(0, w, step):
-                        # xyz φ
-                        f.write(f'{x} {y} {z} {values[z][y][x]}\n')
-                        ncount += 1
-            print(f'ncount:{ncount}, element_count:{element_count}')
+        _write_point_lines(f, values)
+        print(f'element_count:{element_count}')
+
+# numpy dtype -> ply property type
+_PLY_TYPES = {
+    np.dtype(np.int8): 'char', np.dtype(np.uint8): 'uchar',
+    np.dtype(np.int16): 'short', np.dtype(np.uint16): 'ushort',
+    np.dtype(np.int32): 'int', np.dtype(np.uint32): 'uint',
+    np.dtype(np.float32): 'float', np.dtype(np.float64): 'double',
+}
+
+def _ply_coord_dtype(shape):
+    # smallest unsigned type holding every voxel index
+    n = max(shape)
+    for t in (np.uint8, np.uint16, np.uint32):
+        if n - 1 <= np.iinfo(t).max:
+            return np.dtype(t)
+    return np.dtype(np.float64)
+
+def write_np_to_ply_binary(values, file_path, var_aux_data:dict = None):
+    # binary_little_endian point cloud, one structured (x, y, z, c) record per voxel
+    # records are built one z slab at a time and written straight from the buffer
+    # property types follow the data: smallest unsigned int for x y z, source dtype for c
+    if values.ndim != 3:
+        values = values.reshape((1,) * (3 - values.ndim) + values.shape)
+    d, h, w = values.shape
+    value_dtype = values.dtype.newbyteorder('=')
+    if value_dtype not in _PLY_TYPES:
+        raise ValueError(f'dtype not supported by ply: {values.dtype}')
+    coord_dtype = _ply_coord_dtype(values.shape)
+    record = np.dtype([('x', coord_dtype.newbyteorder('<')), ('y', coord_dtype.newbyteorder('<')),
+                       ('z', coord_dtype.newbyteorder('<')), ('c', value_dtype.newbyteorder('<'))])
+
+    print(f'write to file:{file_path}')
+    with rawprofile.open_file(file_path, "wb") as f:
+        # write header
+        f.write(b'ply\n')
+        f.write(b'format binary_little_endian 1.0\n')
+        f.write(b'comment 3d point cloud\n')
+        f.write(_ply_comment_lines(var_aux_data).encode())
+        f.write(f'element vertex {values.size}\n'.encode())
+        for name in 'xyz':
+            f.write(f'property {_PLY_TYPES[coord_dtype]} {name}\n'.encode())
+        f.write(f'property {_PLY_TYPES[value_dtype]} c\n'.encode())
+        f.write(b'end_header\n')
+
+        # data {x y z c}, x fastest
+        records = np.empty((h, w), dtype=record)
+        records['x'] = np.arange(w)
+        records['y'] = np.arange(h)[:, None]
+        for z, plane in _iter_planes(values):
+            records['z'] = z
+            records['c'] = plane
+            f.write(records)
+
+# plt and tecio store uint8, int16, int32, float32 and float64 values, the other
+# raw types go into the next one that holds every value, converted per slab
+_ZONE_WIDEN = {np.dtype(np.int8): np.dtype(np.int16), np.dtype(np.uint16): np.dtype(np.int32),
+               np.dtype(np.uint32): np.dtype(np.float64)}
+
+def _zone_dtype(dtype):
+    native = np.dtype(dtype).newbyteorder('=')
+    return _ZONE_WIDEN.get(native, native)
+
+def _coord_slab(shape, z, var):
+    # X Y Z coordinates of one z slab as float32, x fastest
+    h, w = shape[-2:]
+    if var == 0:
+        return np.tile(np.arange(w, dtype=np.float32), h)
+    elif var == 1:
+        return np.repeat(np.arange(h, dtype=np.float32), w)
+    return np.full(h * w, z, dtype=np.float32)
+
+def write_np_to_plt(values, file_path:str, var_aux_data:dict = None, derived = None):
+    # binary plt v112 without libtecio, block packed, one IJK zone, PHI keeps the raw dtype
+    # derived variables are float32 and follow PHI
+    from pltwriter import PltFileWriter, PltZone
+
+    if values.ndim != 3:
+        values = values.reshape((1,) * (3 - values.ndim) + values.shape)
+    d, h, w = values.shape
+    derived = list(derived or [])
+    print(f'write to file:{file_path}')
+    zone = PltZone("Ordered Zone", w, h, d, [np.float32, np.float32, np.float32, _zone_dtype(values.dtype)]
+                   + [v.dtype for v in derived])
+    with PltFileWriter(file_path, "IJK Ordered Zones", _variable_names(derived), [zone],
+                       {3: var_aux_data} if var_aux_data else None) as f:
+        for var in range(3):
+            for z in range(d):
+                f.zone_var_write(_coord_slab(values.shape, z, var))
+        for var_values in [values] + derived:
+            for z0, slab in iter_slabs(var_values):
+                f.zone_var_write(slab)
+
+def write_np_to_tecio(values, file_path:str, format:str, var_aux_data:dict = None, derived = None):
+    # binary plt/szplt through libtecio, block packed, one IJK zone
+    # szplt keeps PHI in the source dtype, plt (classic api) stores it as float
+    # derived variables are float32 and follow PHI
+    import tecio
+
+    if values.ndim != 3:
+        values = values.reshape((1,) * (3 - values.ndim) + values.shape)
+    d, h, w = values.shape
+    derived = list(derived or [])
+    variables = _variable_names(derived)
+    print(f'write to file:{file_path}')
+    if format == "szplt":
+        with tecio.FileWriter(file_path, "IJK Ordered Zones", variables) as f:
+            for name, value in (var_aux_data or {}).items():
+                f.var_add_aux_data(4, name, value)
+            dtypes = [np.float32, np.float32, np.float32, _zone_dtype(values.dtype)] + [v.dtype for v in derived]
+            zone = f.zone_create_ijk("Ordered Zone", w, h, d, dtypes)
+            for var in range(3):
+                for z in range(d):
+                    f.zone_var_write(zone, var + 1, _coord_slab(values.shape, z, var))
+            for var, var_values in enumerate([values] + derived, 4):
+                for z0, slab in iter_slabs(var_values):
+                    f.zone_var_write(zone, var, np.asarray(slab, dtype=dtypes[var - 1]))
+    else:
+        with tecio.ClassicFileWriter(file_path, "IJK Ordered Zones", variables) as f:
+            for name, value in (var_aux_data or {}).items():
+                f.var_add_aux_data(4, name, value)
+            f.zone_create_ijk("Ordered Zone", w, h, d)
+            for var in range(3):
+                for z in range(d):
+                    f.zone_var_write(_coord_slab(values.shape, z, var))
+            for var_values in [values] + derived:
+                for z0, slab in iter_slabs(var_values):
+                    f.zone_var_write(slab)
+
+def _open_zone_writer(file_path:str, format:str, use_tecio:bool, title:str, variables, zones, var_aux_data:dict = None):
+    """
+    open a plt/szplt writer for ordered zones.
+
+    zones are dicts with title, shape (d, h, w), dtypes and optionally
+    aux_data, solution_time, strand_id and share_var_from_zone (1 based zone
+    per variable, 0 for none). returns write(zone, var, values) with 0 based
+    zone and var, values of a zone/var pair may come in several chunks but
+    zones and variables must be written in order, shared variables are not
+    written, and a close() function. var_aux_data maps a 0 based variable to
+    its aux data.
+    """
+    def options(zone):
+        return (zone.get("aux_data") or {}, zone.get("solution_time", 0.0), zone.get("strand_id", 0),
+                zone.get("share_var_from_zone"))
+
+    if format == "plt" and not use_tecio:
+        from pltwriter import PltFileWriter, PltZone
+        plt_zones = []
+        for zone in zones:
+            aux, solution_time, strand_id, share = options(zone)
+            d, h, w = zone["shape"]
+            # strands are 1 based in the api (0 static), 0 based in the file (-1 static)
+            plt_zones.append(PltZone(zone["title"], w, h, d, zone["dtypes"], solution_time, strand_id - 1, aux, share))
+        f = PltFileWriter(file_path, title, variables, plt_zones, var_aux_data)
+        return (lambda zone, var, values: f.zone_var_write(values)), f.close
+
+    # tecio: zones are created one after the other as their values start
+    import tecio
+    current = [-1, None]
+    if format == "szplt":
+        f = tecio.FileWriter(file_path, title, variables)
+        def create(zone):
+            aux, solution_time, strand_id, share = options(zone)
+            d, h, w = zone["shape"]
+            handle = f.zone_create_ijk(zone["title"], w, h, d, zone["dtypes"], share)
+            if solution_time or strand_id:
+                f.zone_set_unsteady_options(handle, solution_time, strand_id)
+            for name, value in aux.items():
+                f.zone_add_aux_data(handle, name, value)
+            return handle
+        def write_values(handle, var, values):
+            f.zone_var_write(handle, var + 1, values)
+    else:
+        f = tecio.ClassicFileWriter(file_path, title, variables)
+        def create(zone):
+            aux, solution_time, strand_id, share = options(zone)
+            d, h, w = zone["shape"]
+            f.zone_create_ijk(zone["title"], w, h, d, solution_time, strand_id, share)
+            for name, value in aux.items():
+                f.zone_add_aux_data(name, value)
+        def write_values(handle, var, values):
+            f.zone_var_write(values)
+
+    for var, aux_data in (var_aux_data or {}).items():
+        for name, value in aux_data.items():
+            f.var_add_aux_data(var + 1, name, value)
+
+    def write(zone, var, values):
+        if zone != current[0]:
+            current[0], current[1] = zone, create(zones[zone])
+        write_values(current[1], var, np.asarray(values, dtype=zones[zone]["dtypes"][var]))
+    return write, f.close
+
+def write_np_to_lod(values, file_path:str, format:str, levels:int, filter:str = "mean", sigma:float = None,
+                    use_tecio:bool = False, depth:int = None, var_aux_data:dict = None):
+    """
+    write the volume and `levels` 2x coarser levels as zones of one plt/szplt file.
+
+    zone k holds level k, tagged with the zone aux data LOD=2^k, all zones
+    share the X Y Z PHI variables. coarse coordinates are scaled back to the
+    input grid so the levels overlay. the levels come from one streaming pass
+    over the input (rawdownsample.run_pyramid) while the finest zone is
+    written, coarse slabs are spilled to temporary raw files next to the
+    output and copied in once the finest zone is complete.
+    """
+    import tempfile
+    from rawdownsample import run_pyramid, downsample_shape, pyramid_slab_multiple
+
+    if format not in ("plt", "szplt"):
+        raise ValueError(f'lod zones need plt or szplt output, not {format}')
+    if values.ndim != 3:
+        values = values.reshape((1,) * (3 - values.ndim) + values.shape)
+    if depth is None:
+        depth = pyramid_slab_multiple(levels, filter=filter, sigma=sigma)
+    # pooled samples sit at the center of their block, decimated ones on the input grid
+    centered = filter in ("mean", "max", "min")
+    shapes = [values.shape]
+    for level in range(levels):
+        shapes.append(downsample_shape(shapes[-1], 2))
+    zones = []
+    for level, shape in enumerate(shapes):
+        dtypes = [np.float32, np.float32, np.float32, _zone_dtype(values.dtype)]
+        zones.append(dict(title=f"LOD {level}", shape=shape, dtypes=dtypes, aux_data={"LOD": str(1 << level)}))
+    print(f'write to file:{file_path}, lod zones: {shapes}')
+
+    def write_coords(write, zone, shape, scale):
+        offset = (scale - 1) / 2 if centered else 0
+        for var in range(3):
+            for z in range(shape[0]):
+                coords = _coord_slab(shape, z, var)
+                if scale != 1:
+                    coords *= scale
+                    coords += offset
+                write(zone, var, coords)
+
+    write, close = _open_zone_writer(file_path, format, use_tecio, "LOD Zones", ["X", "Y", "Z", "PHI"], zones,
+                                     {3: var_aux_data} if var_aux_data else None)
+    spill_dir = tempfile.mkdtemp(prefix='lod_', dir=os.path.dirname(os.path.abspath(file_path)))
+    spill_names = [os.path.join(spill_dir, f'L{level}.raw') for level in range(1, levels + 1)]
+    spills = [rawprofile.open_file(name, 'wb') for name in spill_names]
+    try:
+        write_coords(write, 0, shapes[0], 1)
+        sinks = [lambda z0, slab: write(0, 3, slab)]
+        sinks += [lambda z0, slab, f=f: f.write(np.ascontiguousarray(slab, dtype=values.dtype)) for f in spills]
+        with rawprofile.stage('transform'):
+            run_pyramid(iter_slabs(values, depth), levels, sinks, filter, sigma)
+        for f in spills:
+            f.close()
+        for level in range(1, levels + 1):
+            shape = shapes[level]
+            write_coords(write, level, shape, 1 << level)
+            coarse = np.memmap(spill_names[level - 1], dtype=values.dtype, mode='r', shape=shape)
+            for z0, slab in iter_slabs(coarse, depth):
+                write(level, 3, slab)
+            del coarse
+        close()
+    finally:
+        for f in spills:
+            f.close()
+        for name in spill_names:
+            if os.path.exists(name):
+                os.remove(name)
+        os.rmdir(spill_dir)
+
+# sparse output: only the cells touching voxels above a threshold / inside a mask
+
+def _keep_voxels(z:int, plane, threshold:float = None, mask = None, bricks = None):
+    # kept voxels of one z plane: above the threshold and nonzero in the mask
+    # bricks: (BrickIndex, index.above(threshold)), only the voxels of the bricks that
+    # may hold a voxel above the threshold are compared (and read), the others are not kept
+    if threshold is not None and bricks is not None:
+        index, selected = bricks
+        keep = np.zeros(plane.shape, dtype=bool)
+        for y0, y1, x0, x1 in index.boxes(selected, z // index.brick):
+            np.greater(plane[y0:y1, x0:x1], threshold, out=keep[y0:y1, x0:x1])
+    else:
+        keep = np.ones(plane.shape, dtype=bool) if threshold is None else plane > threshold
+    if mask is not None:
+        keep &= np.asarray(mask[z]) != 0
+    return keep
+
+class SparseCells:
+    """
+    cells of a (d, h, w) volume that touch a kept voxel, as an FE brick zone.
+
+    a voxel is kept when it is above `threshold` and / or nonzero in `mask`
+    (a (d, h, w) array), a cell is kept when any of its 8 corner voxels is
+    kept, the nodes are the corners of the kept cells. the constructor makes
+    one pass over the data to mark the nodes (one byte per voxel) and count
+    nodes and cells, the iterators make one more pass each. nodes are numbered
+    plane by plane, x fastest. `index` (a rawindex.BrickIndex of the volume)
+    limits the threshold test to the bricks that may hold a kept voxel.
+    """
+
+    def __init__(self, values, threshold:float = None, mask = None, index = None):
+        if threshold is None and mask is None:
+            raise ValueError('sparse output needs a threshold or a mask')
+        if values.ndim != 3:
+            values = values.reshape((1,) * (3 - values.ndim) + values.shape)
+        if mask is not None and tuple(mask.shape) != tuple(values.shape):
+            raise ValueError(f'mask shape {mask.shape} does not match the volume {values.shape}')
+        self.values = values
+        self.threshold = threshold
+        self.mask = mask
+        self.bricks = (index, index.above(threshold)) if index is not None and threshold is not None else None
+        d, h, w = values.shape
+        self.nodes = np.zeros((d, h, w), dtype=bool)
+        self.num_cells = 0
+        with rawprofile.stage('transform'):
+            for z, keep0, keep1 in self._iter_layers():
+                cells = self._cells(keep0, keep1)
+                self.num_cells += int(np.count_nonzero(cells))
+                corners = self._corners(cells)
+                self.nodes[z] |= corners
+                self.nodes[z + 1] |= corners
+        counts = self.nodes.reshape(d, -1).sum(axis=1)
+        self.plane_offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.num_nodes = int(self.plane_offsets[-1])
+        if not self.num_cells:
+            raise ValueError('no cell touches a kept voxel, nothing to write')
+        print(f'sparse: {self.num_nodes} nodes, {self.num_cells} cells of {values.size} voxels')
+
+    def _iter_layers(self):
+        # (z, kept voxels of plane z, of plane z + 1) for every cell layer
+        previous = None
+        for z, plane in _iter_planes(self.values):
+            keep = _keep_voxels(z, plane, self.threshold, self.mask, self.bricks)
+            if previous is not None:
+                yield z - 1, previous, keep
+            previous = keep
+
+    @staticmethod
+    def _cells(keep0, keep1):
+        # cells (h-1, w-1) with any kept corner
+        k = keep0 | keep1
+        return k[:-1, :-1] | k[:-1, 1:] | k[1:, :-1] | k[1:, 1:]
+
+    @staticmethod
+    def _corners(cells):
+        # nodes (h, w) at the corners of the cells
+        h, w = cells.shape[0] + 1, cells.shape[1] + 1
+        nodes = np.zeros((h, w), dtype=bool)
+        nodes[:-1, :-1] |= cells
+        nodes[:-1, 1:] |= cells
+        nodes[1:, :-1] |= cells
+        nodes[1:, 1:] |= cells
+        return nodes
+
+    def iter_node_planes(self):
+        # (z, x, y, phi) of the nodes of every z plane
+        for z, plane in _iter_planes(self.values):
+            y, x = np.nonzero(self.nodes[z])
+            yield z, x, y, plane[y, x]
+
+    def _node_ids(self, z):
+        h, w = self.nodes.shape[1:]
+        ids = np.full((h, w), -1, dtype=np.int64)
+        used = self.nodes[z]
+        ids[used] = np.arange(self.plane_offsets[z], self.plane_offsets[z + 1])
+        return ids
+
+    def iter_connectivity(self):
+        # (m, 8) zero based node ids of the cells of every layer, brick corner order
+        ids1 = None
+        for z, keep0, keep1 in self._iter_layers():
+            cy, cx = np.nonzero(self._cells(keep0, keep1))
+            ids0 = ids1 if ids1 is not None else self._node_ids(z)
+            ids1 = self._node_ids(z + 1)
+            yield np.stack([ids0[cy, cx], ids0[cy, cx + 1], ids0[cy + 1, cx + 1], ids0[cy + 1, cx],
+                            ids1[cy, cx], ids1[cy, cx + 1], ids1[cy + 1, cx + 1], ids1[cy + 1, cx]], axis=1)
+
+def write_sparse_tec_ascii(cells:SparseCells, file_path:str, block:bool):
+    # FEBRICK zone, nodes in BLOCK or POINT packing, then one 1 based brick per line
+    print(f'write to file:{file_path}')
+    with rawprofile.open_file(file_path, "w") as f:
+        f.write(f'TITLE = "tecplot sparse"\n')
+        f.write(f'VARIABLES = "X", "Y", "Z", "PHI"\n')
+        f.write(f'ZONE N={cells.num_nodes} E={cells.num_cells} DATAPACKING={"BLOCK" if block else "POINT"} ZONETYPE=FEBRICK\n')
+        if block:
+            for var in range(4):
+                for z, x, y, phi in cells.iter_node_planes():
+                    column = (x, y, np.full(x.size, z), phi)[var]
+                    start = int(cells.plane_offsets[z])
+                    f.write(_join_tokens([_to_text_tokens(column)], [_block_seps(start, column.size)]))
         else:
-            assert(f'dim not known:{ndim}, must be 1 or 2 or 3')
+            for z, x, y, phi in cells.iter_node_planes():
+                columns = [_to_text_tokens(c) for c in (x, y, np.full(x.size, z), phi)]
+                f.write(_join_tokens(columns, _POINT_SEPS))
+        seps = (ord(' '),) * 7 + (ord('\n'),)
+        for conn in cells.iter_connectivity():
+            conn += 1
+            f.write(_join_tokens([_to_text_tokens(conn[:, k]) for k in range(8)], seps))
+
+def write_sparse_plt(cells:SparseCells, file_path:str):
+    # binary plt v112 FEBRICK zone with the numpy writer, PHI keeps the raw dtype
+    from pltwriter import PltFileWriter, PltFEZone, ZONETYPE_FEBRICK
+
+    print(f'write to file:{file_path}')
+    zone = PltFEZone("Sparse Zone", cells.num_nodes, cells.num_cells, ZONETYPE_FEBRICK,
+                     [np.float32, np.float32, np.float32, _zone_dtype(cells.values.dtype)])
+    with PltFileWriter(file_path, "Sparse Zones", ["X", "Y", "Z", "PHI"], [zone]) as f:
+        for var in range(4):
+            for z, x, y, phi in cells.iter_node_planes():
+                f.zone_var_write((x, y, np.full(x.size, z), phi)[var])
+        for conn in cells.iter_connectivity():
+            f.zone_connectivity_write(conn)
+
+def _iter_kept_points(values, threshold:float = None, mask = None, bricks = None):
+    # (z, x, y, c) of the kept voxels of every z plane
+    for z, plane in _iter_planes(values):
+        y, x = np.nonzero(_keep_voxels(z, plane, threshold, mask, bricks))
+        yield z, x, y, plane[y, x]
+
+def write_sparse_ply(values, file_path:str, binary:bool, threshold:float = None, mask = None, index = None):
+    # point cloud of the kept voxels only, one pass to count them and one to write
+    if values.ndim != 3:
+        values = values.reshape((1,) * (3 - values.ndim) + values.shape)
+    bricks = (index, index.above(threshold)) if index is not None and threshold is not None else None
+    with rawprofile.stage('transform'):
+        count = sum(x.size for z, x, y, c in _iter_kept_points(values, threshold, mask, bricks))
+    value_dtype = values.dtype.newbyteorder('=')
+    coord_dtype = _ply_coord_dtype(values.shape)
+    print(f'write to file:{file_path}, {count} of {values.size} points')
+    with rawprofile.open_file(file_path, "wb" if binary else "w") as f:
+        header = ['ply', 'format binary_little_endian 1.0' if binary else 'format ascii 1.0',
+                  'comment 3d point cloud', f'element vertex {count}']
+        if binary:
+            header += [f'property {_PLY_TYPES[coord_dtype]} {name}' for name in 'xyz']
+            header += [f'property {_PLY_TYPES[value_dtype]} c']
+        else:
+            header += [f'property float {name}' for name in 'xyzc']
+        header = ''.join(line + '\n' for line in header + ['end_header'])
+        f.write(header.encode() if binary else header)
+        record = np.dtype([('x', coord_dtype.newbyteorder('<')), ('y', coord_dtype.newbyteorder('<')),
+                           ('z', coord_dtype.newbyteorder('<')), ('c', value_dtype.newbyteorder('<'))])
+        for z, x, y, c in _iter_kept_points(values, threshold, mask, bricks):
+            if binary:
+                records = np.empty(x.size, dtype=record)
+                records['x'], records['y'], records['z'], records['c'] = x, y, z, c
+                f.write(records)
+            else:
+                columns = [_to_text_tokens(v) for v in (x, y, np.full(x.size, z), c)]
+                f.write(_join_tokens(columns, _POINT_SEPS) if x.size else '')
+
+# time series: snapshots on one grid as zones of one file
+
+def _read_snapshot(file, d, h, w, dtype, offset, endian):
+    # runs in the prefetch thread, the whole snapshot in memory
+    return file, load_raw_to_np(file, d, h, w, dtype, endian, offset=offset, mmap=False)
+
+def _write_tec_series(snapshots, zones, file_path:str):
+    # BLOCK packed zones, X Y Z in the first zone only, later zones share them with VARSHARELIST
+    print(f'write to file:{file_path}')
+    with rawprofile.open_file(file_path, "w") as f:
+        f.write(f'TITLE = "tecplot time series"\n')
+        f.write(f'VARIABLES = "X", "Y", "Z", "PHI"\n')
+        for i, (file, values) in enumerate(snapshots):
+            zone = zones[i]
+            d, h, w = zone["shape"]
+            share = ', VARSHARELIST=([1-3]=1)' if i else ''
+            f.write(f'ZONE T="{zone["title"]}" I={w} J={h} K={d} DATAPACKING=BLOCK, '
+                    f'SOLUTIONTIME={zone["solution_time"]}, STRANDID={zone["strand_id"]}{share}\n')
+            slab_size = h * w
+            for var in range(0 if i == 0 else 3, 4):
+                for z in range(d):
+                    column = _tec_plane_column((d, h, w), z, var, values[z])
+                    f.write(_join_tokens([column], [_block_seps(z * slab_size, slab_size)]))
+
+def write_series(files, d, h, w, dtype, file_path:str, format:str, use_tecio:bool = False,
+                 dt:float = 1.0, t0:float = 0.0, offset:int = 0, prefetch:int = 2, endian:str = 'little'):
+    """
+    write raw snapshots of one grid as the zones of one tec/plt/szplt file.
+
+    zone i gets solution time t0 + i*dt on strand 1, X Y Z are written in
+    the first zone only and shared by every later zone. snapshots are read
+    by a prefetch thread up to `prefetch` files ahead of the writer.
+    """
+    dtype = np.dtype(dtype)
+    zones = []
+    for i, file in enumerate(files):
+        zones.append(dict(title=os.path.splitext(os.path.basename(strip_compressed_ext(file)))[0], shape=(d, h, w),
+                          dtypes=[np.float32, np.float32, np.float32, _zone_dtype(dtype)],
+                          solution_time=t0 + i * dt, strand_id=1,
+                          share_var_from_zone=[1, 1, 1, 0] if i else None))
+    snapshots = iter_prefetch((_read_snapshot(file, d, h, w, dtype, offset, endian) for file in files), prefetch)
+    if format == "tec":
+        _write_tec_series(snapshots, zones, file_path)
+        return
+    if format not in ("plt", "szplt"):
+        raise ValueError(f'time series write tec, plt or szplt, not {format}')
+    print(f'write to file:{file_path}, {len(zones)} snapshots')
+    write, close = _open_zone_writer(file_path, format, use_tecio, "Time Series", ["X", "Y", "Z", "PHI"], zones)
+    for i, (file, values) in enumerate(snapshots):
+        if i == 0:
+            for var in range(3):
+                for z in range(d):
+                    write(0, var, _coord_slab((d, h, w), z, var))
+        write(i, 3, values)
+    close()
 
-def main(file, d, h, w, format, target_ndim, dtype = np.uint8, block:bool = True):
+# bricked szplt
+
+def parse_brick(text:str):
+    # "64x64x32" (i x j x k, as in the file names) or "64" -> (bi, bj, bk) cells per brick
+    sizes = [int(v) for v in str(text).lower().split('x')]
+    if len(sizes) == 1:
+        sizes *= 3
+    if len(sizes) != 3 or min(sizes) < 1:
+        raise ValueError(f'brick size not valid:{text}, must be N or NxNxN')
+    return tuple(sizes)
+
+def _axis_ranges(n:int, cells:int):
+    # 1 based inclusive node ranges of `cells` cells, neighbours share one node plane
+    if n == 1:
+        return [(1, 1)]
+    return [(start + 1, min(start + cells, n - 1) + 1) for start in range(0, n - 1, cells)]
+
+def brick_partitions(shape, brick):
+    # (imin, jmin, kmin, imax, jmax, kmax) of every brick, i fastest
+    d, h, w = shape
+    bi, bj, bk = brick
+    return [(i0, j0, k0, i1, j1, k1)
+            for k0, k1 in _axis_ranges(d, bk)
+            for j0, j1 in _axis_ranges(h, bj)
+            for i0, i1 in _axis_ranges(w, bi)]
+
+_brick_volume = None
+
+def _open_brick_volume(file, d, h, w, dtype, offset):
+    # process pool initializer, every worker maps the raw file once
+    global _brick_volume
+    _brick_volume = np.memmap(file, dtype=dtype, mode='r', offset=offset, shape=(d, h, w))
+
+def _prepare_brick(part):
+    # X Y Z PHI of one brick as contiguous arrays, x fastest, PHI already in the zone dtype
+    i0, j0, k0, i1, j1, k1 = part
+    phi = np.ascontiguousarray(_brick_volume[k0 - 1:k1, j0 - 1:j1, i0 - 1:i1], dtype=_zone_dtype(_brick_volume.dtype))
+    shape = phi.shape
+    x = np.broadcast_to(np.arange(i0 - 1, i1, dtype=np.float32), shape)
+    y = np.broadcast_to(np.arange(j0 - 1, j1, dtype=np.float32)[:, None], shape)
+    z = np.broadcast_to(np.arange(k0 - 1, k1, dtype=np.float32)[:, None, None], shape)
+    return [np.ascontiguousarray(x), np.ascontiguousarray(y), np.ascontiguousarray(z), phi]
+
+def _ordered_map(executor, func, items, window:int):
+    # executor.map with at most `window` results pending, yields in submit order
+    items = iter(items)
+    pending = []
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= window:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+def write_raw_to_bricks(file, d, h, w, dtype, file_path:str, brick, offset:int = 0, workers:int = None,
+                        endian:str = 'little'):
+    """
+    write one IJK szplt zone as bricks, one tecio partition per brick.
+
+    bricks overlap their neighbours by one node plane so every cell is in
+    exactly one partition. bricks are cut and converted in a process pool,
+    each worker maps the raw file itself, and are written in partition order
+    with only a few bricks in flight.
+    """
+    import tecio
+    from concurrent.futures import ProcessPoolExecutor
+    from rawio import check_raw_size, compression_of
+
+    dtype = raw_dtype(dtype, endian)
+    if compression_of(file):
+        raise ValueError(f'{file}: --brick maps the raw file in every worker, decompress it first')
+    check_raw_size(file, d, h, w, dtype, offset)
+    parts = brick_partitions((d, h, w), brick)
+    workers = workers or os.cpu_count() or 1
+    print(f'write to file:{file_path}, {len(parts)} bricks of {brick[0]}x{brick[1]}x{brick[2]} cells, {workers} workers')
+    with tecio.FileWriter(file_path, "IJK Ordered Zones", ["X", "Y", "Z", "PHI"]) as f:
+        zone = f.zone_create_ijk("Ordered Zone", w, h, d,
+                                 [np.float32, np.float32, np.float32, _zone_dtype(dtype)])
+        with ProcessPoolExecutor(workers, initializer=_open_brick_volume,
+                                 initargs=(file, d, h, w, dtype, offset)) as executor:
+            bricks = rawprofile.iter_stage(_ordered_map(executor, _prepare_brick, parts, 2 * workers), 'transform')
+            for partition, arrays in enumerate(bricks, 1):
+                f.ijk_partition_create(zone, partition, *parts[partition - 1])
+                for var, values in enumerate(arrays):
+                    f.zone_var_write(zone, var + 1, values, partition)
+
+# working memory per voxel of one z plane on top of the slab buffer, by output format
+_PLANE_BYTES_PER_VOXEL = {"tec": 320, "ply": 320, "plt": 16, "szplt": 16}
+
+def main(file, d, h, w, format, target_ndim, dtype = np.uint8, block:bool = True, use_tecio:bool = False, binary:bool = False,
+         offset:int = 0, mmap:bool = True, max_memory:int = None, lod:int = 0, lod_filter:str = "mean", sigma:float = None,
+         brick = None, workers:int = None, out:str = None, threshold:float = None, mask:str = None, roi = None, stride = None,
+         use_index:bool = True, endian:str = 'little', quantize:str = None, quantize_range = None, derive = None,
+         index_path:str = None):
     # a = load_raw_to_np("D:/data/dataset/scivis/foot_256x256x256_uint8.raw", 256, 256, 256)
     # print(a[:1000])
-    values = load_raw_to_np(file, d, h, w, dtype)
-    # print(values[:100][:100])
-    if format == "tec":
-        write_np_to_tec_ascii(values, _get_out_file_name(file, format), target_ndim, block)
-    elif format == "ply":
-        write_np_to_ply_ascii(values, _get_out_file_name(file, format), target_ndim, block)
+    if format not in FORMATS:
+        raise ValueError(f'format not known:{format}, must be one of {FORMATS}')
+    out_file = out or _get_out_file_name(file, format)
+    if quantize:
+        if brick or threshold is not None or mask:
+            raise ValueError('--quantize writes the whole volume, not with --brick, --threshold or --mask')
+        if format == "plt" and use_tecio:
+            raise ValueError('--quantize needs integer values, the libtecio plt writer stores floats, use the numpy plt writer')
+    if derive:
+        # derive: names of rawderive variables, written after PHI
+        if brick or lod or threshold is not None or mask or quantize:
+            raise ValueError('--derive writes the whole volume, not with --brick, --lod, --threshold, --mask or --quantize')
+        if format == "ply" or (format == "tec" and not block):
+            raise ValueError('--derive writes BLOCK variables: tec with -b, plt or szplt')
+    if brick:
+        if format != "szplt":
+            raise ValueError(f'--brick writes szplt partitions, not {format}')
+        if roi or stride:
+            raise ValueError('--brick maps the whole raw file, it does not take --roi / --stride')
+        if lod or threshold is not None or mask or max_memory:
+            raise ValueError('--brick does not take --lod / --threshold / --mask / --max-memory')
+        write_raw_to_bricks(file, d, h, w, dtype, out_file, brick, offset, workers, endian)
+        return out_file
+    if (threshold is not None or mask) and lod:
+        raise ValueError('--threshold / --mask write one sparse zone, not with --lod')
+    if max_memory:
+        # stream z slabs sized to the budget instead of mapping the whole volume
+        plane_bytes = (16 if binary else _PLANE_BYTES_PER_VOXEL.get(format, 320)) * h * w
+        if quantize:
+            # float64 value and work planes of the conversion
+            plane_bytes += 16 * h * w
+        if derive:
+            from rawderive import PLANE_BYTES_PER_VOXEL
+            plane_bytes += PLANE_BYTES_PER_VOXEL * h * w
+        multiple = 1
+        if lod:
+            from rawdownsample import pyramid_slab_multiple
+            multiple = pyramid_slab_multiple(lod, filter=lod_filter, sigma=sigma)
+        buffers = slab_buffer_count(file) + 1
+        depth = slab_depth(roi_shape((d, h, w), roi, stride), buffers * np.dtype(dtype).itemsize, max_memory, plane_bytes, multiple)
+        values = RawSlabReader(file, d, h, w, dtype, endian, offset=offset, depth=depth, roi=roi, stride=stride)
     else:
-        assert(f'format not known:{format}, must be plt or ply')
+        depth = None
+        values = load_raw_to_np(file, d, h, w, dtype, endian, offset=offset, mmap=mmap, roi=roi, stride=stride)
+    # print(values[:100][:100])
+    var_aux_data = None
+    if quantize:
+        from rawquantize import QuantizedVolume, QUANTIZE_TYPES
+        if quantize_range is None and use_index and not (roi or stride):
+            # the sidecar has the exact range, no min/max pass over the data
+            from rawindex import BrickIndex
+            index = BrickIndex.find(file, (d, h, w), raw_dtype(dtype, endian), offset, index_path)
+            quantize_range = index.value_range() if index is not None else None
+        values = QuantizedVolume(values, QUANTIZE_TYPES[quantize], quantize_range)
+        var_aux_data = values.aux_data()
+    derived = None
+    if derive:
+        from rawderive import DerivedVolume
+        derived = [DerivedVolume(values, name, depth) for name in derive]
+        print(f'derive: {", ".join(derive)}')
+    with rawprofile.stage('format'):
+        if threshold is not None or mask:
+            mask_values = load_raw_to_np(mask, d, h, w, np.uint8, roi=roi, stride=stride) if mask else None
+            index = None
+            if threshold is not None and use_index and not (roi or stride):
+                from rawindex import BrickIndex
+                index = BrickIndex.find(file, (d, h, w), raw_dtype(dtype, endian), offset, index_path)
+            if format == "ply":
+                write_sparse_ply(values, out_file, binary, threshold, mask_values, index)
+            elif format == "tec":
+                write_sparse_tec_ascii(SparseCells(values, threshold, mask_values, index), out_file, block)
+            elif format == "plt" and not use_tecio:
+                write_sparse_plt(SparseCells(values, threshold, mask_values, index), out_file)
+            else:
+                raise ValueError(f'--threshold / --mask write tec, ply or plt (numpy writer), not {format}')
+        elif lod:
+            write_np_to_lod(values, out_file, format, lod, lod_filter, sigma, use_tecio, depth, var_aux_data)
+        elif format == "tec":
+            write_np_to_tec_ascii(values, out_file, target_ndim, block, var_aux_data, derived)
+        elif format == "ply" and binary:
+            write_np_to_ply_binary(values, out_file, var_aux_data)
+        elif format == "ply":
+            write_np_to_ply_ascii(values, out_file, target_ndim, block, var_aux_data)
+        elif format == "plt" and not use_tecio:
+            write_np_to_plt(values, out_file, var_aux_data, derived)
+        elif format in ("plt", "szplt"):
+            write_np_to_tecio(values, out_file, format, var_aux_data, derived)
+        else:
+            raise ValueError(f'format not known:{format}, must be one of {FORMATS}')
+    if quantize:
+        print(values.report())
+    return out_file
+
+def add_arguments(parser):
+    add_raw_arguments(parser)
+    parser.add_argument('-f', '--format', type=str, default="tec", help="tec ascii, plt binary, szplt binary via libtecio or ply point cloud")
+    parser.add_argument('-b', '--block', action="store_true", default=False, help="datapacking block or point")
+    parser.add_argument('--binary', action="store_true", default=False, help="binary_little_endian ply instead of ascii")
+    parser.add_argument('--tecio', action="store_true", default=False, help="write plt through libtecio instead of the numpy writer")
+    parser.add_argument('--lod', type=int, default=0, help="add N 2x coarser levels as extra zones (plt, szplt)")
+    parser.add_argument('--lod-filter', type=str, default="mean", help="downsample filter of the lod levels: point, mean, max, min, gaussian")
+    parser.add_argument('--sigma', type=float, default=None, help="gaussian sigma of --lod-filter gaussian")
+    parser.add_argument('--brick', type=str, default=None, help="szplt as partitions of NxNxN cell bricks, e.g. 64x64x64")
+    parser.add_argument('--workers', type=int, default=None, help="processes preparing the bricks, default cpu count")
+    parser.add_argument('--threshold', type=float, default=None, help="keep only voxels above this value (FE brick zone for tec/plt, points for ply)")
+    parser.add_argument('--mask', type=str, default=None, help="uint8 raw of the same size, keep only voxels where it is nonzero")
+    parser.add_argument('--no-index', action="store_true", default=False, help="ignore the <file>.index.npz sidecar of rawindex for --threshold / --quantize")
+    parser.add_argument('--index', type=str, default=None, help="sidecar of rawindex -o, default <file>.index.npz")
+    parser.add_argument('--quantize', type=str, default=None, choices=["uint8", "int16"], help="store PHI as uint8 / int16 codes with SCALE / OFFSET aux data")
+    parser.add_argument('--quantize-range', type=str, default=None, help="lo,hi mapped onto the codes, default the volume min/max, e.g. --quantize-range=-1,1")
+    parser.add_argument('--derive', type=str, default=None, help="add grad (GX GY GZ), gradmag (GRADMAG), normals (NX NY NZ) after PHI, e.g. grad,normals")
+    parser.add_argument('--series', type=str, default=None, help="glob of snapshots on one grid, written as the zones of one file")
+    parser.add_argument('--dt', type=float, default=1.0, help="solution time step between snapshots")
+    parser.add_argument('--t0', type=float, default=0.0, help="solution time of the first snapshot")
+    parser.add_argument('--prefetch', type=int, default=2, help="snapshots read ahead of the writer")
+    parser.add_argument('-o', '--out', type=str, default=None, help="out file name, default next to the input")
+    parser.add_argument('--dim', type=int, default=3, help="1 2 3 for 1d 2d 3d grid")   # no -d
+    rawprofile.add_argument(parser)
+
+def run(args, parser):
+    files = None
+    if args.series:
+        if args.roi or args.stride or args.quantize or args.derive:
+            parser.error('--series does not take --roi / --stride / --quantize / --derive')
+        import glob
+        files = sorted(glob.glob(args.series))
+        if not files:
+            parser.error(f'no file matches {args.series}')
+    if args.index and args.no_index:
+        parser.error('--index and --no-index exclude each other')
+
+    with rawprofile.profile(args.profile, 'rawtotec'):
+        if files:
+            stem = os.path.splitext(files[0])[0]
+            with rawprofile.stage('format'):
+                write_series(files, args.depth, args.height, args.width,
+                             parse_dtype(args.type),
+                             args.out or f'{stem}_series.{args.format}', args.format, args.tecio,
+                             args.dt, args.t0, args.offset, args.prefetch, args.endian)
+        else:
+            main(args.file,
+                d=args.depth, h=args.height, w=args.width,
+                format=args.format,  target_ndim=args.dim,
+                dtype=parse_dtype(args.type),
+                block=args.block, use_tecio=args.tecio, binary=args.binary,
+                offset=args.offset, mmap=not args.no_mmap,
+                max_memory=parse_size(args.max_memory) if args.max_memory else None,
+                lod=args.lod, lod_filter=args.lod_filter, sigma=args.sigma,
+                brick=parse_brick(args.brick) if args.brick else None, workers=args.workers,
+                threshold=args.threshold, mask=args.mask, out=args.out,
+                roi=parse_roi(args.roi) if args.roi else None, stride=parse_stride(args.stride) if args.stride else None,
+                use_index=not args.no_index, endian=args.endian,
+                quantize=args.quantize, quantize_range=parse_range(args.quantize_range) if args.quantize_range else None,
+                derive=parse_derive(args.derive) if args.derive else None, index_path=args.index)
 
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(conflict_handler="resolve")
-    parser.add_argument('file', nargs='?')  # position args
-    parser.add_argument('-w', '--width', type=int, default=256, help="width")
-    parser.add_argument('-h', '--height', type=int, default=256, help="height")         # override help
-    parser.add_argument('-d', '--depth', type=int, default=256, help="depth")
-    parser.add_argument('-t', '--type', type=str, default="byte", help="data type, byte, float")
-    parser.add_argument('-f', '--format', type=str, default="tec", help="tecplot tec ascii or ply point cloud")
-    parser.add_argument('-b', '--block', action="store_true", default=False, help="datapacking block or point")
-    parser.add_argument('--dim', type=int, default=3, help="1 2 3 for 1d 2d 3d grid")   # no -d
-    args = parser.parse_args()
-    
-    main(args.file, 
-        d=args.depth, h=args.height, w=args.width, 
-        format=args.format,  target_ndim=args.dim, 
-        dtype=np.uint8 if args.type=="byte" else np.float32,
-        block=args.block)
+    add_arguments(parser)
+    run(parser.parse_args(), parser)
 
     # py .\rawtotec.py -d 64 -h 64 -w 64 D:/data/dataset/scivis/foot_64x64x64_uint8.raw --format ply
-    # py .\rawtotec.py -d 64 -h 64 -w 64 D:/data/dataset/scivis/foot_64x64x64_uint8.raw
\ No newline at end of file
+    # py .\rawtotec.py -d 64 -h 64 -w 64 D:/data/dataset/scivis/foot_64x64x64_uint8.raw
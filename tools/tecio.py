@@ -0,0 +1,550 @@
+import os, sys
+import ctypes
+import numpy as np
+
+import rawprofile
+
+# thin ctypes binding to the tecio library built from teciosrc
+#
+# build the shared library with
+#     cmake -DTECIO_BUILD_SHARED=ON ../teciosrc && cmake --build . --target tecio_shared
+# and point TECIO_LIB at it, or drop it next to this file
+
+FILEFORMAT_PLT = 0
+FILEFORMAT_SZL = 1
+
+FILETYPE_FULL = 0
+FILETYPE_GRID = 1
+FILETYPE_SOLUTION = 2
+
+ZONETYPE_ORDERED = 0
+ZONETYPE_FELINESEG = 1
+ZONETYPE_FETRIANGLE = 2
+ZONETYPE_FEQUADRILATERAL = 3
+ZONETYPE_FETETRAHEDRON = 4
+ZONETYPE_FEBRICK = 5
+
+# FieldDataType_e
+FIELDDATATYPE_FLOAT = 1
+FIELDDATATYPE_DOUBLE = 2
+FIELDDATATYPE_INT32 = 3
+FIELDDATATYPE_INT16 = 4
+FIELDDATATYPE_BYTE = 5
+
+# numpy dtype -> (tecio field data type, tecZoneVarWrite*Values, ctype)
+VAR_TYPES = {
+    np.dtype(np.uint8): (FIELDDATATYPE_BYTE, 'tecZoneVarWriteUInt8Values', ctypes.c_uint8),
+    np.dtype(np.int16): (FIELDDATATYPE_INT16, 'tecZoneVarWriteInt16Values', ctypes.c_int16),
+    np.dtype(np.int32): (FIELDDATATYPE_INT32, 'tecZoneVarWriteInt32Values', ctypes.c_int32),
+    np.dtype(np.float32): (FIELDDATATYPE_FLOAT, 'tecZoneVarWriteFloatValues', ctypes.c_float),
+    np.dtype(np.float64): (FIELDDATATYPE_DOUBLE, 'tecZoneVarWriteDoubleValues', ctypes.c_double),
+}
+
+# tecio field data type -> (numpy dtype, tecZoneVarGet*Values, ctype)
+VAR_GET_TYPES = {
+    FIELDDATATYPE_FLOAT: (np.dtype(np.float32), 'tecZoneVarGetFloatValues', ctypes.c_float),
+    FIELDDATATYPE_DOUBLE: (np.dtype(np.float64), 'tecZoneVarGetDoubleValues', ctypes.c_double),
+    FIELDDATATYPE_INT32: (np.dtype(np.int32), 'tecZoneVarGetInt32Values', ctypes.c_int32),
+    FIELDDATATYPE_INT16: (np.dtype(np.int16), 'tecZoneVarGetInt16Values', ctypes.c_int16),
+    FIELDDATATYPE_BYTE: (np.dtype(np.uint8), 'tecZoneVarGetUInt8Values', ctypes.c_uint8),
+}
+
+# zone type -> nodes per element, 0 for ordered zones
+NODES_PER_ELEMENT = {
+    ZONETYPE_ORDERED: 0, ZONETYPE_FELINESEG: 2, ZONETYPE_FETRIANGLE: 3,
+    ZONETYPE_FEQUADRILATERAL: 4, ZONETYPE_FETETRAHEDRON: 4, ZONETYPE_FEBRICK: 8,
+}
+
+VALUE_LOCATION_CELLCENTERED = 0
+VALUE_LOCATION_NODAL = 1
+
+_LIB_NAMES = ['tecio_shared', 'tecio']
+_lib = None
+
+class TecioError(RuntimeError):
+    pass
+
+def _lib_file_names():
+    if sys.platform == 'win32':
+        return [f'{n}.dll' for n in _LIB_NAMES]
+    if sys.platform == 'darwin':
+        return [f'lib{n}.dylib' for n in _LIB_NAMES]
+    return [f'lib{n}.so' for n in _LIB_NAMES]
+
+def _find_library():
+    env = os.environ.get('TECIO_LIB')
+    if env:
+        return env
+    here = os.path.dirname(os.path.abspath(__file__))
+    dirs = [here, os.path.join(here, '..', 'build'), os.path.join(here, '..', 'teciosrc', 'build')]
+    for d in dirs:
+        for name in _lib_file_names():
+            path = os.path.join(d, name)
+            if os.path.isfile(path):
+                return path
+    # let the loader search the system path
+    return _lib_file_names()[0]
+
+def _declare(lib):
+    i32, i64, p = ctypes.c_int32, ctypes.c_int64, ctypes.c_void_p
+    pi32, pp = ctypes.POINTER(ctypes.c_int32), ctypes.POINTER(ctypes.c_void_p)
+    c_str = ctypes.c_char_p
+    protos = {
+        'tecFileWriterOpen': [c_str, c_str, c_str, i32, i32, i32, p, pp],
+        'tecFileWriterClose': [pp],
+        'tecZoneCreateIJK': [p, c_str, i64, i64, i64, pi32, pi32, pi32, pi32, i32, i64, i32, pi32],
+        'tecZoneAddAuxData': [p, i32, c_str, c_str],
+        'tecVarAddAuxData': [p, i32, c_str, c_str],
+        'tecZoneSetUnsteadyOptions': [p, i32, ctypes.c_double, i32],
+        'tecIJKPartitionCreate': [p, i32, i32, i64, i64, i64, i64, i64, i64],
+        # classic plt api
+        'tecini142': [c_str, c_str, c_str, c_str, pi32, pi32, pi32, pi32],
+        'teczne142': [c_str] + [pi32] * 7 + [ctypes.POINTER(ctypes.c_double)] + [pi32] * 12,
+        'tecdat142': [pi32, p, pi32],
+        'teczauxstr142': [c_str, c_str],
+        'tecvauxstr142': [pi32, c_str, c_str],
+        'tecend142': [],
+    }
+    for _, func_name, ctype in VAR_TYPES.values():
+        protos[func_name] = [p, i32, i32, i32, i64, ctypes.POINTER(ctype)]
+    # reader api, strings are allocated by the library and freed with tecStringFree
+    ps, pi64 = ctypes.POINTER(c_str), ctypes.POINTER(ctypes.c_int64)
+    protos.update({
+        'tecFileReaderOpen': [c_str, pp],
+        'tecFileReaderClose': [pp],
+        'tecDataSetGetTitle': [p, ps],
+        'tecDataSetGetNumVars': [p, pi32],
+        'tecDataSetGetNumZones': [p, pi32],
+        'tecDataSetAuxDataGetNumItems': [p, pi32],
+        'tecDataSetAuxDataGetItem': [p, i32, ps, ps],
+        'tecVarAuxDataGetNumItems': [p, i32, pi32],
+        'tecVarAuxDataGetItem': [p, i32, i32, ps, ps],
+        'tecVarGetName': [p, i32, ps],
+        'tecZoneGetTitle': [p, i32, ps],
+        'tecZoneGetType': [p, i32, pi32],
+        'tecZoneGetIJK': [p, i32, pi64, pi64, pi64],
+        'tecZoneGetSolutionTime': [p, i32, ctypes.POINTER(ctypes.c_double)],
+        'tecZoneGetStrandID': [p, i32, pi32],
+        'tecZoneAuxDataGetNumItems': [p, i32, pi32],
+        'tecZoneAuxDataGetItem': [p, i32, i32, ps, ps],
+        'tecZoneVarGetType': [p, i32, i32, pi32],
+        'tecZoneVarGetNumValues': [p, i32, i32, pi64],
+        'tecZoneVarGetSharedZone': [p, i32, i32, pi32],
+        'tecZoneVarGetValueLocation': [p, i32, i32, pi32],
+        'tecZoneVarIsPassive': [p, i32, i32, pi32],
+        'tecZoneNodeMapIs64Bit': [p, i32, pi32],
+        'tecZoneNodeMapGetNumValues': [p, i32, i64, pi64],
+        'tecZoneNodeMapGet': [p, i32, i64, i64, pi32],
+        'tecZoneNodeMapGet64': [p, i32, i64, i64, pi64],
+    })
+    for _, func_name, ctype in VAR_GET_TYPES.values():
+        protos[func_name] = [p, i32, i32, i64, i64, ctypes.POINTER(ctype)]
+    for name, argtypes in protos.items():
+        func = getattr(lib, name)
+        func.argtypes = argtypes
+        func.restype = ctypes.c_int32
+    lib.tecStringFree.argtypes = [ps]
+    lib.tecStringFree.restype = None
+    return lib
+
+def load_library(path:str = None):
+    global _lib
+    if path is None and _lib is not None:
+        return _lib
+    path = path or _find_library()
+    try:
+        lib = _declare(ctypes.CDLL(path))
+    except OSError as e:
+        raise TecioError(f'can not load tecio library {path}, build teciosrc with TECIO_BUILD_SHARED=ON or set TECIO_LIB: {e}')
+    if _lib is None:
+        _lib = lib
+    return lib
+
+def _check(ret, func_name):
+    if ret != 0:
+        raise TecioError(f'{func_name} failed with {ret}')
+
+def _int32_array(values):
+    if values is None:
+        return None
+    return (ctypes.c_int32 * len(values))(*values)
+
+def var_type_of(dtype):
+    dtype = np.dtype(dtype)
+    if dtype not in VAR_TYPES:
+        raise ValueError(f'dtype not supported by tecio: {dtype}, must be one of {[str(t) for t in VAR_TYPES]}')
+    return VAR_TYPES[dtype][0]
+
+class FileWriter:
+    """
+    szplt writer on top of tecFileWriterOpen.
+
+    zones and variables are 1 based as in tecio. values are handed to the
+    library as pointers into the numpy buffer, no copy is made when the array
+    is already contiguous and of a supported dtype.
+    """
+
+    def __init__(self, file_path:str, title:str, variables, default_dtype=np.float32, lib=None):
+        self.lib = lib or load_library()
+        self.handle = ctypes.c_void_p()
+        ret = self.lib.tecFileWriterOpen(
+            file_path.encode(), title.encode(), ','.join(variables).encode(),
+            FILEFORMAT_SZL, FILETYPE_FULL, var_type_of(default_dtype),
+            None, ctypes.byref(self.handle))
+        _check(ret, 'tecFileWriterOpen')
+        self.file_path = file_path
+        self.num_vars = len(variables)
+
+    def zone_create_ijk(self, title:str, imax:int, jmax:int, kmax:int, dtypes=None, share_var_from_zone=None):
+        # share_var_from_zone: per variable the 1 based zone to take the values from, 0 for none
+        var_types = None if dtypes is None else _int32_array([var_type_of(t) for t in dtypes])
+        zone = ctypes.c_int32()
+        ret = self.lib.tecZoneCreateIJK(
+            self.handle, title.encode(), imax, jmax, kmax,
+            var_types, _int32_array(share_var_from_zone), None, None, 0, 0, 0, ctypes.byref(zone))
+        _check(ret, 'tecZoneCreateIJK')
+        return zone.value
+
+    def ijk_partition_create(self, zone:int, partition:int, imin:int, jmin:int, kmin:int, imax:int, jmax:int, kmax:int):
+        # partitions are 1 based, the ranges 1 based and inclusive, neighbours share their boundary nodes
+        ret = self.lib.tecIJKPartitionCreate(self.handle, zone, partition, imin, jmin, kmin, imax, jmax, kmax)
+        _check(ret, 'tecIJKPartitionCreate')
+
+    def zone_set_unsteady_options(self, zone:int, solution_time:float, strand_id:int):
+        _check(self.lib.tecZoneSetUnsteadyOptions(self.handle, zone, solution_time, strand_id), 'tecZoneSetUnsteadyOptions')
+
+    def zone_add_aux_data(self, zone:int, name:str, value):
+        _check(self.lib.tecZoneAddAuxData(self.handle, zone, name.encode(), str(value).encode()), 'tecZoneAddAuxData')
+
+    def var_add_aux_data(self, var:int, name:str, value):
+        _check(self.lib.tecVarAddAuxData(self.handle, var, name.encode(), str(value).encode()), 'tecVarAddAuxData')
+
+    def zone_var_write(self, zone:int, var:int, values, partition:int = 0):
+        # values in the other byte order are swapped on the way, in a contiguous copy
+        values = np.ascontiguousarray(values, dtype=np.asarray(values).dtype.newbyteorder('='))
+        if values.dtype not in VAR_TYPES:
+            raise ValueError(f'dtype not supported by tecio: {values.dtype}')
+        _, func_name, ctype = VAR_TYPES[values.dtype]
+        func = getattr(self.lib, func_name)
+        with rawprofile.stage('write'):
+            ret = func(self.handle, zone, var, partition, values.size, values.ctypes.data_as(ctypes.POINTER(ctype)))
+        _check(ret, func_name)
+
+    def close(self):
+        if self.handle:
+            # szplt is compressed and written out here
+            with rawprofile.stage('write'):
+                _check(self.lib.tecFileWriterClose(ctypes.byref(self.handle)), 'tecFileWriterClose')
+            self.handle = ctypes.c_void_p()
+            _count_written(self.file_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def _count_written(file_path):
+    # the library writes the file itself, its size is what was written
+    if rawprofile.enabled() and os.path.exists(file_path):
+        rawprofile.count(written=os.path.getsize(file_path))
+
+class ClassicFileWriter:
+    """
+    plt writer on top of the tec*142 api, tecFileWriterOpen does not write plt yet.
+
+    the classic api only takes float or double values, other dtypes are
+    converted per call. only one classic file can be open per process.
+    """
+
+    def __init__(self, file_path:str, title:str, variables, lib=None):
+        self.lib = lib or load_library()
+        i32 = ctypes.c_int32
+        ret = self.lib.tecini142(
+            title.encode(), ' '.join(variables).encode(), file_path.encode(), b'.',
+            i32(FILEFORMAT_PLT), i32(FILETYPE_FULL), i32(0), i32(0))
+        _check(ret, 'tecini142')
+        self.file_path = file_path
+        self.is_open = True
+
+    def zone_create_ijk(self, title:str, imax:int, jmax:int, kmax:int, solution_time:float = 0.0, strand_id:int = 0,
+                        share_var_from_zone=None):
+        # values of shared variables are not written, zone_var_write skips them
+        i32 = ctypes.c_int32
+        zero = i32(0)
+        ret = self.lib.teczne142(
+            title.encode(), i32(ZONETYPE_ORDERED), i32(imax), i32(jmax), i32(kmax),
+            zero, zero, zero, ctypes.c_double(solution_time), i32(strand_id), zero,
+            i32(1),                     # block
+            zero, zero, zero, zero, zero,
+            None, None, _int32_array(share_var_from_zone), zero)
+        _check(ret, 'teczne142')
+
+    def zone_add_aux_data(self, name:str, value):
+        # aux data of the current zone
+        _check(self.lib.teczauxstr142(name.encode(), str(value).encode()), 'teczauxstr142')
+
+    def var_add_aux_data(self, var:int, name:str, value):
+        # var is 1 based
+        _check(self.lib.tecvauxstr142(ctypes.byref(ctypes.c_int32(var)), name.encode(), str(value).encode()), 'tecvauxstr142')
+
+    def zone_var_write(self, values):
+        # values of the current variable, may be called several times per variable
+        values = np.asarray(values)
+        double = values.dtype.newbyteorder('=') == np.float64
+        values = np.ascontiguousarray(values, dtype=np.float64 if double else np.float32)
+        i32 = ctypes.c_int32
+        with rawprofile.stage('write'):
+            ret = self.lib.tecdat142(i32(values.size), values.ctypes.data_as(ctypes.c_void_p), i32(values.dtype == np.float64))
+        _check(ret, 'tecdat142')
+
+    def close(self):
+        if self.is_open:
+            with rawprofile.stage('write'):
+                _check(self.lib.tecend142(), 'tecend142')
+            self.is_open = False
+            _count_written(self.file_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def _get_strings(lib, name:str, *args, count:int = 1):
+    # call a reader function with `count` char ** outputs, the strings are freed after decoding
+    texts = [ctypes.c_char_p() for _ in range(count)]
+    _check(getattr(lib, name)(*args, *[ctypes.byref(t) for t in texts]), name)
+    values = [(t.value or b'').decode('latin-1') for t in texts]
+    for t in texts:
+        lib.tecStringFree(ctypes.byref(t))
+    return values
+
+def _get_string(lib, name:str, *args):
+    return _get_strings(lib, name, *args)[0]
+
+def _get_int(lib, name:str, *args, ctype = ctypes.c_int32):
+    value = ctype()
+    _check(getattr(lib, name)(*args, ctypes.byref(value)), name)
+    return value.value
+
+class _LRUCache:
+    # arrays by key, the least recently used are dropped when their bytes go over the budget
+
+    def __init__(self, max_bytes:int):
+        from collections import OrderedDict
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.items = OrderedDict()
+
+    def get(self, key):
+        value = self.items.get(key)
+        if value is not None:
+            self.items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if value.nbytes > self.max_bytes:
+            return
+        old = self.items.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        self.items[key] = value
+        self.nbytes += value.nbytes
+        while self.nbytes > self.max_bytes:
+            _, dropped = self.items.popitem(last=False)
+            self.nbytes -= dropped.nbytes
+
+    def clear(self):
+        self.items.clear()
+        self.nbytes = 0
+
+class ReaderZone:
+    """
+    one zone of a FileReader, the header is read on open, values on access.
+
+    zone[var] (name or 1 based index) is the array of a variable in its
+    native dtype, (K, J, I) for ordered zones, (nodes,) or (cells,) for fe
+    zones, None for a passive variable. arrays coming from the cache are
+    read only, use FileReader.read(..., out=) for a writable copy.
+    """
+
+    def __init__(self, reader, zone:int):
+        lib, handle = reader.lib, reader.handle
+        self.reader = reader
+        self.zone = zone
+        self.title = _get_string(lib, 'tecZoneGetTitle', handle, zone)
+        self.zone_type = _get_int(lib, 'tecZoneGetType', handle, zone)
+        ijk = [ctypes.c_int64() for _ in range(3)]
+        _check(lib.tecZoneGetIJK(handle, zone, *[ctypes.byref(v) for v in ijk]), 'tecZoneGetIJK')
+        self.ijk = tuple(v.value for v in ijk)
+        self.solution_time = _get_int(lib, 'tecZoneGetSolutionTime', handle, zone, ctype=ctypes.c_double)
+        self.strand_id = _get_int(lib, 'tecZoneGetStrandID', handle, zone)
+        self.aux_data = dict(_get_strings(lib, 'tecZoneAuxDataGetItem', handle, zone, item, count=2)
+                             for item in range(1, _get_int(lib, 'tecZoneAuxDataGetNumItems', handle, zone) + 1))
+
+    @property
+    def is_ordered(self):
+        return self.zone_type == ZONETYPE_ORDERED
+
+    @property
+    def shape(self):
+        # nodes, (K, J, I) for ordered zones, for fe zones I is the node count and J the cell count
+        i, j, k = self.ijk
+        return (k, j, i) if self.is_ordered else (i,)
+
+    @property
+    def cell_shape(self):
+        i, j, k = self.ijk
+        return tuple(max(n - 1, 1) for n in (k, j, i)) if self.is_ordered else (j,)
+
+    @property
+    def num_elements(self):
+        return 0 if self.is_ordered else self.ijk[1]
+
+    def var_dtype(self, var):
+        return self.reader.var_dtype(self.zone, var)
+
+    def __getitem__(self, var):
+        return self.reader.read(self.zone, var)
+
+    @property
+    def connectivity(self):
+        return self.reader.connectivity(self.zone)
+
+    def __repr__(self):
+        return f'ReaderZone({self.zone}, "{self.title}", shape={self.shape})'
+
+class FileReader:
+    """
+    szplt reader on top of tecFileReaderOpen.
+
+    opening reads the title, variable names and zone headers only, values
+    are read when a zone variable is accessed, straight from the library into
+    a preallocated array of the variable's own dtype (no float conversion).
+    arrays are kept in an LRU cache of `cache_bytes`, variables shared
+    between zones are read and cached once. zones and variables are 1 based
+    as in tecio, variables can also be given by name.
+    """
+
+    def __init__(self, file_path:str, cache_bytes:int = 256 << 20, lib=None):
+        with open(file_path, 'rb') as f:
+            if f.read(5) == b'#!TDV':
+                raise TecioError(f'{file_path} is a plt file, tecFileReaderOpen only reads szplt')
+        self.lib = lib or load_library()
+        self.file_path = file_path
+        self.handle = ctypes.c_void_p()
+        _check(self.lib.tecFileReaderOpen(file_path.encode(), ctypes.byref(self.handle)), 'tecFileReaderOpen')
+        lib, handle = self.lib, self.handle
+        self.cache = _LRUCache(cache_bytes)
+        self.title = _get_string(lib, 'tecDataSetGetTitle', handle)
+        self.variables = [_get_string(lib, 'tecVarGetName', handle, var)
+                          for var in range(1, _get_int(lib, 'tecDataSetGetNumVars', handle) + 1)]
+        self.aux_data = dict(_get_strings(lib, 'tecDataSetAuxDataGetItem', handle, item, count=2)
+                             for item in range(1, _get_int(lib, 'tecDataSetAuxDataGetNumItems', handle) + 1))
+        # variable name -> its aux data
+        self.var_aux_data = {name: dict(_get_strings(lib, 'tecVarAuxDataGetItem', handle, var, item, count=2)
+                                        for item in range(1, _get_int(lib, 'tecVarAuxDataGetNumItems', handle, var) + 1))
+                             for var, name in enumerate(self.variables, 1)}
+        self.zones = [ReaderZone(self, zone) for zone in range(1, _get_int(lib, 'tecDataSetGetNumZones', handle) + 1)]
+
+    def var_index(self, var):
+        if isinstance(var, str):
+            if var not in self.variables:
+                raise KeyError(f'variable not found: {var}, variables are {self.variables}')
+            return self.variables.index(var) + 1
+        if not 1 <= var <= len(self.variables):
+            raise IndexError(f'variable {var} out of range 1..{len(self.variables)}')
+        return int(var)
+
+    def var_dtype(self, zone:int, var):
+        field_type = _get_int(self.lib, 'tecZoneVarGetType', self.handle, zone, self.var_index(var))
+        if field_type not in VAR_GET_TYPES:
+            raise TecioError(f'zone {zone} variable {var}: field data type {field_type} not supported')
+        return VAR_GET_TYPES[field_type][0]
+
+    def _var_shape(self, zone:ReaderZone, var:int, count:int):
+        location = _get_int(self.lib, 'tecZoneVarGetValueLocation', self.handle, zone.zone, var)
+        shape = zone.shape if location == VALUE_LOCATION_NODAL else zone.cell_shape
+        # ordered cell centered values may be stored with the node dimensions
+        for candidate in (shape, zone.shape):
+            if int(np.prod(candidate)) == count:
+                return candidate
+        return (count,)
+
+    def read(self, zone:int, var, out = None):
+        """
+        values of a zone variable, from the cache or the library.
+
+        out: a contiguous array of the variable's dtype and size to fill instead,
+        the values are then not cached. returns None for passive variables.
+        """
+        lib, handle = self.lib, self.handle
+        var = self.var_index(var)
+        if _get_int(lib, 'tecZoneVarIsPassive', handle, zone, var):
+            return None
+        source = _get_int(lib, 'tecZoneVarGetSharedZone', handle, zone, var) or zone
+        values = self.cache.get((source, var)) if out is None else None
+        if values is not None:
+            return values
+        count = _get_int(lib, 'tecZoneVarGetNumValues', handle, source, var, ctype=ctypes.c_int64)
+        dtype = self.var_dtype(source, var)
+        if out is None:
+            values = np.empty(self._var_shape(self.zones[source - 1], var, count), dtype=dtype)
+        else:
+            if out.dtype != dtype or out.size != count or not out.flags.c_contiguous:
+                raise ValueError(f'out must be a contiguous {dtype} array of {count} values, got {out.dtype} {out.shape}')
+            values = out
+        _, func_name, ctype = VAR_GET_TYPES[_get_int(lib, 'tecZoneVarGetType', handle, source, var)]
+        func = getattr(lib, func_name)
+        with rawprofile.stage('load'):
+            _check(func(handle, source, var, 1, count, values.ctypes.data_as(ctypes.POINTER(ctype))), func_name)
+        rawprofile.count(read=values.nbytes)
+        if out is None:
+            values.flags.writeable = False
+            self.cache.put((source, var), values)
+        return values
+
+    def connectivity(self, zone:int):
+        # (cells, nodes per cell) zero based int64 node indices of a fe zone, None for ordered zones
+        z = self.zones[zone - 1]
+        if z.is_ordered:
+            return None
+        lib, handle = self.lib, self.handle
+        nodes = self.cache.get((zone, 0))
+        if nodes is not None:
+            return nodes
+        count = _get_int(lib, 'tecZoneNodeMapGetNumValues', handle, zone, z.num_elements, ctype=ctypes.c_int64)
+        if _get_int(lib, 'tecZoneNodeMapIs64Bit', handle, zone):
+            nodes = np.empty(count, dtype=np.int64)
+            _check(lib.tecZoneNodeMapGet64(handle, zone, 1, z.num_elements, nodes.ctypes.data_as(ctypes.POINTER(ctypes.c_int64))), 'tecZoneNodeMapGet64')
+        else:
+            nodes32 = np.empty(count, dtype=np.int32)
+            _check(lib.tecZoneNodeMapGet(handle, zone, 1, z.num_elements, nodes32.ctypes.data_as(ctypes.POINTER(ctypes.c_int32))), 'tecZoneNodeMapGet')
+            nodes = nodes32.astype(np.int64)
+        nodes -= 1
+        nodes = nodes.reshape(z.num_elements, -1)
+        nodes.flags.writeable = False
+        self.cache.put((zone, 0), nodes)
+        return nodes
+
+    def __getitem__(self, zone:int):
+        return self.zones[zone - 1]
+
+    def __len__(self):
+        return len(self.zones)
+
+    def __iter__(self):
+        return iter(self.zones)
+
+    def close(self):
+        if self.handle:
+            _check(self.lib.tecFileReaderClose(ctypes.byref(self.handle)), 'tecFileReaderClose')
+            self.handle = ctypes.c_void_p()
+            self.cache.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,790 @@
+import os, re, time
+import numpy as np
+import argparse
+
+from rawio import parse_dtype, raw_dtype, RAW_TYPES, ENDIANS
+import rawprofile
+
+# streaming reader of tecplot ascii (.tec) files into numpy
+#
+# header records (TITLE, VARIABLES, ZONE, AUXDATA, ...) are parsed line by line.
+# the numeric section of a zone is read in chunks of text cut at whitespace and
+# converted with byte operations over the whole chunk: token edges from one
+# comparison, decimal points, exponents and N*value repeats located with
+# flatnonzero, then the digits are summed column by column over all tokens at
+# once. values go straight into the preallocated arrays of the zone, there is
+# no python work per number.
+
+_PARSE_CHUNK = 1 << 18
+_READ_CHUNK = 4 << 20
+
+# numbers
+
+_P10 = 10.0 ** np.arange(32)
+_EXACT = 2.0 ** 53
+
+def _pow10_table(low:int = -350, high:int = 308):
+    # 10^s as a double-double hi + lo for s in [low, high], hi split in two 26 bit
+    # halves. beyond 10^+-200 the powers are stored times 2^-+600 and the product
+    # is scaled back by the power of two (_POW_SHIFT), which is exact, so lo and
+    # the error terms of the product never get subnormal or overflow
+    from fractions import Fraction
+    from math import frexp, ldexp, floor
+    hi, lo, hi_hi, shift = [], [], [], []
+    for s in range(low, high + 1):
+        k = 600 if s < -200 else -600 if s > 200 else 0
+        exact = Fraction(10) ** s * Fraction(2) ** k
+        shift.append(2.0 ** -k)
+        h = float(exact)
+        m, e = frexp(h)
+        hi.append(h)
+        lo.append(float(exact - Fraction(h)))
+        hi_hi.append(ldexp(floor(ldexp(m, 26)), e - 26))
+    hi, lo, hi_hi, shift = (np.array(t) for t in (hi, lo, hi_hi, shift))
+    return low, hi, lo, hi_hi, hi - hi_hi, shift
+
+_POW_LOW, _POW_HI, _POW_LO, _POW_HI_HI, _POW_HI_LO, _POW_SHIFT = _pow10_table()
+# below 2^-1021 a result may be subnormal, where the product rounded to 53 bits
+# would be rounded a second time, parse_numbers takes float() of those tokens
+_TINY = 2.0 ** -1021
+_SPLIT = 134217729.0
+
+def _scale_exact(m, err, scale):
+    # (m + err) * 10^scale rounded once: dekker product with the double-double power of ten
+    i = scale - _POW_LOW
+    ph = _POW_HI[i]
+    p = m * ph
+    c = m * _SPLIT
+    m_hi = c - (c - m)
+    m_lo = m - m_hi
+    p_err = ((m_hi * _POW_HI_HI[i] - p) + m_hi * _POW_HI_LO[i] + m_lo * _POW_HI_HI[i]) + m_lo * _POW_HI_LO[i]
+    return (p + (p_err + (m * _POW_LO[i] + err * ph))) * _POW_SHIFT[i]
+
+def _token_edges(b):
+    # start and end of every run of bytes > 32 (not whitespace)
+    tok = np.zeros(b.size + 2, dtype=bool)
+    np.greater(b, 32, out=tok[1:-1])
+    edges = np.flatnonzero(tok[1:] != tok[:-1])
+    return edges[0::2], edges[1::2]
+
+def _tokens_split_at(starts, ends, positions, what:str):
+    # index of the token ending at each position, the token after it must start right behind
+    n = starts.size
+    if 2 * positions.size == n and np.array_equal(ends[0::2], positions):
+        token = np.arange(0, n, 2)
+    else:
+        token = np.searchsorted(ends, positions)
+        if np.any(ends[np.minimum(token, n - 1)] != positions):
+            raise ValueError(f'not a number: {what} without a number before it')
+    if np.any(token + 1 >= n) or np.any(starts[np.minimum(token + 1, n - 1)] != positions + 1):
+        raise ValueError(f'not a number: {what} without a number after it')
+    return token
+
+def _digit_bytes(b):
+    # the digit value of every byte of b, 0 for the others, shifted by one so
+    # index 0 (before the first byte) counts as 0 too
+    digit = np.empty(b.size + 1, dtype=np.uint8)
+    digit[0] = 0
+    np.subtract(b, np.uint8(48), out=digit[1:])
+    digit *= digit < 10
+    return digit
+
+def _digits(digit, starts, ends, frac, lens):
+    # integer value of the digits of every token, the sign and the decimal point
+    # skipped. columns go from the right over all tokens at once, an index that
+    # runs past the start of its token stays on the separator before it, which
+    # counts as 0. the low 8 and the higher digits are summed apart so both sums
+    # are exact. digit: _digit_bytes. returns the value rounded to float64 and
+    # the rounding error (None when exact)
+    # every column is a pass over all tokens, so short tokens among long ones
+    # (the "x y z value" lines of POINT data) are summed apart over their own
+    # columns, split at the length of the fewest column passes
+    n, width = starts.size, int(lens.max())
+    split = width
+    if width > 8:
+        tokens_upto = np.cumsum(np.bincount(lens, minlength=width + 1))
+        passes = tokens_upto * np.arange(width + 1) + (n - tokens_upto) * width
+        split = int(np.argmin(passes))
+    if split < width and passes[split] < 0.75 * n * width:
+        long = lens > split
+        values = np.empty(n)
+        err = np.zeros(n)
+        for part in (np.flatnonzero(~long), np.flatnonzero(long)):
+            values[part], part_err = _digit_columns(digit, starts[part], ends[part],
+                                                    frac[part] if frac is not None else None, lens[part])
+            if part_err is not None:
+                err[part] = part_err
+        return values, err
+    return _digit_columns(digit, starts, ends, frac, lens)
+
+def _digit_columns(digit, starts, ends, frac, lens):
+    # _digits of tokens, digit: the digit value of every byte, shifted by one
+    n = starts.size
+    width, shortest = int(lens.max()), int(lens.min())
+    points = range(int(frac.min()), int(frac.max()) + 1) if frac is not None else ()
+    index = ends + 1
+    lo = np.zeros(n)
+    hi = np.zeros(n) if width > 8 else None
+    d = np.empty(n, dtype=np.uint8)
+    term = np.empty(n)
+    for c in range(width):
+        index -= 1
+        if c in points:
+            # step over the decimal point, frac digits right of it
+            index -= frac == c
+        if c >= shortest:
+            np.maximum(index, starts, out=index)
+        np.take(digit, index, out=d)
+        if c < 8:
+            np.multiply(d, _P10[c], out=term)
+            lo += term
+        else:
+            np.multiply(d, _P10[min(c - 8, 31)], out=term)
+            hi += term
+    if hi is None:
+        return lo, None
+    hi *= 1e8
+    values = hi + lo
+    return values, (hi - values) + lo
+
+def _scale(values, err, scale):
+    # values * 10^scale in place. exact mantissas and powers take one rounding
+    # in a division or product, the others go through the double-double power of ten
+    exact = np.abs(scale) <= 22
+    if err is not None:
+        exact &= np.abs(values) < _EXACT
+    if exact.all():
+        values /= _P10.take(np.maximum(-scale, 0))
+        if scale.max() > 0:
+            values *= _P10.take(np.maximum(scale, 0))
+        return values
+    down = np.flatnonzero(exact & (scale < 0))
+    values[down] /= _P10[-scale[down]]
+    up = np.flatnonzero(exact & (scale > 0))
+    values[up] *= _P10[scale[up]]
+    rest = np.flatnonzero(~exact & (scale != 0))
+    if rest.size:
+        top = _POW_LOW + _POW_HI.size - 1
+        m = values[rest]
+        e = err[rest] if err is not None else np.zeros(rest.size)
+        s = np.clip(scale[rest], _POW_LOW, top)
+        with np.errstate(over='ignore'):
+            r = _scale_exact(m, e, s)
+            # powers below the table in two steps (mantissas of more than 40
+            # digits for a normal result), beyond the float64 range inf
+            small = scale[rest] < _POW_LOW
+            r[small] *= 10.0 ** (scale[rest] - s)[small].astype(np.float64)
+            huge = (scale[rest] > top) & (m != 0)
+            r[huge] = np.copysign(np.inf, m[huge])
+        values[rest] = r
+    return values
+
+_NAN = (ord('n') << 16) | (ord('a') << 8) | ord('n')
+_INF = (ord('i') << 16) | (ord('n') << 8) | ord('f')
+
+def _special_tokens(b, starts, ends, letters):
+    # nan and inf (as written by python and numpy) become 0 in a copy of b,
+    # returns the copy and (tokens, is nan) to set after the digits
+    token = np.unique(np.searchsorted(ends, letters, side='right'))
+    first = starts[token] + ((b[starts[token]] == 45) | (b[starts[token]] == 43))
+    if np.any(ends[token] - first != 3):
+        bad = starts[token][np.flatnonzero(ends[token] - first != 3)[0]]
+        raise ValueError(f'not a number near: {bytes(b[bad:bad + 20])!r}')
+    word = (b[first].astype(np.int64) << 16) | (b[first + 1].astype(np.int64) << 8) | b[first + 2]
+    nan = word == _NAN
+    if not np.all(nan | (word == _INF)):
+        bad = first[np.flatnonzero(~(nan | (word == _INF)))[0]]
+        raise ValueError(f'not a number near: {bytes(b[bad:bad + 20])!r}')
+    if not b.flags.writeable:
+        b = b.copy()
+    b[first[:, None] + np.arange(3)] = 48
+    return b, (token, nan)
+
+def _tokens_per_line(b, ends):
+    # the count of tokens on every line when it is the same for all lines of b
+    # (the last one may miss its newline), else 0
+    n = ends.size
+    after = b[np.minimum(ends, b.size - 1)]
+    line_ends = np.flatnonzero((after == 10) | (after == 13))
+    if line_ends.size == 0:
+        return 0
+    columns = int(line_ends[0]) + 1
+    if n % columns or not n // columns - 1 <= line_ends.size <= n // columns:
+        return 0
+    if not np.array_equal(line_ends, np.arange(columns - 1, n, columns)[:line_ends.size]):
+        return 0
+    return columns
+
+def _mantissas(b, digit, starts, ends, frac, signed):
+    # signed integer value of the digits of every token and its rounding error (_digits)
+    lens = ends - starts
+    if frac is not None:
+        lens -= frac >= 0
+    if np.any(lens - signed <= 0):
+        raise ValueError('not a number: no digits')
+    values, err = _digits(digit, starts, ends, frac, lens)
+    negative = b[starts] == 45
+    np.negative(values, where=negative, out=values)
+    if err is not None:
+        np.negative(err, where=negative, out=err)
+    return values, err
+
+def _scale_tokens(values, err, scale, source, starts, last):
+    # values * 10^scale in place, last: the end of every number in source
+    if not np.any(scale):
+        return
+    _scale(values, err, scale)
+    # subnormal (and zero) results, only possible below 10^-307
+    tiny = np.flatnonzero((scale < -307) & (np.abs(values) < _TINY))
+    for i in tiny:
+        values[i] = float(source[starts[i]:last[i]].tobytes())
+
+def parse_numbers(text):
+    """
+    Parse whitespace or comma separated numbers into a float64 array.
+
+    text is bytes or a memoryview of ascii text, as in tec data sections:
+    integers, decimals, exponents (e or E), N*value repeats, nan and inf. values are
+    correctly rounded, as float() of the number, subnormals included (numbers of
+    more than 18 digits may be one ulp off).
+    raises ValueError on anything else.
+    """
+    b = source = np.frombuffer(text, dtype=np.uint8)
+    # commas are separators, the 'e' of an exponent and the '*' of a repeat
+    # split a number in two tokens, joined again below
+    commas = b == 44
+    stars = np.flatnonzero(b == 42)
+    epos = np.flatnonzero((b | 32) == 101)
+    if stars.size or epos.size or commas.any():
+        b = b.copy()
+        b[commas] = 32
+        b[stars] = 32
+        b[epos] = 32
+    starts, ends = _token_edges(b)
+    n = starts.size
+    if n == 0:
+        if stars.size or epos.size:
+            raise ValueError('not a number: exponent or repeat without a number')
+        return np.zeros(0)
+    exp_tokens = _tokens_split_at(starts, ends, epos, 'exponent')
+    count_tokens = _tokens_split_at(starts, ends, stars, 'repeat')
+
+    valid = (b - np.uint8(48) < 10) | (b <= 32)
+    special = None
+    if not valid.all():
+        letters = np.flatnonzero(b >= 97)
+        if letters.size:
+            b, special = _special_tokens(b, starts, ends, letters)
+            valid = (b - np.uint8(48) < 10) | (b <= 32)
+    if not valid.all():
+        sign = (b == 45) | (b == 43)
+        dot = b == 46
+        if np.any(~(valid | sign | dot)):
+            bad = np.flatnonzero(~(valid | sign | dot))[0]
+            raise ValueError(f'not a number near: {bytes(b[bad:bad + 20])!r}')
+        signed = (b[starts] == 45) | (b[starts] == 43)
+        if np.count_nonzero(sign) != np.count_nonzero(signed):
+            raise ValueError('not a number: sign inside a number')
+    else:
+        signed = np.zeros(n, dtype=bool)
+        dot = None
+
+    # digits right of the decimal point, -1 without one
+    frac = None
+    token = None
+    dots = np.flatnonzero(dot) if dot is not None else None
+    if dots is not None and dots.size:
+        frac = np.full(n, -1, dtype=np.int64)
+        if dots.size == n and np.all((dots > starts) & (dots < ends)):
+            frac = ends - dots - 1
+        elif dots.size == exp_tokens.size and np.all((dots > starts[exp_tokens]) & (dots < ends[exp_tokens])):
+            frac[exp_tokens] = ends[exp_tokens] - dots - 1
+        else:
+            token = np.searchsorted(ends, dots)
+            if np.any(token[1:] == token[:-1]):
+                raise ValueError('not a number: more than one decimal point')
+            frac[token] = ends[token] - dots - 1
+    digit = _digit_bytes(b)
+    columns = 0
+    if token is not None and exp_tokens.size == 0 and count_tokens.size == 0 and special is None:
+        columns = _tokens_per_line(b, ends)
+    if columns > 1:
+        # the same count of numbers on every line, as the "x y z value" lines of POINT
+        # data, with integer columns next to decimal ones: the integer columns are
+        # summed without the long digit passes, decimal points and scales of the others.
+        # the columns only group the tokens, every column with a point is a decimal one
+        decimal = np.bincount(token % columns, minlength=columns) > 0
+        if not decimal.all():
+            values = np.empty(n).reshape(-1, columns)
+            for group in (np.flatnonzero(~decimal), np.flatnonzero(decimal)):
+                cut = (slice(None), group)
+                part_starts, part_ends = starts.reshape(-1, columns)[cut].ravel(), ends.reshape(-1, columns)[cut].ravel()
+                part_frac = frac.reshape(-1, columns)[cut].ravel() if decimal[group[0]] else None
+                part, err = _mantissas(b, digit, part_starts, part_ends, part_frac, signed.reshape(-1, columns)[cut].ravel())
+                if part_frac is not None:
+                    _scale_tokens(part, err, -np.maximum(part_frac, 0), source, part_starts, part_ends)
+                values[cut] = part.reshape(-1, group.size)
+            return values.reshape(-1)
+
+    values, err = _mantissas(b, digit, starts, ends, frac, signed)
+    scale = -np.maximum(frac, 0) if frac is not None else np.zeros(n, dtype=np.int64)
+    keep = None
+    if exp_tokens.size:
+        exponent = exp_tokens + 1
+        mantissa = np.zeros(n, dtype=bool)
+        mantissa[exp_tokens] = True
+        if (frac is not None and np.any(frac[exponent] >= 0)) or mantissa[exponent].any():
+            raise ValueError('not a number: bad exponent')
+        scale[exp_tokens] += values[exponent].astype(np.int64)
+        keep = np.ones(n, dtype=bool)
+        keep[exponent] = False
+    last = ends
+    if exp_tokens.size:
+        last = ends.copy()
+        last[exp_tokens] = ends[exp_tokens + 1]
+    _scale_tokens(values, err, scale, source, starts, last)
+    if special is not None:
+        token, nan = special
+        values[token[nan]] = np.nan
+        values[token[~nan]] = np.copysign(np.inf, values[token[~nan]])
+
+    if count_tokens.size:
+        counts = values[count_tokens]
+        if np.any(counts < 1) or np.any(counts != np.floor(counts)):
+            raise ValueError('not a number: bad N*value repeat count')
+        repeat = np.ones(n, dtype=np.int64) if keep is None else keep.astype(np.int64)
+        repeat[count_tokens + 1] = counts
+        repeat[count_tokens] = 0
+        return np.repeat(values, repeat)
+    return values if keep is None else values[keep]
+
+# file structure
+
+# keywords that start a header record, a line that is neither one of them nor
+# numeric continues the record before it
+_RECORDS = ("TITLE", "VARIABLES", "FILETYPE", "ZONE", "TEXT", "GEOMETRY", "DATASETAUXDATA", "VARAUXDATA",
+            "AUXDATA", "CUSTOMLABELS")
+_NUMBER_START = b'0123456789+-.'
+# the first byte that can not be part of a numeric section: letters other than e/E and
+# those of nan and inf, quotes, comments
+# as a bytes.translate table, 1 for those bytes, much faster than a regex search
+_NOT_NUMERIC = bytes(c in b'ABCDFGHIJKLMNOPQRSTUVWXYZbcdghjklmopqrstuvwxyz"#' for c in range(256))
+_SEPARATORS = (b' ', b'\n', b'\t', b'\r', b',')
+_PARAM = re.compile(r'([A-Za-z]+)\s*=\s*("[^"]*"|\([^()]*\)|[^\s,]+)')
+_VAR_SET = re.compile(r'\[([^\]]*)\]\s*(?:=\s*([^,\s)\]]+))?')
+_AUX = re.compile(r'^\w+\s+("[^"]*"|\S+)\s*=\s*"([^"]*)"')
+# VARAUXDATA 4 SCALE = "0.5", variables 1 based
+_VAR_AUX = re.compile(r'^\w+\s+(\d+)\s+("[^"]*"|\S+)\s*=\s*"([^"]*)"')
+
+# zone type -> nodes per element, 0 for ordered zones
+ZONE_TYPES = {"ORDERED": 0, "FELINESEG": 2, "FETRIANGLE": 3, "FEQUADRILATERAL": 4, "FETETRAHEDRON": 4, "FEBRICK": 8}
+# element types of the old F=FEPOINT / F=FEBLOCK zone headers
+_ELEMENT_TYPES = {"LINESEG": "FELINESEG", "TRIANGLE": "FETRIANGLE", "QUADRILATERAL": "FEQUADRILATERAL",
+                  "TETRAHEDRON": "FETETRAHEDRON", "BRICK": "FEBRICK"}
+
+class _TextStream:
+    # a binary file read in large chunks, header lines and numeric sections are taken from it
+
+    def __init__(self, f, chunk_size:int):
+        self.f = f
+        self.chunk_size = max(chunk_size, 2 * _PARSE_CHUNK)
+        self.data = b''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        # keep the unread tail and append the next chunk, False at the end of the file
+        with rawprofile.stage('load'):
+            chunk = self.f.read(self.chunk_size)
+        rawprofile.count(read=len(chunk))
+        self.data = self.data[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return bool(chunk)
+
+    def peek_line(self):
+        # the next line without its newline, None at the end of the file
+        end = self.data.find(b'\n', self.pos)
+        while end < 0 and not self.eof:
+            self._fill()
+            end = self.data.find(b'\n', self.pos)
+        if end < 0:
+            if self.pos >= len(self.data):
+                return None
+            end = len(self.data)
+        return self.data[self.pos:end]
+
+    def read_line(self):
+        line = self.peek_line()
+        if line is not None:
+            self.pos += len(line) + 1
+        return line
+
+    def _cut(self, end:int):
+        # the last separator before end, so no number is split between two chunks
+        cut = max(self.data.rfind(sep, self.pos, end) for sep in _SEPARATORS)
+        if cut <= self.pos:
+            raise ValueError(f'number longer than {_PARSE_CHUNK} bytes')
+        return cut
+
+    def read_numbers(self, targets, filled:int = 0):
+        """
+        parse the numeric text at the current position into the flat arrays
+        of targets, one after the other, starting at value `filled`. stops
+        at the first byte that can not be part of a number or at the end of
+        the file and returns the count of values filled so far.
+        """
+        total = sum(t.size for t in targets)
+        while filled < total:
+            end = min(self.pos + _PARSE_CHUNK, len(self.data))
+            m = self.data[self.pos:end].translate(_NOT_NUMERIC).find(1)
+            if m >= 0:
+                stop = self.pos + m
+            elif end < len(self.data):
+                stop = self._cut(end)
+            elif not self.eof:
+                self._fill()
+                continue
+            else:
+                stop = end
+            if stop > self.pos:
+                values = parse_numbers(memoryview(self.data)[self.pos:stop])
+                if filled + values.size > total:
+                    raise ValueError(f'more values than the {total} expected')
+                filled = _scatter(targets, filled, values)
+            self.pos = stop
+            if m >= 0 or self.eof:
+                break
+        return filled
+
+def _scatter(targets, offset:int, values):
+    # copy values into the concatenation of the flat targets at offset, returns the new offset
+    filled = offset + values.size
+    for target in targets:
+        if offset >= target.size:
+            offset -= target.size
+            continue
+        n = min(target.size - offset, values.size)
+        target[offset:offset + n] = values[:n]
+        values = values[n:]
+        offset = 0
+        if not values.size:
+            break
+    return filled
+
+def _var_sets(text:str, num_vars:int):
+    # "([1-3,5]=1, [4]=CELLCENTERED)" -> [(zero based var indices, value or None)]
+    sets = []
+    for ranges, value in _VAR_SET.findall(text):
+        index = []
+        for part in ranges.split(','):
+            lo, _, hi = part.strip().partition('-')
+            index += range(int(lo) - 1, int(hi or lo))
+        if any(i < 0 or i >= num_vars for i in index):
+            raise ValueError(f'variable out of range in {text}')
+        sets.append((index, value or None))
+    return sets
+
+class TecZone:
+    """
+    one zone of a tec file.
+
+    ordered zones keep the dimensions their header gives, (K, J, I), (J, I)
+    or (I,), x fastest as in the raw volumes, fe zones have (N,) nodes and
+    their connectivity as (E, nodes per element) zero based int64.
+    zone[name] is the array of a variable, None for passive variables, a
+    shared variable is the array of the zone it comes from. POINT packed
+    variables are columns of one (points, variables) array.
+    """
+
+    def __init__(self, title:str, zone_type:str, shape, num_elements:int = 0, packing:str = "BLOCK",
+                 solution_time:float = None, strand_id:int = None):
+        self.title = title
+        self.zone_type = zone_type
+        self.shape = tuple(shape)
+        self.num_elements = num_elements
+        self.packing = packing
+        self.solution_time = solution_time
+        self.strand_id = strand_id
+        self.variables = {}
+        self.connectivity = None
+        self.aux_data = {}
+
+    @property
+    def num_points(self):
+        return int(np.prod(self.shape))
+
+    @property
+    def cell_shape(self):
+        if self.zone_type == "ORDERED":
+            return tuple(max(n - 1, 1) for n in self.shape)
+        return (self.num_elements,)
+
+    def __getitem__(self, name:str):
+        return self.variables[name]
+
+def _zone_from_header(text:str, variables, zones):
+    # (zone, [(name, location)] of the variables with values in the file, connectivity size)
+    params = {k.upper(): v for k, v in _PARAM.findall(text)}
+    title = params.get("T", "ZONE").strip('"')
+    old_format = params.get("F", "").upper()
+    zone_type = params.get("ZONETYPE", "").upper()
+    if not zone_type:
+        zone_type = _ELEMENT_TYPES.get(params.get("ET", "").upper(), "") if old_format.startswith("FE") else "ORDERED"
+    if zone_type not in ZONE_TYPES:
+        raise ValueError(f'zone {title}: zone type not supported: {zone_type or params.get("ET")}')
+    packing = params.get("DATAPACKING", old_format.replace("FE", "") or "BLOCK").upper()
+    if packing not in ("BLOCK", "POINT"):
+        raise ValueError(f'zone {title}: data packing not known: {packing}')
+    solution_time = float(params["SOLUTIONTIME"]) if "SOLUTIONTIME" in params else None
+    strand_id = int(params["STRANDID"]) if "STRANDID" in params else None
+    if zone_type == "ORDERED":
+        shape = [int(params[k]) for k in ("K", "J", "I") if k in params] or [1]
+        zone = TecZone(title, zone_type, shape, 0, packing, solution_time, strand_id)
+    else:
+        num_nodes = int(params.get("N", params.get("NODES", 0)))
+        num_elements = int(params.get("E", params.get("ELEMENTS", 0)))
+        zone = TecZone(title, zone_type, (num_nodes,), num_elements, packing, solution_time, strand_id)
+
+    # variables with values in the file, the others are shared or passive
+    location = ["NODAL"] * len(variables)
+    for index, value in _var_sets(params.get("VARLOCATION", ""), len(variables)):
+        for i in index:
+            location[i] = (value or "NODAL").upper()
+    written = set(range(len(variables)))
+    for index, value in _var_sets(params.get("VARSHARELIST", ""), len(variables)):
+        source = int(value) if value else len(zones)
+        if not 1 <= source <= len(zones):
+            raise ValueError(f'zone {title}: shares variables with zone {source}, {len(zones)} zones read')
+        for i in index:
+            zone.variables[variables[i]] = zones[source - 1].variables[variables[i]]
+            written.discard(i)
+    for index, _ in _var_sets(params.get("PASSIVEVARLIST", ""), len(variables)):
+        for i in index:
+            zone.variables[variables[i]] = None
+            written.discard(i)
+    fields = [(variables[i], location[i]) for i in sorted(written)]
+    if packing == "POINT" and any(loc != "NODAL" for _, loc in fields):
+        raise ValueError(f'zone {title}: POINT packing needs nodal variables')
+
+    num_connections = 0
+    if zone_type != "ORDERED":
+        if "CONNECTIVITYSHAREZONE" in params:
+            source = int(params["CONNECTIVITYSHAREZONE"])
+            if not 1 <= source <= len(zones):
+                raise ValueError(f'zone {title}: shares connectivity with zone {source}, {len(zones)} zones read')
+            zone.connectivity = zones[source - 1].connectivity
+        else:
+            num_connections = zone.num_elements * ZONE_TYPES[zone_type]
+    return zone, fields, num_connections
+
+class TecReader:
+    """
+    Read a tec file zone by zone.
+
+    TITLE and VARIABLES are read on open, iterating yields the zones in file
+    order, each with its values in memory. values are stored as `dtype`.
+    zones read so far stay referenced, later zones can share their variables.
+    """
+
+    def __init__(self, file_path:str, dtype = np.float64, chunk_size:int = _READ_CHUNK):
+        self.file_path = file_path
+        self.dtype = np.dtype(dtype)
+        self.title = ""
+        self.variables = []
+        self.aux_data = {}
+        # variable name -> its VARAUXDATA
+        self.var_aux_data = {}
+        self.zones = []
+        self._f = open(file_path, "rb")
+        self._text = _TextStream(self._f, chunk_size)
+        self._pending = None
+        while True:
+            record = self._next_record()
+            if record is None or record[0] in ("ZONE", "DATA"):
+                self._pending = record
+                break
+            self._file_record(*record)
+
+    def _next_record(self):
+        # (keyword, text) of the next header record with its continuation lines,
+        # ("DATA", None) before numbers, None at the end of the file
+        if self._pending is not None:
+            record, self._pending = self._pending, None
+            return record
+        while True:
+            line = self._text.peek_line()
+            if line is None:
+                return None
+            stripped = line.strip()
+            if stripped and stripped[:1] in _NUMBER_START:
+                return "DATA", None
+            self._text.read_line()
+            if stripped and not stripped.startswith(b'#'):
+                break
+        text = stripped.decode('latin-1')
+        keyword = re.split(r'[\s=]', text, 1)[0].upper()
+        while True:
+            line = self._text.peek_line()
+            if line is None:
+                break
+            stripped = line.strip()
+            word = re.split(rb'[\s=]', stripped, 1)[0].upper().decode('latin-1')
+            if stripped[:1] in _NUMBER_START or stripped.startswith(b'#') or word in _RECORDS:
+                if stripped:
+                    break
+            self._text.read_line()
+            text += " " + stripped.decode('latin-1')
+        return keyword, text
+
+    def _file_record(self, keyword:str, text:str):
+        rest = text.split("=", 1)[1] if "=" in text else ""
+        if keyword == "TITLE":
+            self.title = rest.strip().strip('"')
+        elif keyword == "VARIABLES":
+            names = re.findall(r'"([^"]*)"', rest)
+            self.variables = names or rest.replace(",", " ").split()
+        elif keyword == "DATASETAUXDATA":
+            m = _AUX.match(text)
+            if m:
+                self.aux_data[m.group(1).strip('"')] = m.group(2)
+        elif keyword == "VARAUXDATA":
+            m = _VAR_AUX.match(text)
+            if m and 1 <= int(m.group(1)) <= len(self.variables):
+                name = self.variables[int(m.group(1)) - 1]
+                self.var_aux_data.setdefault(name, {})[m.group(2).strip('"')] = m.group(3)
+        elif keyword == "GEOMETRY":
+            raise ValueError(f'{self.file_path}: GEOMETRY records are not supported')
+        # FILETYPE, TEXT, CUSTOMLABELS: nothing to read
+
+    def _read_zone(self, text:str):
+        zone, fields, num_connections = _zone_from_header(text, self.variables, self.zones)
+        while True:
+            record = self._next_record()
+            if record is None or record[0] != "AUXDATA":
+                self._pending = record
+                break
+            m = _AUX.match(record[1])
+            if m:
+                zone.aux_data[m.group(1).strip('"')] = m.group(2)
+
+        # preallocated values, BLOCK: one variable after the other, POINT: one point after the other
+        counts = [zone.num_points if loc == "NODAL" else int(np.prod(zone.cell_shape)) for _, loc in fields]
+        if zone.packing == "POINT":
+            values = np.empty((zone.num_points, len(fields)), dtype=self.dtype)
+            for k, (name, _) in enumerate(fields):
+                zone.variables[name] = values[:, k].reshape(zone.shape)
+        else:
+            values = np.empty(sum(counts), dtype=self.dtype)
+            offset = 0
+            for (name, loc), count in zip(fields, counts):
+                shape = zone.shape if loc == "NODAL" else zone.cell_shape
+                zone.variables[name] = values[offset:offset + count].reshape(shape)
+                offset += count
+        targets = [values.reshape(-1)]
+        if num_connections:
+            connectivity = np.empty(num_connections, dtype=np.int64)
+            targets.append(connectivity)
+        total = values.size + num_connections
+
+        if total:
+            if self._pending != ("DATA", None):
+                raise ValueError(f'zone {zone.title} has no data, expected {total} values')
+            self._pending = None
+            filled = 0
+            while True:
+                filled = self._text.read_numbers(targets, filled)
+                if filled == total:
+                    break
+                line = self._text.peek_line()
+                if line is not None and line.lstrip().startswith(b'#'):
+                    self._text.read_line()
+                    continue
+                raise ValueError(f'zone {zone.title} has {filled} values, expected {total}')
+        if num_connections:
+            connectivity -= 1
+            zone.connectivity = connectivity.reshape(zone.num_elements, ZONE_TYPES[zone.zone_type])
+        return zone
+
+    def __iter__(self):
+        while True:
+            record = self._next_record()
+            if record is None:
+                return
+            keyword, text = record
+            if keyword == "ZONE":
+                try:
+                    zone = self._read_zone(text)
+                except ValueError as e:
+                    raise ValueError(f'{self.file_path}: {e}') from e
+                self.zones.append(zone)
+                yield zone
+            elif keyword == "DATA":
+                raise ValueError(f'{self.file_path}: numbers outside of a zone')
+            else:
+                self._file_record(keyword, text)
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def read_tec(file_path:str, dtype = np.float64):
+    """
+    Read a whole tec file.
+
+    Returns:
+    - (title, variable names, zones), see TecZone.
+    """
+    with TecReader(file_path, dtype) as reader:
+        zones = list(reader)
+        return reader.title, reader.variables, zones
+
+def main(file, dtype = np.float64, var:str = None, zone:int = 1, out:str = None, out_dtype = None, endian:str = 'little'):
+    tic = time.time()
+    # parsing the text is the format stage of a reader
+    with rawprofile.stage('format'):
+        title, variables, zones = read_tec(file, dtype)
+    toc = time.time()
+    size = os.path.getsize(file)
+    print(f'read {file}: "{title}", {len(zones)} zones, variables {variables}')
+    for i, z in enumerate(zones, 1):
+        print(f'zone {i}: "{z.title}" {z.zone_type} {z.packing} shape {z.shape}'
+              + (f' elements {z.num_elements}' if z.zone_type != "ORDERED" else '')
+              + (f' time {z.solution_time} strand {z.strand_id}' if z.solution_time is not None else ''))
+        for name, values in z.variables.items():
+            if values is not None and values.size:
+                print(f'    {name}: min {np.nanmin(values)} max {np.nanmax(values)}')
+    print(f'Time:{(toc-tic)*1000:.0f} ms, {size / max(toc - tic, 1e-9) / 1e6:.1f} MB/s')
+    if out:
+        values = zones[zone - 1][var or variables[-1]]
+        with rawprofile.open_file(out, 'wb') as f:
+            f.write(values.astype(raw_dtype(out_dtype or values.dtype, endian)))
+        print(f'write to file:{out}')
+
+def add_arguments(parser):
+    parser.add_argument('file', help="tec ascii file")
+    parser.add_argument('--float32', action="store_true", default=False, help="keep values as float32 instead of float64")
+    parser.add_argument('-v', '--var', type=str, default=None, help="variable to write with -o, default the last one")
+    parser.add_argument('-z', '--zone', type=int, default=1, help="1 based zone to write with -o")
+    parser.add_argument('-o', '--out', type=str, default=None, help="write the variable as a raw file")
+    parser.add_argument('-t', '--type', type=str, default=None, choices=RAW_TYPES, help="raw dtype of -o, byte, float or int8 .. float64, default the read dtype")
+    parser.add_argument('--endian', type=str, default="little", choices=ENDIANS, help="byte order of -o")
+    rawprofile.add_argument(parser)
+
+def run(args, parser):
+    out_dtype = parse_dtype(args.type) if args.type else None
+    with rawprofile.profile(args.profile, 'tecreader'):
+        main(args.file, np.float32 if args.float32 else np.float64, args.var, args.zone, args.out, out_dtype, args.endian)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    run(parser.parse_args(), parser)
+
+    # py .\tecreader.py D:/data/dataset/scivis/foot_64x64x64_uint8.tec -o foot_back.raw -t byte
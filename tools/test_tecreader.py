@@ -0,0 +1,124 @@
+import random
+import numpy as np
+import pytest
+
+from tecreader import parse_numbers, read_tec
+from rawtotec import write_np_to_tec_ascii
+
+# parse_numbers against float(), bit for bit, up to 18 digits, and the zones
+# of tec files read back: py -m pytest test_tecreader.py
+
+def _check(tokens):
+    got = parse_numbers(' '.join(tokens).encode())
+    want = np.array([float(t) for t in tokens])
+    bad = np.flatnonzero(got.view(np.int64) != want.view(np.int64))
+    assert bad.size == 0, [(tokens[i], got[i], want[i]) for i in bad[:10]]
+
+def test_edges():
+    _check(['8.597328E-306', '5.777158E-304', '5e-324', '-4.9e-324', '2.4703282292062328e-324',
+            '2.4703282292062327e-324', '2.2250738585072011e-308', '2.2250738585072014E-308',
+            '1.7976931348623157e308', '1.7976931348623159e308', '1e-400', '1e400', '0.' + '0' * 320 + '5',
+            '0', '-0.0', '1.5', '123456789012345678', '9007199254740993'])
+
+def test_exponent_range():
+    rng = random.Random(16)
+    tokens = []
+    for _ in range(50000):
+        e = rng.randint(-345, 308)
+        sign = '-' if rng.random() < 0.5 else ''
+        tokens.append(f'{sign}{rng.randint(1, 10 ** rng.randint(1, 18) - 1)}e{e}')
+        tokens.append(f'{sign}{rng.uniform(1, 10):.{rng.randint(0, 16)}f}E{e:+03d}')
+        tokens.append(repr(float(f'{sign}{rng.uniform(1, 10)}e{e}')))
+    _check(tokens)
+
+def test_bottom_of_range():
+    # %E and repr output between 1e-324 and 1e-280
+    rng = random.Random(306)
+    values = [float(f'{rng.uniform(1, 10)}e{rng.randint(-324, -280)}') for _ in range(50000)]
+    _check([f'{v:.6E}' for v in values] + [repr(v) for v in values])
+
+def test_point_lines():
+    # the same count of numbers on every line, integer columns next to decimal ones
+    rng = np.random.default_rng(4)
+    values = rng.normal(scale=100, size=3000).tolist()
+    lines = [f'{i % 7} {-i} {i // 7} {repr(v) if i % 5 else int(v)}' for i, v in enumerate(values)]
+    for text in ('\n'.join(lines), '\r\n'.join(lines) + '\r\n', '\n'.join(lines[:-1] + ['1 2'])):
+        got = parse_numbers(text.encode())
+        want = np.array([float(t) for t in text.split()])
+        assert np.array_equal(got.view(np.int64), want.view(np.int64))
+
+def _read_text(tmp_path, text:str):
+    path = tmp_path / 't.tec'
+    path.write_text(text)
+    return read_tec(str(path))
+
+@pytest.mark.parametrize('block', [False, True])
+def test_rawtotec_roundtrip(tmp_path, block):
+    values = np.random.default_rng(7).normal(size=(3, 4, 5)).astype(np.float32)
+    values[0, 0, :3] = [np.nan, -0.0, 1e-30]
+    path = str(tmp_path / 'v.tec')
+    write_np_to_tec_ascii(values, path, 3, block)
+    title, variables, zones = read_tec(path, np.float32)
+    assert variables == ["X", "Y", "Z", "PHI"] and len(zones) == 1
+    zone = zones[0]
+    assert zone.packing == ("BLOCK" if block else "POINT") and zone.shape == (3, 4, 5)
+    np.testing.assert_array_equal(zone["PHI"], values)
+    z, y, x = np.indices(values.shape)
+    for name, grid in (("X", x), ("Y", y), ("Z", z)):
+        np.testing.assert_array_equal(zone[name], grid)
+
+def test_point_zone(tmp_path):
+    _, variables, zones = _read_text(tmp_path, """TITLE = "p"
+VARIABLES = "X", "V"
+ZONE T="a" I=2 J=2 DATAPACKING=POINT
+0 1.5
+1,-2E1
+# a comment line
+0 3 1 .25
+""")
+    assert variables == ["X", "V"] and zones[0].title == "a" and zones[0].shape == (2, 2)
+    np.testing.assert_array_equal(zones[0]["X"], [[0, 1], [0, 1]])
+    np.testing.assert_array_equal(zones[0]["V"], [[1.5, -20], [3, 0.25]])
+
+def test_repeats_and_shared_variables(tmp_path):
+    _, _, zones = _read_text(tmp_path, """VARIABLES = "X" "Y" "P"
+ZONE T="first" I=4 DATAPACKING=BLOCK
+0 1 2 3
+4*7
+2*1.5 nan -inf
+ZONE T="second" I=4 DATAPACKING=BLOCK VARSHARELIST=([1-2]=1) PASSIVEVARLIST=([3])
+ZONE T="third" I=4 DATAPACKING=BLOCK VARSHARELIST=([1]) SOLUTIONTIME=2.5 STRANDID=1
+3*0 1
+1e-3 2E+2 -3.25 4
+""")
+    first, second, third = zones
+    np.testing.assert_array_equal(first["Y"], [7, 7, 7, 7])
+    np.testing.assert_array_equal(first["P"], [1.5, 1.5, np.nan, -np.inf])
+    assert second["X"] is first["X"] and second["Y"] is first["Y"] and second["P"] is None
+    # a VARSHARELIST without a zone shares with the zone before
+    assert third["X"] is second["X"] and third.solution_time == 2.5 and third.strand_id == 1
+    np.testing.assert_array_equal(third["Y"], [0, 0, 0, 1])
+    np.testing.assert_array_equal(third["P"], [0.001, 200, -3.25, 4])
+
+def test_fe_and_cell_centered_zones(tmp_path):
+    _, _, zones = _read_text(tmp_path, """VARIABLES = "X", "Y", "C"
+ZONE T="tri" N=4 E=2 ZONETYPE=FETRIANGLE DATAPACKING=BLOCK VARLOCATION=([3]=CELLCENTERED)
+0 1 0 1
+0 0 1 1
+10 20
+1 2 3
+2 4 3
+ZONE T="tri2" N=4 E=2 ZONETYPE=FETRIANGLE DATAPACKING=BLOCK VARLOCATION=([3]=CELLCENTERED) CONNECTIVITYSHAREZONE=1
+0 2 0 2 0 0 2 2 30 40
+""")
+    tri, tri2 = zones
+    assert tri.zone_type == "FETRIANGLE" and tri.shape == (4,) and tri.num_elements == 2
+    np.testing.assert_array_equal(tri["C"], [10, 20])
+    np.testing.assert_array_equal(tri.connectivity, [[0, 1, 2], [1, 3, 2]])
+    assert tri2.connectivity is tri.connectivity
+    np.testing.assert_array_equal(tri2["X"], [0, 2, 0, 2])
+    np.testing.assert_array_equal(tri2["C"], [30, 40])
+
+def test_short_zone(tmp_path):
+    with pytest.raises(ValueError, match='expected 4'):
+        _read_text(tmp_path, 'VARIABLES = "X"\nZONE I=4\n1 2 3\n')